@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+사이클마다 잔고 / 포지션 / 미체결 주문을 동시에 조회해 하나의 스냅샷으로 묶습니다.
+잔고 / 진입가는 float, 수량은 거래소 문자열을 그대로 담은 Decimal(주문 수량으로 다시 보낼 때 정확히).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from metrics import API_ERRORS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+READS = ("balance", "position", "open_orders")
+
+# 모든 심볼이 공유하는 조회 전용 풀 (심볼 워커 풀과 분리해 서로 막지 않게)
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="account-read")
+
+
+@dataclass
+class AccountSnapshot:
+    """한 시점의 계정 상태. ok[이름] 이 False 인 항목은 기본값이며 신뢰할 수 없습니다."""
+    balance: float = 0.0
+    side: Optional[str] = None
+    qty: Decimal = Decimal("0")
+    entry_price: float = 0.0
+    open_orders: list = field(default_factory=list)
+    ok: dict = field(default_factory=lambda: dict.fromkeys(READS, False))
+    errors: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        """세 조회가 모두 성공했는지 (신규 진입은 이 경우에만)"""
+        return all(self.ok.values())
+
+    @property
+    def open_orders_exist(self) -> bool:
+        return len(self.open_orders) > 0
+
+    @property
+    def failed(self) -> list:
+        return [name for name in READS if not self.ok[name]]
+
+
+# --- 개별 조회 (실패 시 예외) ------------------------------------------------------------
+def read_balance(client) -> float:
+    acc = client.account(recvWindow=5000)
+    for a in acc.get("assets", []):
+        if a.get("asset") == "USDT":
+            return float(a.get("availableBalance", 0))
+    return 0.0
+
+
+def read_position(client, symbol: str):
+    # positionAmt가 0이면 포지션 없음
+    positions = client.get_position_risk(symbol=symbol, recvWindow=5000)
+    for p in positions:
+        if p.get("symbol") == symbol:
+            amt = Decimal(str(p.get("positionAmt", "0")))
+            if amt == 0:
+                break
+            entry = float(p.get("entryPrice", 0))
+            side = "LONG" if amt > 0 else "SHORT"
+            return side, abs(amt), entry
+    return None, Decimal("0"), 0.0
+
+
+def read_open_orders(client, symbol: str) -> list:
+    # 목록은 get_orders (/fapi/v1/openOrders). get_open_orders 는 주문 1건 조회(orderId 필수)
+    return list(client.get_orders(symbol=symbol, recvWindow=5000))
+
+
+def fetch_snapshot(client, symbol: str, timeout: float = 3.0) -> AccountSnapshot:
+    """
+    세 조회를 동시에 보내고 timeout 초 안에 끝난 것만 반영합니다.
+    시간 초과된 요청은 풀에서 끝까지 실행되지만 결과는 버립니다.
+    """
+    start = time.perf_counter()
+    futures = {
+        "balance": _pool.submit(read_balance, client),
+        "position": _pool.submit(read_position, client, symbol),
+        "open_orders": _pool.submit(read_open_orders, client, symbol),
+    }
+    wait(futures.values(), timeout=timeout)
+
+    snap = AccountSnapshot()
+    for name, future in futures.items():
+        if not future.done():
+            snap.errors[name] = f"timeout ({timeout:.1f}s)"
+            API_ERRORS.inc(call=name)
+            continue
+        try:
+            result = future.result()
+        except Exception as e:
+            snap.errors[name] = str(e)
+            API_ERRORS.inc(call=name)
+            continue
+        if name == "balance":
+            snap.balance = result
+        elif name == "position":
+            snap.side, snap.qty, snap.entry_price = result
+        else:
+            snap.open_orders = result
+        snap.ok[name] = True
+    snap.elapsed = time.perf_counter() - start
+    STAGE_SECONDS.observe(snap.elapsed, stage="account_snapshot")
+    return snap
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+캔들 단위 백테스트: 저장된 캔들을 실거래와 같은 판단 코드(strategy.py)로 재생합니다.
+
+실거래 흐름을 그대로 따릅니다.
+- 캔들 마감 시 판단 → 다음 캔들 시가에 시장가 진입
+- 진입 직후 트레일링 스탑(TRAIL_RATE, 0 이면 STOP_MARKET 손절) + 백업 익절 주문
+- 캔들 마감 시 HARD SL 점검 → 다음 캔들 시가에 시장가 청산
+- 보호 주문 체결 직후의 사이클은 잔여 주문 정리만 하고 진입하지 않음
+
+보호 주문은 캔들 내부 경로를 O → L → H → C (양봉) / O → H → L → C (음봉) 로 가정해
+구간별로 체결 여부를 판정합니다. 인디케이터와 진입 신호는 NumPy 로 한 번에 계산하고,
+포지션 시뮬레이션 루프는 포지션 보유 구간만 돌며 신호 없는 구간은 건너뜁니다.
+
+실행: python backtest.py --symbol BTCUSDT --timeframe 15m [--start 2025-01-01] [--trades trades.csv]
+"""
+import argparse
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from indicators import backfill_head, ema, rsi
+from strategy import StrategyParams, entry_conditions, hard_sl_hit, position_pnl
+
+logger = logging.getLogger(__name__)
+
+TRADE_COLUMNS = ("entry_time", "exit_time", "side", "entry_price", "exit_price",
+                 "qty", "pnl", "pnl_pct", "reason")
+
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame
+    equity: pd.Series  # 캔들 마감 시점 평가금액 (open_time 인덱스)
+    params: StrategyParams
+    initial_balance: float
+
+    def summary(self) -> dict:
+        return summarize(self.equity.to_numpy(), self.trades["pnl"].to_numpy(),
+                         self.initial_balance)
+
+
+def summarize(equity: np.ndarray, pnls: np.ndarray, initial_balance: float) -> dict:
+    """총손익 / 수익률 / 최대 낙폭 / 거래 수 / 승률"""
+    final = float(equity[-1]) if len(equity) else initial_balance
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = float(((equity / peak) - 1).min() * 100) if len(equity) else 0.0
+    return {
+        "pnl": final - initial_balance,
+        "return_pct": (final / initial_balance - 1) * 100,
+        "max_drawdown_pct": drawdown,
+        "trades": int(len(pnls)),
+        "win_rate": float((pnls > 0).mean() * 100) if len(pnls) else 0.0,
+    }
+
+
+# --- 신호 계산 (벡터) ----------------------------------------------------------------------
+def compute_signals(close: np.ndarray, params: StrategyParams, rsi_period: int = 14):
+    """캔들 i 마감 시점의 (long, short) 진입 신호 배열. i=0 은 이전 캔들이 없어 False"""
+    ema_fast = ema(close, params.ema_fast)
+    ema_slow = ema(close, params.ema_slow)
+    rsi_values = backfill_head(rsi(close, rsi_period))
+    long_sig = np.zeros(len(close), dtype=bool)
+    short_sig = np.zeros(len(close), dtype=bool)
+    long_sig[1:], short_sig[1:] = entry_conditions(
+        close[1:], ema_fast[1:], ema_slow[1:], rsi_values[1:],
+        ema_fast[:-1], ema_slow[:-1], params)
+    return long_sig, short_sig
+
+
+# --- 포지션 시뮬레이션 -------------------------------------------------------------------
+def _walk_bar(path, prev_x, d, peak_x, tp_x, sl_x, cb):
+    """
+    캔들 내부 경로를 d(LONG=1, SHORT=-1) 방향 좌표(x = d * 가격)로 따라가며
+    보호 주문 체결 판정. (체결가 또는 None, 사유, 갱신된 peak_x) 반환
+    """
+    cur = prev_x
+    for k, price in enumerate(path):
+        x = d * price
+        if x >= cur:
+            # 유리한 방향 이동: 익절 도달 여부, 트레일링 기준 고점 갱신
+            if x >= tp_x:
+                return d * (tp_x if k else x), "TAKE_PROFIT", peak_x
+            if x > peak_x:
+                peak_x = x
+        else:
+            # 불리한 방향 이동: 트레일링 스탑(고점 대비 cb) 또는 고정 손절
+            stop_x = peak_x * (1 - d * cb) if cb > 0 else sl_x
+            if x <= stop_x:
+                reason = "TRAILING_STOP" if cb > 0 else "STOP_MARKET"
+                return d * (stop_x if k else x), reason, peak_x
+        cur = x
+    return None, None, peak_x
+
+
+def simulate(open_, high, low, close, long_sig, short_sig, params: StrategyParams,
+             initial_balance: float = 1000.0, fee_rate: float = 0.0005, start: int = 0):
+    """
+    배열 기반 시뮬레이션 코어 (파라미터 스윕에서도 직접 사용).
+    (거래 목록 [(진입 idx, 청산 idx, 방향, 진입가, 청산가, 수량, 손익, 사유)], 평가금액 배열) 반환
+    """
+    o, h, l, c = (a.tolist() for a in (open_, high, low, close))
+    n = len(c)
+    signal_idx = np.flatnonzero(long_sig | short_sig)
+    signal_idx = signal_idx[signal_idx >= start]
+    is_long = long_sig.tolist()
+    cb = params.trail_rate / 100
+    tp_pct = params.backup_tp / 100
+    sl_pct = abs(params.hard_sl) / 100
+
+    equity = np.empty(n)
+    trades = []
+    balance = initial_balance
+    filled = 0  # equity 를 채운 구간 끝 (배타)
+    next_free = start  # 이 캔들 마감부터 진입 판단 가능
+    while True:
+        # 포지션 없음: 다음 신호 캔들까지 건너뜀 (마지막 캔들의 신호는 진입할 시가가 없음)
+        j = np.searchsorted(signal_idx, next_free)
+        if j == len(signal_idx) or signal_idx[j] >= n - 1:
+            break
+        sig = int(signal_idx[j])
+        d = 1 if is_long[sig] else -1
+        side = "LONG" if d > 0 else "SHORT"
+
+        # 다음 캔들 시가에 시장가 진입 + 보호 주문
+        i = sig + 1
+        equity[filled:i] = balance
+        entry = o[i]
+        qty = balance * params.position_ratio / entry
+        balance -= entry * qty * fee_rate
+        peak_x = prev_x = d * entry
+        tp_x = d * entry * (1 + d * tp_pct)
+        sl_x = d * entry * (1 - d * sl_pct)
+        hard_exit = False
+        exit_price = reason = None
+        while i < n:
+            if hard_exit:
+                exit_price, reason = o[i], "HARD_SL"
+                break
+            path = (o[i], l[i], h[i], c[i]) if c[i] >= o[i] else (o[i], h[i], l[i], c[i])
+            exit_price, reason, peak_x = _walk_bar(path, prev_x, d, peak_x, tp_x, sl_x, cb)
+            if exit_price is not None:
+                break
+            equity[i] = balance + d * (c[i] - entry) * qty
+            # 캔들 마감 시 HARD SL 점검 → 다음 캔들 시가에 시장가 청산
+            hard_exit = hard_sl_hit(position_pnl(side, entry, c[i]), params)
+            prev_x = d * c[i]
+            i += 1
+        if exit_price is None:
+            # 데이터 끝까지 보유 중: 평가금액만 남기고 종료
+            filled = n
+            break
+
+        gross = d * (exit_price - entry) * qty
+        balance += gross - exit_price * qty * fee_rate
+        trades.append((sig + 1, i, d, entry, exit_price, qty,
+                       gross - (entry + exit_price) * qty * fee_rate, reason))
+        equity[i] = balance
+        filled = i + 1
+        # HARD SL 은 시가 청산이라 같은 캔들 마감에 다시 판단,
+        # 보호 주문 체결 직후 사이클은 잔여 주문 정리만 하고 진입하지 않음
+        next_free = i if reason == "HARD_SL" else i + 1
+    equity[filled:] = balance
+    return trades, equity
+
+
+def run_backtest(candles: pd.DataFrame, params: StrategyParams = StrategyParams(),
+                 initial_balance: float = 1000.0, fee_rate: float = 0.0005,
+                 warmup=None) -> BacktestResult:
+    """
+    candles: open_time / open / high / low / close 컬럼 (CandleStore.load 결과 그대로).
+    warmup: 인디케이터 안정화 전 진입 금지 캔들 수 (기본 ema_slow)
+    """
+    open_time = candles["open_time"].to_numpy(dtype=np.int64)
+    o, h, l, c = (candles[col].to_numpy(dtype=np.float64)
+                  for col in ("open", "high", "low", "close"))
+    long_sig, short_sig = compute_signals(c, params)
+    start = params.ema_slow if warmup is None else warmup
+    raw_trades, equity = simulate(o, h, l, c, long_sig, short_sig, params,
+                                  initial_balance, fee_rate, start)
+
+    trades = pd.DataFrame(
+        [(open_time[ei], open_time[xi], "LONG" if d > 0 else "SHORT", entry, exit_price,
+          qty, pnl, pnl / (entry * qty) * 100, reason)
+         for ei, xi, d, entry, exit_price, qty, pnl, reason in raw_trades],
+        columns=list(TRADE_COLUMNS))
+    return BacktestResult(trades=trades,
+                          equity=pd.Series(equity, index=open_time, name="equity"),
+                          params=params,
+                          initial_balance=initial_balance)
+
+
+def _to_ms(date: str):
+    return int(pd.Timestamp(date, tz="UTC").value // 1_000_000) if date else None
+
+
+def main():
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="저장된 캔들로 전략 백테스트")
+    parser.add_argument("--db", default="candles.sqlite3")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--timeframe", default="15m")
+    parser.add_argument("--start", help="시작일 (UTC, 예: 2025-01-01)")
+    parser.add_argument("--end", help="종료일 (UTC)")
+    parser.add_argument("--balance", type=float, default=1000.0)
+    parser.add_argument("--fee", type=float, default=0.0005, help="시장가 수수료율")
+    parser.add_argument("--position-ratio", type=float, default=0.10)
+    parser.add_argument("--trail-rate", type=float, default=1.5)
+    parser.add_argument("--hard-sl", type=float, default=-5.0)
+    parser.add_argument("--backup-tp", type=float, default=5.0)
+    parser.add_argument("--trades", help="거래 목록 CSV 저장 경로")
+    parser.add_argument("--equity", help="평가금액 곡선 CSV 저장 경로")
+    args = parser.parse_args()
+
+    store = CandleStore(args.db, args.symbol, args.timeframe)
+    candles = store.load(_to_ms(args.start), _to_ms(args.end))
+    store.close()
+    if candles.empty:
+        print(f"저장된 캔들 없음: {args.symbol} {args.timeframe} ({args.db})")
+        return
+
+    params = StrategyParams(position_ratio=args.position_ratio,
+                            trail_rate=args.trail_rate,
+                            hard_sl=args.hard_sl,
+                            backup_tp=args.backup_tp)
+    result = run_backtest(candles, params, args.balance, args.fee)
+    summary = result.summary()
+    print(f"{args.symbol} {args.timeframe}: 캔들 {len(candles)}개, {params}")
+    print(f"손익 {summary['pnl']:+.2f} USDT ({summary['return_pct']:+.2f}%), "
+          f"최대 낙폭 {summary['max_drawdown_pct']:.2f}%, "
+          f"거래 {summary['trades']}회, 승률 {summary['win_rate']:.1f}%")
+    if args.trades:
+        result.trades.to_csv(args.trades, index=False)
+    if args.equity:
+        result.equity.to_csv(args.equity, index_label="open_time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""백테스트 벤치마크: 1년치 15분봉 (35,040개) 재생 시간
+
+실행: python benchmarks/bench_backtest.py [--db candles.sqlite3]
+  --db 를 주면 저장된 BTCUSDT 15m 캔들로, 없으면 합성 캔들로 측정합니다.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import run_backtest  # noqa: E402
+
+BARS_PER_YEAR = 365 * 24 * 4
+
+
+def make_candles(n: int, seed: int = 42) -> pd.DataFrame:
+    """랜덤워크 종가 + 캔들 내부 변동폭으로 만든 합성 OHLC"""
+    rng = np.random.default_rng(seed)
+    close = 90_000 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.002, (2, n))) * close
+    return pd.DataFrame({
+        "open_time": 1_700_000_000_000 + np.arange(n, dtype=np.int64) * 900_000,
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="CandleStore SQLite 경로")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.db:
+        from candle_store import CandleStore
+        store = CandleStore(args.db, "BTCUSDT", "15m")
+        candles = store.load()
+        store.close()
+        source = args.db
+    else:
+        candles = make_candles(BARS_PER_YEAR)
+        source = "합성"
+
+    run_backtest(candles)  # 워밍업
+    times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = run_backtest(candles)
+        times.append(time.perf_counter() - start)
+    summary = result.summary()
+    print(f"캔들 {len(candles):,}개 ({source}), 거래 {summary['trades']}회, "
+          f"수익률 {summary['return_pct']:+.2f}%, 최대 낙폭 {summary['max_drawdown_pct']:.2f}%")
+    print(f"run_backtest: 중앙값 {np.median(times) * 1000:.1f} ms, "
+          f"최소 {min(times) * 1000:.1f} ms ({args.repeat}회)")
+
+
+if __name__ == "__main__":
+    main()
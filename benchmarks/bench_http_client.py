@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""REST 연결 벤치마크: 유휴 구간 뒤 첫 주문 요청의 지연
+
+로컬 HTTPS 대역 서버가 새 연결마다 TCP+TLS 왕복(2 RTT)을, 요청마다 1 RTT 를 지연시키고
+idle 초 동안 요청이 없는 keep-alive 연결은 닫습니다(거래소 쪽 유휴 연결 정리 흉내).
+캔들 사이 유휴 구간 뒤 첫 new_order 지연을 세 방식으로 비교합니다.
+
+  재시작마다 새 클라이언트 : 기존 get_client (run_bot 재시작마다 UMFutures 생성)
+  재사용 클라이언트        : ClientFactory.get() 재사용, 예열 없음 (끊긴 연결 재연결)
+  재사용 + 마감 전 예열     : ClientFactory.prewarm() 후 주문
+
+실행: python benchmarks/bench_http_client.py [--rtt-ms 40] [--rounds 5] [--idle 1.0]
+(openssl 명령으로 임시 자체 서명 인증서를 만듭니다)
+"""
+import argparse
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.um_futures import UMFutures  # noqa: E402
+
+from client_factory import ClientFactory  # noqa: E402
+
+
+def make_cert(directory):
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                    "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=127.0.0.1",
+                    "-addext", "subjectAltName=IP:127.0.0.1"],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+class StandIn(ThreadingHTTPServer):
+    """새 연결: 2 RTT 후 TLS 핸드셰이크, 요청: 1 RTT, idle 초 유휴 연결 종료"""
+
+    daemon_threads = True
+
+    def __init__(self, cert, key, rtt, idle):
+        self.rtt = rtt
+        self.connections = 0
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(cert, key)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            timeout = idle
+            disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 지연 ACK 대기 방지
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                time.sleep(server.rtt)
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                body = {"orderId": 1, "status": "NEW"} if self.command == "POST" else {}
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.url = f"https://127.0.0.1:{self.server_address[1]}"
+
+    def finish_request(self, request, client_address):
+        self.connections += 1
+        time.sleep(2 * self.rtt)  # TCP 핸드셰이크 + TLS 1.3 핸드셰이크
+        try:
+            request = self.context.wrap_socket(request, server_side=True)
+        except (ssl.SSLError, OSError):
+            return
+        super().finish_request(request, client_address)
+
+
+def trust(session, cert):
+    session.trust_env = False  # REQUESTS_CA_BUNDLE / 프록시 환경변수 무시
+    session.verify = cert
+
+
+def order(client):
+    start = time.perf_counter()
+    client.new_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=40.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--idle", type=float, default=1.0,
+                        help="서버가 유휴 연결을 닫는 시간 (초)")
+    args = parser.parse_args()
+    gap = args.idle * 1.5  # 캔들 사이 유휴 구간 (서버 유휴 제한보다 길게)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_cert(tmp)
+        server = StandIn(cert, key, args.rtt_ms / 1000, args.idle)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def fresh_client():
+            client = UMFutures(key="x", secret="y", base_url=server.url)
+            trust(client.session, cert)
+            return client
+
+        factory = ClientFactory("x", "y", server.url)
+        trust(factory.get().session, cert)
+        order(factory.get())  # 최초 연결
+
+        results = {"재시작마다 새 클라이언트": [], "재사용 클라이언트": [],
+                   "재사용 + 마감 전 예열": []}
+        restart = {"재시작마다 새 클라이언트": [], "재사용 클라이언트": []}
+        for _ in range(args.rounds):
+            # 크래시 재시작 직후 (유휴 구간 없음)
+            restart["재시작마다 새 클라이언트"].append(order(fresh_client()))
+            restart["재사용 클라이언트"].append(order(factory.get()))
+            time.sleep(gap)
+            results["재시작마다 새 클라이언트"].append(order(fresh_client()))
+            time.sleep(gap)
+            results["재사용 클라이언트"].append(order(factory.get()))
+            time.sleep(gap)
+            factory.prewarm(1)  # 엔진은 마감 PREWARM_LEAD 초 전에 호출
+            results["재사용 + 마감 전 예열"].append(order(factory.get()))
+        server.shutdown()
+
+    print(f"첫 new_order 지연 (RTT {args.rtt_ms:g} ms, {args.rounds}회, "
+          f"서버 연결 수 {server.connections})")
+    for heading, rows in ((f"유휴 {gap:.1f}초 뒤", results), ("재시작 직후", restart)):
+        print(f"[{heading}]")
+        print(f"{'방식':<24}{'중앙값 ms':>10}{'최대 ms':>10}")
+        for title, values in rows.items():
+            print(f"{title:<24}{statistics.median(values) * 1000:>10.1f}"
+                  f"{max(values) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""calculate_indicators 벤치마크: NumPy 재귀 필터 vs 기존 .iloc 루프
+
+실행: python benchmarks/bench_indicators.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import IndicatorState, compute_indicators  # noqa: E402
+
+SIZES = [200, 10_000, 1_000_000]
+LEGACY_MAX = 10_000  # 기존 루프는 1M 에서 수 분이 걸려 생략
+
+
+def legacy_indicators(close: pd.Series) -> dict:
+    """기존 main.calculate_indicators 의 pandas/.iloc 구현 (기준값)
+
+    원본 루프는 range(14, ...) 로 시작해 NaN 인 avg_gain.iloc[13] 을 시드로 쓰는 바람에
+    RSI 전체가 NaN 이 되었음. 여기서는 의도대로 인덱스 14 의 SMA 를 시드로 삼도록
+    시작점만 15 로 바로잡아 비교 기준으로 사용합니다.
+    """
+    ema20 = close.ewm(span=20, adjust=False).mean()
+    ema60 = close.ewm(span=60, adjust=False).mean()
+    delta = close.diff()
+    gains = delta.clip(lower=0)
+    losses = -delta.clip(upper=0)
+    avg_gain = gains.rolling(14).mean()
+    avg_loss = losses.rolling(14).mean()
+    for i in range(15, len(close)):
+        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * 13 + gains.iloc[i]) / 14
+        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * 13 + losses.iloc[i]) / 14
+    avg_loss = avg_loss.fillna(0).replace(0, 1e-10)
+    rsi = (100 - 100 / (1 + avg_gain / avg_loss)).bfill()
+    return {"ema20": ema20.to_numpy(), "ema60": ema60.to_numpy(), "rsi": rsi.to_numpy()}
+
+
+def make_close(n: int, seed: int = 42) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 90_000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+
+def per_call(fn, *args, min_time: float = 0.5) -> float:
+    """min_time 동안 반복 호출한 평균 시간(초)"""
+    fn(*args)  # 워밍업
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(*args)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main():
+    print("=" * 60)
+    print("📊 인디케이터 벤치마크 (EMA20 / EMA60 / Wilder RSI14)")
+    print("=" * 60)
+
+    for n in SIZES:
+        close = make_close(n)
+        new = compute_indicators(close)
+        t_new = per_call(compute_indicators, close)
+        line = f"{n:>9,}캔들 | NumPy: {t_new * 1e3:9.3f} ms/call"
+
+        if n <= LEGACY_MAX:
+            series = pd.Series(close)
+            old = legacy_indicators(series)
+            for key in ("ema20", "ema60", "rsi"):
+                np.testing.assert_allclose(new[key], old[key], rtol=1e-9, atol=1e-9)
+            t_old = per_call(legacy_indicators, series, min_time=0.2)
+            line += f" | 기존 루프: {t_old * 1e3:9.3f} ms/call ({t_old / t_new:,.0f}배)"
+        print(line)
+
+    print("✅ 기존 구현과 값 일치 확인 (rtol=1e-9)")
+
+    # 증분 갱신: 캔들 1개당 비용 (이력 길이와 무관)
+    close = make_close(10_000)
+    open_times = np.arange(len(close), dtype=np.int64) * 900_000
+    state = IndicatorState.from_history(open_times[:200], close[:200])
+    start = time.perf_counter()
+    for t, c in zip(open_times[200:].tolist(), close[200:].tolist()):
+        state.update(t, c)
+    t_inc = (time.perf_counter() - start) / (len(close) - 200)
+    ref = compute_indicators(close)
+    for key in ("ema20", "ema60", "rsi"):
+        np.testing.assert_allclose(state.last[key], ref[key][-1], rtol=1e-9)
+    print(f"증분 갱신 (IndicatorState.update): {t_inc * 1e6:.2f} µs/캔들")
+
+
+if __name__ == "__main__":
+    main()
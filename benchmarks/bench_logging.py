@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""로깅 벤치마크: 거래 스레드에서 로그 1회 호출이 쓰는 시간
+
+기존 방식(FileHandler + StreamHandler 직접 기록, f-string)과 큐 파이프라인(log_pipeline)을
+정상 디스크 / 느린 싱크(기록마다 지연) 조건에서 비교합니다.
+
+실행: python benchmarks/bench_logging.py [--calls 20000] [--slow-ms 2]
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_pipeline  # noqa: E402
+
+# 주문 응답 dict 정도 크기의 인자
+ORDER = {"orderId": 4059302910, "symbol": "BTCUSDT", "status": "NEW", "clientOrderId":
+         "x-Cb7ytekJ0a1b2c3d4e5f6", "price": "0", "avgPrice": "0.00", "origQty": "0.010",
+         "executedQty": "0", "cumQuote": "0", "timeInForce": "GTC",
+         "type": "TRAILING_STOP_MARKET", "reduceOnly": True, "side": "SELL",
+         "priceRate": "1.5", "updateTime": 1763000000000}
+
+
+class SlowStream(io.StringIO):
+    """기록마다 delay 초가 걸리는 출력 (느린 디스크 / 막힌 stdout 파이프 흉내)"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, s):
+        time.sleep(self.delay)
+        return len(s)
+
+
+def legacy_setup(path, stream):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    for handler in (logging.FileHandler(path), logging.StreamHandler(stream)):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def legacy_call(log, side, label):
+    log.info(f"[{side}] {label}: {ORDER}")
+
+
+def queued_call(log, side, label):
+    log.info("[%s] %s: %s", side, label, ORDER)
+
+
+def event_call(log, side, label):
+    log_pipeline.log_event("order", symbol="BTCUSDT", kind=label, side=side,
+                           qty="0.010", ok=True, order_id=ORDER["orderId"])
+
+
+def per_call_us(fn, calls):
+    log = logging.getLogger("bench")
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(log, "LONG", "트레일링 스탑 생성 (TSM=1.5%)")
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--slow-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    slow_calls = max(1, min(args.calls, int(500 / max(args.slow_ms, 0.01))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "bot.log")
+        rows = []
+        for title, delay, calls in (("정상 디스크", 0.0, args.calls),
+                                    (f"느린 싱크 ({args.slow_ms:g} ms/기록)",
+                                     args.slow_ms / 1000, slow_calls)):
+            stream = SlowStream(delay) if delay else io.StringIO()
+            legacy_setup(log_path, stream)
+            legacy = per_call_us(legacy_call, calls)
+
+            log_pipeline.setup_logging(log_path, console=False,
+                                       event_path=os.path.join(tmp, "events.jsonl"),
+                                       queue_size=2 * calls + 10)
+            # 콘솔 대신 같은 느린 싱크로 기록하도록 리스너 핸들러에 추가
+            log_pipeline._listener.handlers += (logging.StreamHandler(stream),)
+            queued = per_call_us(queued_call, calls)
+            event = per_call_us(event_call, calls)
+            log_pipeline.stop_logging()
+            rows.append((title, legacy, queued, event))
+
+        log_pipeline.setup_logging(log_path, console=False)  # 이벤트 로그 꺼짐
+        disabled = per_call_us(event_call, args.calls)
+        log_pipeline.stop_logging()
+
+    print("로그 1회 호출 시 거래 스레드 소요 시간 (µs)")
+    print(f"{'조건':<24}{'기존 직접 기록':>14}{'큐 파이프라인':>14}{'JSON 이벤트':>12}")
+    for title, legacy, queued, event in rows:
+        print(f"{title:<24}{legacy:>14.1f}{queued:>14.1f}{event:>12.1f}")
+    print(f"이벤트 로그 꺼짐: log_event {disabled:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
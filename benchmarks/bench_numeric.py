@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""판단 루프 수치 계산 벤치마크: Decimal 변환 경로 vs 격자 정수(numeric.Grid) + float 경로
+
+사이클 1회의 수치 계산(현재가 변환, 손익률, 진입 수량 / 보호 주문 가격 내림, 주문 파라미터 문자열)을
+두 방식으로 반복해 시간을 비교하고, 내림 결과(주문 문자열)가 Decimal 규칙과 같은지 확인합니다.
+
+실행: python benchmarks/bench_numeric.py [--cycles 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import ROUND_DOWN, Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from numeric import Grid  # noqa: E402
+from strategy import StrategyParams, hard_sl_hit, position_pnl, protective_prices  # noqa: E402
+
+STEP, TICK, RATIO = "0.001", "0.1", 0.10
+
+
+def quantize(value: Decimal, step: Decimal) -> Decimal:
+    """이전 main.quantize_qty / quantize_price"""
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+def decimal_cycle(price, balance, entry, params, step, tick):
+    current = Decimal(str(price))
+    balance = Decimal(str(balance))
+    entry = Decimal(str(entry))
+    position_pnl("LONG", entry, current)  # 상태 로그
+    hit = hard_sl_hit(position_pnl("LONG", entry, current), params)  # HARD SL (같은 계산 한 번 더)
+    qty = quantize(balance * Decimal(str(RATIO)) / current, step)
+    sl, tp = protective_prices("LONG", current, params)
+    return hit, (format(qty.normalize(), "f"), format(quantize(sl, tick).normalize(), "f"),
+                 format(quantize(tp, tick).normalize(), "f"))
+
+
+def grid_cycle(price, balance, entry, params, qty_grid, price_grid):
+    pnl = position_pnl("LONG", entry, price)
+    hit = hard_sl_hit(pnl, params)
+    qty = qty_grid.floor(balance * RATIO / price)
+    sl, tp = protective_prices("LONG", price, params)
+    return hit, (qty_grid.format(qty), price_grid.format(price_grid.floor(sl)),
+                 price_grid.format(price_grid.floor(tp)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    inputs = [(round(rng.uniform(100, 100000), 1), round(rng.uniform(100, 10000), 4),
+               round(rng.uniform(100, 100000), 1)) for _ in range(args.cycles)]
+    params = StrategyParams()
+    step, tick = Decimal(STEP), Decimal(TICK)
+    qty_grid, price_grid = Grid(STEP), Grid(TICK)
+
+    start = time.perf_counter()
+    expected = [decimal_cycle(p, b, e, params, step, tick) for p, b, e in inputs]
+    decimal_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = [grid_cycle(p, b, e, params, qty_grid, price_grid) for p, b, e in inputs]
+    grid_time = time.perf_counter() - start
+
+    # 문자열 표기(0.590 / 0.59)는 달라도 값이 같아야 함
+    mismatches = sum(1 for (hit_a, a), (hit_b, b) in zip(expected, got)
+                     if hit_a != hit_b or any(Decimal(x) != Decimal(y) for x, y in zip(a, b)))
+    print(f"사이클 {args.cycles}회 (stepSize {STEP}, tickSize {TICK})")
+    print(f"{'방식':<12}{'사이클당 us':>12}")
+    for title, elapsed in (("Decimal", decimal_time), ("Grid+float", grid_time)):
+        print(f"{title:<12}{elapsed / args.cycles * 1e6:>12.2f}")
+    print(f"HARD SL 판정 / 내림 결과 불일치: {mismatches}건")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""최근 캔들 메모리 벤치마크: 튜플 deque vs OHLCVRing (NumPy 컬럼 링 버퍼)
+
+심볼마다 최근 1000개 마감 캔들을 메모리에 두는 두 방식을 비교합니다.
+  튜플 deque : 이전 CandleStore (deque(maxlen) 에 행 튜플, 재구성 시 리스트로 컬럼 추출)
+  OHLCVRing  : 타입 레코드 배열에 제자리 추가, 재구성은 복사 없는 뷰
+심볼 수만큼 만든 뒤의 메모리(tracemalloc), 캔들 1개 추가 시간, 인디케이터 재구성 시간을 잽니다.
+
+실행: python benchmarks/bench_ohlcv.py [--symbols 50] [--capacity 1000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import IndicatorState  # noqa: E402
+from ohlcv import OHLCVRing  # noqa: E402
+
+HISTORY = 200
+
+
+def make_rows(n, rng):
+    rows, price = [], 100.0
+    for i in range(n):
+        price *= 1 + rng.gauss(0, 0.002)
+        t = 1_700_000_000_000 + i * 900_000
+        rows.append((t, price, price * 1.001, price * 0.999, price, 10.0, t + 899_999,
+                     1000.0, 100, 5.0, 500.0))
+    return rows
+
+
+def build_deque(rows, capacity):
+    d = deque(maxlen=capacity)
+    d.extend(rows)
+    return d
+
+
+def build_ring(rows, capacity):
+    r = OHLCVRing(capacity)
+    r.extend(rows)
+    return r
+
+
+def rebuild_deque(d):
+    rows = list(d)[-HISTORY:]
+    return IndicatorState.from_history([r[0] for r in rows], [r[4] for r in rows])
+
+
+def rebuild_ring(r):
+    return IndicatorState.from_history(r.column("open_time", HISTORY), r.column("close", HISTORY))
+
+
+def measure(title, build, append, rebuild, extra, symbols, capacity):
+    # 심볼마다 행을 새로 만들어야 deque 쪽 튜플 / float 객체가 심볼 수만큼 잡힘
+    tracemalloc.start()
+    stores = [build(make_rows(capacity, random.Random(i)), capacity) for i in range(symbols)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for row in extra:
+        for s in stores:
+            append(s, row)
+    append_us = (time.perf_counter() - start) / (len(extra) * symbols) * 1e6
+
+    start = time.perf_counter()
+    for s in stores:
+        rebuild(s)
+    rebuild_us = (time.perf_counter() - start) / symbols * 1e6
+    return title, memory / symbols / 1024, append_us, rebuild_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--capacity", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    extra = make_rows(args.capacity + 200, rng)[args.capacity:]
+
+    results = [
+        measure("튜플 deque", build_deque, deque.append, rebuild_deque,
+                extra, args.symbols, args.capacity),
+        measure("OHLCVRing", build_ring, OHLCVRing.append, rebuild_ring,
+                extra, args.symbols, args.capacity),
+    ]
+    print(f"심볼 {args.symbols}개 x 캔들 {args.capacity}개, 재구성 {HISTORY}개")
+    print(f"{'방식':<14}{'심볼당 KiB':>12}{'추가 us':>10}{'재구성 us':>12}")
+    for title, kib, append_us, rebuild_us in results:
+        print(f"{title:<14}{kib:>12.1f}{append_us:>10.2f}{rebuild_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
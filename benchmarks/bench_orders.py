@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""보호 주문 벤치마크: 순차 new_order vs 배치(batchOrders) 의 무방비 구간
+
+로컬 목(mock) 거래소(HTTP)에 요청마다 왕복 지연을 주고, 실제 UMFutures 클라이언트로
+시장가 진입 체결 응답 → 마지막 보호 주문 응답까지의 시간을 비교합니다.
+
+실행: python benchmarks/bench_orders.py [--rtt-ms 80] [--rounds 10]
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.um_futures import UMFutures  # noqa: E402
+
+from orders import protective_legs, submit_batch  # noqa: E402
+
+SYMBOL = "BTCUSDT"
+
+
+class MockExchange:
+    """/fapi/v1/order, /fapi/v1/batchOrders 만 흉내내는 로컬 거래소"""
+
+    def __init__(self, rtt: float, reject_types=()):
+        self.rtt = rtt
+        self.reject_types = set(reject_types)
+        self.requests = 0
+        self._ids = itertools.count(1)
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                exchange.requests += 1
+                time.sleep(exchange.rtt)  # 네트워크 왕복 + 매칭 엔진 처리
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == "/fapi/v1/batchOrders":
+                    body = [exchange.place(o) for o in json.loads(query["batchOrders"])]
+                    status = 200
+                else:
+                    body = exchange.place(query)
+                    status = 400 if "code" in body else 200
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def place(self, order: dict) -> dict:
+        if order.get("type") in self.reject_types:
+            return {"code": -2021, "msg": "Order would immediately trigger."}
+        return {"orderId": next(self._ids), "symbol": order.get("symbol"),
+                "type": order.get("type"), "status": "NEW"}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def sequential(client, qty, sl_price, tp_price):
+    """기존 main.py 방식: 트레일링 스탑 → (실패 시 STOP_MARKET) → 익절 순차 전송"""
+    try:
+        client.new_order(symbol=SYMBOL, side="SELL", type="TRAILING_STOP_MARKET",
+                         quantity=float(qty), callbackRate=1.5, reduceOnly=True)
+    except Exception:
+        try:
+            client.new_order(symbol=SYMBOL, side="SELL", type="STOP_MARKET",
+                             quantity=float(qty), stopPrice=float(sl_price),
+                             reduceOnly=True)
+        except Exception:
+            pass
+    try:
+        client.new_order(symbol=SYMBOL, side="SELL", type="TAKE_PROFIT_MARKET",
+                         quantity=float(qty), stopPrice=float(tp_price), reduceOnly=True)
+    except Exception:
+        pass
+
+
+def batched(client, qty, sl_price, tp_price):
+    legs = submit_batch(client, protective_legs(SYMBOL, "LONG", qty, 1.5,
+                                                sl_price, tp_price))
+    assert all(leg.ok for leg in legs), [leg.error for leg in legs]
+
+
+def measure(exchange, place, rounds: int):
+    """진입 응답 시각부터 보호 주문 완료까지 (초) 목록, 라운드당 요청 수"""
+    client = UMFutures(key="x", secret="y", base_url=exchange.url)
+    qty, sl_price, tp_price = Decimal("0.010"), Decimal("85500.0"), Decimal("94500.0")
+    client.new_order(symbol=SYMBOL, side="BUY", type="MARKET", quantity=0.01)  # 연결 워밍업
+    windows = []
+    before = exchange.requests
+    for _ in range(rounds):
+        client.new_order(symbol=SYMBOL, side="BUY", type="MARKET", quantity=float(qty))
+        start = time.perf_counter()
+        place(client, qty, sl_price, tp_price)
+        windows.append(time.perf_counter() - start)
+    per_round = (exchange.requests - before) / rounds - 1
+    return windows, per_round
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rtt-ms", type=float, default=80.0)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # 거부 시나리오의 대체 경고 생략
+
+    print(f"요청당 지연 {args.rtt_ms:.0f} ms, {args.rounds}회 반복 (무방비 구간 중앙값)")
+    print(f"{'시나리오':<26}{'순차':>16}{'배치':>16}{'단축':>8}")
+    for title, reject in [("정상", ()),
+                          ("트레일링 스탑 거부→백업 손절", ("TRAILING_STOP_MARKET",))]:
+        row = []
+        for place in (sequential, batched):
+            exchange = MockExchange(args.rtt_ms / 1000, reject).start()
+            try:
+                windows, per_round = measure(exchange, place, args.rounds)
+            finally:
+                exchange.stop()
+            row.append((statistics.median(windows) * 1000, per_round))
+        (seq_ms, seq_req), (bat_ms, bat_req) = row
+        print(f"{title:<26}{seq_ms:>9.1f} ms/{seq_req:.0f}회"
+              f"{bat_ms:>9.1f} ms/{bat_req:.0f}회{seq_ms / bat_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""요청 제한 벤치마크: 예산 관리 없이 호출 vs RateLimitedClient
+
+로컬 목(mock) 거래소가 바이낸스처럼 고정 창 단위로 weight / 주문 수를 세어
+X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-10S/1M 헤더를 돌려주고, 한도를 넘으면 429
+(Retry-After), 429 이후에도 계속 호출하면 418(차단)을 돌려줍니다.
+창 길이는 실행 시간을 줄이려고 축소했으며(--window), 제한기에도 같은 값을 줍니다.
+
+여러 심볼 사이클 조회 스레드 + 거래소 정보 갱신(낮은 우선순위) + 주문 스레드를 동시에 돌려
+429/418 횟수, 주문 성공률 / 지연, 미뤄진 낮은 우선순위 호출 수를 비교합니다.
+
+실행: python benchmarks/bench_rate_limit.py [--seconds 15] [--window 5] [--weight 300]
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from binance.um_futures import UMFutures  # noqa: E402
+
+from rate_limit import (RateLimitDeferred, RateLimitedClient, RateLimiter,  # noqa: E402
+                        _klines_weight)
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT")
+
+# 경로 → weight (klines 는 limit 에 따라)
+PATH_WEIGHTS = {
+    "/fapi/v1/klines": lambda q: _klines_weight(q),
+    "/fapi/v3/account": lambda q: 5,
+    "/fapi/v2/account": lambda q: 5,
+    "/fapi/v3/positionRisk": lambda q: 5,
+    "/fapi/v2/positionRisk": lambda q: 5,
+    "/fapi/v1/openOrders": lambda q: 1 if q.get("symbol") else 40,
+    "/fapi/v1/order": lambda q: 1,
+    "/fapi/v1/batchOrders": lambda q: 5,
+    "/fapi/v1/allOpenOrders": lambda q: 1,
+    "/fapi/v1/exchangeInfo": lambda q: 1,
+}
+
+
+class MockExchange:
+    """고정 창 weight / 주문 수 집계와 사용량 헤더, 429 / 418 을 흉내내는 로컬 거래소"""
+
+    def __init__(self, weight_limit: int, order_limit: int, window: float,
+                 retry_after: int = 2, ban_seconds: float = 10.0):
+        self.weight_limit = weight_limit
+        self.order_limit = order_limit
+        self.window = window
+        self.retry_after = retry_after
+        self.ban_seconds = ban_seconds
+        self.counts = {"429": 0, "418": 0, "ok": 0}
+        self._window_id = None
+        self._weight = 0
+        self._orders = 0
+        self._limited_until = 0.0
+        self._banned_until = 0.0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, headers, body = exchange.handle(self.command, url.path, query)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handle(self, method, path, query):
+        now = time.monotonic()
+        is_order = path in ("/fapi/v1/order", "/fapi/v1/batchOrders") and method == "POST"
+        with self._lock:
+            window_id = int(time.time() // self.window)
+            if window_id != self._window_id:
+                self._window_id, self._weight, self._orders = window_id, 0, 0
+            if now < self._banned_until:
+                self.counts["418"] += 1
+                return 418, {"Retry-After": str(int(self._banned_until - now) + 1)}, \
+                    {"code": -1003, "msg": "IP banned"}
+            if now < self._limited_until:
+                # 429 를 받고도 계속 호출 → 차단
+                self._banned_until = now + self.ban_seconds
+                self.counts["418"] += 1
+                return 418, {"Retry-After": str(int(self.ban_seconds))}, \
+                    {"code": -1003, "msg": "IP banned"}
+            self._weight += PATH_WEIGHTS.get(path, lambda q: 1)(query)
+            if is_order:
+                self._orders += 1
+            headers = {"X-MBX-USED-WEIGHT-1M": str(self._weight)}
+            if is_order:
+                headers["X-MBX-ORDER-COUNT-10S"] = str(self._orders)
+                headers["X-MBX-ORDER-COUNT-1M"] = str(self._orders)
+            if self._weight > self.weight_limit or self._orders > self.order_limit:
+                self._limited_until = now + self.retry_after
+                self.counts["429"] += 1
+                headers["Retry-After"] = str(self.retry_after)
+                return 429, headers, {"code": -1003, "msg": "Too many requests"}
+            self.counts["ok"] += 1
+        if path == "/fapi/v1/klines":
+            return 200, headers, []
+        if is_order:
+            return 200, headers, {"orderId": next(self._ids), "status": "NEW"}
+        if path.endswith("positionRisk") or path == "/fapi/v1/openOrders":
+            return 200, headers, []
+        return 200, headers, {}
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_scenario(exchange, make_client, seconds: float):
+    stop = threading.Event()
+    result = {"order_ok": 0, "order_fail": 0, "order_latency": [], "info_ok": 0,
+              "info_deferred": 0, "reads": 0}
+    lock = threading.Lock()
+
+    def count(key, n=1):
+        with lock:
+            result[key] += n
+
+    def reader(symbol):
+        client = make_client()
+        while not stop.is_set():
+            for call in (lambda: client.klines(symbol=symbol, interval="1m", limit=1000),
+                         lambda: client.account(),
+                         lambda: client.get_position_risk(symbol=symbol),
+                         lambda: client.get_orders(symbol=symbol)):
+                try:
+                    call()
+                    count("reads")
+                except Exception:
+                    time.sleep(0.05)
+
+    def info():
+        client = make_client()
+        while not stop.is_set():
+            try:
+                client.exchange_info()
+                count("info_ok")
+            except RateLimitDeferred:
+                count("info_deferred")
+            except Exception:
+                pass
+            stop.wait(0.2)
+
+    def trader():
+        client = make_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                client.new_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01)
+                count("order_ok")
+                with lock:
+                    result["order_latency"].append(time.perf_counter() - start)
+            except Exception:
+                count("order_fail")
+            stop.wait(0.25)
+
+    threads = [threading.Thread(target=reader, args=(s,), daemon=True) for s in SYMBOLS]
+    threads += [threading.Thread(target=info, daemon=True),
+                threading.Thread(target=trader, daemon=True)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join(5)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--window", type=float, default=5.0)
+    parser.add_argument("--weight", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = []
+    for title in ("예산 관리 없음", "RateLimitedClient"):
+        exchange = MockExchange(args.weight, args.orders, args.window).start()
+        if title == "예산 관리 없음":
+            def make_client():
+                return UMFutures(key="x", secret="y", base_url=exchange.url)
+        else:
+            limiter = RateLimiter(
+                limits={"weight_1m": (args.weight, args.window, "x-mbx-used-weight-1m"),
+                        "orders_10s": (args.orders, args.window, "x-mbx-order-count-10s"),
+                        "orders_1m": (args.orders, args.window, "x-mbx-order-count-1m")},
+                max_wait=args.window)
+
+            def make_client():
+                return RateLimitedClient(UMFutures(key="x", secret="y", base_url=exchange.url),
+                                         limiter)
+        result = run_scenario(exchange, make_client, args.seconds)
+        exchange.stop()
+        rows.append((title, exchange.counts, result))
+
+    print(f"{args.seconds:g}초, weight 한도 {args.weight}/{args.window:g}초, "
+          f"조회 스레드 {len(SYMBOLS)}개 + 정보 갱신 1개 + 주문 1개")
+    print(f"{'':<20}{'429':>6}{'418':>6}{'조회':>8}{'주문 성공':>10}{'주문 실패':>10}"
+          f"{'주문 p50 ms':>12}{'주문 max ms':>12}{'정보 갱신':>10}{'연기':>6}")
+    for title, counts, r in rows:
+        lat = r["order_latency"] or [0.0]
+        print(f"{title:<20}{counts['429']:>6}{counts['418']:>6}{r['reads']:>8}"
+              f"{r['order_ok']:>10}{r['order_fail']:>10}"
+              f"{statistics.median(lat) * 1000:>12.1f}{max(lat) * 1000:>12.1f}"
+              f"{r['info_ok']:>10}{r['info_deferred']:>6}")
+
+
+if __name__ == "__main__":
+    main()
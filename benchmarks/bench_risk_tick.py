@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""HARD SL 틱 판정 벤치마크: Decimal 손익률 계산 vs RiskMonitor.check (float 발동가 비교)
+
+가격 스트림 메시지(JSON 문자열) 1개를 받아 HARD SL 여부를 판정하는 데 드는 시간을 비교합니다.
+  Decimal     : json.loads → Decimal(p) → strategy.hard_sl_hit (사이클 판정과 같은 계산)
+  RiskMonitor : json.loads → float(p) → 미리 계산한 발동가와 비교 1회
+
+실행: python benchmarks/bench_risk_tick.py [--ticks 200000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_monitor import RiskMonitor  # noqa: E402
+from strategy import StrategyParams, hard_sl_hit, position_pnl  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    # 발동가(95)에 닿지 않는 틱만 (판정 비용만 측정)
+    messages = [json.dumps({"e": "aggTrade", "s": "BTCUSDT", "p": f"{rng.uniform(96, 104):.2f}"})
+                for _ in range(args.ticks)]
+    params = StrategyParams()
+    entry = Decimal("100")
+
+    start = time.perf_counter()
+    for message in messages:
+        data = json.loads(message)
+        hard_sl_hit(position_pnl("LONG", entry, Decimal(data["p"])), params)
+    decimal_time = time.perf_counter() - start
+
+    monitor = RiskMonitor(["BTCUSDT"], params.hard_sl, on_breach=lambda *a: True)
+    monitor.watch("BTCUSDT", "LONG", entry, Decimal("0.01"))
+    start = time.perf_counter()
+    for message in messages:
+        monitor._on_message(None, message)
+    monitor_time = time.perf_counter() - start
+
+    print(f"틱 {args.ticks}개 판정 (JSON 파싱 포함)")
+    print(f"{'방식':<14}{'틱당 us':>10}{'초당 틱':>14}")
+    for title, elapsed in (("Decimal", decimal_time), ("RiskMonitor", monitor_time)):
+        print(f"{title:<14}{elapsed / args.ticks * 1e6:>10.2f}{args.ticks / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""사이클 단계별 벤치마크 묶음 + 커밋별 결과 저장 / 회귀 검사
+
+판단 사이클의 각 단계를 같은 방식(라운드마다 반복 횟수 보정, 라운드 중앙값)으로 재고
+결과를 커밋별 JSON(benchmarks/results/<커밋>.json)으로 남깁니다. 조상 커밋 중 가장 가까운
+결과와 비교해 중앙값이 임계값보다 많이 느려진 단계가 있으면 종료 코드 1 로 실패합니다.
+
+단계
+  indicators_N       : 종가 N개로 EMA20/EMA60/RSI 전체 계산 (재구성 경로, N=200/1000/10000)
+  indicator_update   : 마감 캔들 1개 증분 갱신 (사이클 경로)
+  kline_parse        : REST klines 응답(1500개) JSON 디코드 + 저장 행 변환
+  exchange_filters   : exchangeInfo 전체 응답 JSON 디코드 + 심볼 필터 파싱
+  grid_quantize      : 수량 / 가격 격자 내림 + 주문 문자열 변환
+  cycle              : main.run_cycle 1회 (모의 거래소, 시세 반영 → 계정 조회 → 판단 → 체크포인트)
+
+실행: python benchmarks/bench_suite.py [--rounds 7] [--threshold 0.25] [--threshold cycle=0.5]
+      [--stages cycle,kline_parse] [--baseline results/abc1234.json] [--no-save]
+      [--klines klines.json] [--exchange-info exchange_info.json]
+  --klines / --exchange-info 를 주면 기록된 응답으로, 없으면 같은 형식의 합성 응답으로 잽니다.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from candle_store import parse_kline  # noqa: E402
+from exchange_filters import parse_exchange_info  # noqa: E402
+from indicators import IndicatorState, compute_indicators  # noqa: E402
+from numeric import Grid  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_THRESHOLD = 0.25
+# 디스크 fsync / 스레드 풀이 섞여 흔들림이 큰 단계는 임계값을 넓게
+STAGE_THRESHOLDS = {"cycle": 0.5}
+MIN_ROUND_SECONDS = 0.05
+CYCLES_PER_ROUND = 20
+
+
+# --- 합성 응답 (기록 파일이 없을 때) ---------------------------------------------------------
+def make_klines(n: int, interval_ms: int = 60_000, seed: int = 1) -> list:
+    """REST klines 응답과 같은 형식 (문자열 가격, 12개 필드)"""
+    rng = random.Random(seed)
+    rows, price, t = [], 30_000.0, 1_700_000_000_000
+    for _ in range(n):
+        o = price
+        price *= 1 + rng.gauss(0, 0.003)
+        h, lo = max(o, price) * (1 + abs(rng.gauss(0, 0.001))), min(o, price) * (1 - abs(rng.gauss(0, 0.001)))
+        rows.append([t, f"{o:.1f}", f"{h:.1f}", f"{lo:.1f}", f"{price:.1f}", "123.456",
+                     t + interval_ms - 1, "3703680.00", 1234, "61.728", "1851840.00", "0"])
+        t += interval_ms
+    return rows
+
+
+def make_exchange_info(symbols: int = 300) -> dict:
+    """USDⓈ-M exchangeInfo 와 같은 구조 (심볼마다 필터 7종)"""
+    entries = []
+    for i in range(symbols):
+        entries.append({
+            "symbol": f"SYM{i}USDT", "pair": f"SYM{i}USDT", "contractType": "PERPETUAL",
+            "deliveryDate": 4133404800000, "onboardDate": 1569398400000, "status": "TRADING",
+            "maintMarginPercent": "2.5000", "requiredMarginPercent": "5.0000",
+            "baseAsset": f"SYM{i}", "quoteAsset": "USDT", "marginAsset": "USDT",
+            "pricePrecision": 2, "quantityPrecision": 3, "baseAssetPrecision": 8,
+            "quotePrecision": 8, "underlyingType": "COIN", "underlyingSubType": ["PoW"],
+            "triggerProtect": "0.0500", "liquidationFee": "0.012500",
+            "marketTakeBound": "0.05", "maxMoveOrderLimit": 10000,
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "4529764",
+                 "tickSize": "0.10"},
+                {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000",
+                 "stepSize": "0.001"},
+                {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "120",
+                 "stepSize": "0.001"},
+                {"filterType": "MAX_NUM_ORDERS", "limit": 200},
+                {"filterType": "MAX_NUM_ALGO_ORDERS", "limit": 10},
+                {"filterType": "MIN_NOTIONAL", "notional": "100"},
+                {"filterType": "PERCENT_PRICE", "multiplierUp": "1.0500",
+                 "multiplierDown": "0.9500", "multiplierDecimal": "4"},
+            ],
+            "orderTypes": ["LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT",
+                           "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET"],
+            "timeInForce": ["GTC", "IOC", "FOK", "GTX", "GTD"],
+        })
+    return {"timezone": "UTC", "serverTime": 1_700_000_000_000, "futuresType": "U_MARGINED",
+            "rateLimits": [], "exchangeFilters": [], "assets": [], "symbols": entries}
+
+
+def _load_json_text(path, default):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    return json.dumps(default)
+
+
+# --- 단계 ------------------------------------------------------------------------------
+# 각 단계는 setup(args) → (반복 호출할 함수, 라운드당 고정 반복 수 또는 None=자동 보정)
+def stage_indicators(n):
+    def setup(args):
+        close = np.asarray([float(k[4]) for k in make_klines(n)])
+        return (lambda: compute_indicators(close)), None
+    return setup
+
+
+def stage_indicator_update(args):
+    klines = make_klines(5000)
+    state = IndicatorState.from_history([k[0] for k in klines[:200]],
+                                        [float(k[4]) for k in klines[:200]])
+    open_times = itertools.count(klines[200][0], 60_000)
+    closes = itertools.cycle([float(k[4]) for k in klines[200:]])
+
+    def op():
+        state.update(next(open_times), next(closes))
+    return op, None
+
+
+def stage_kline_parse(args):
+    payload = _load_json_text(args.klines, make_klines(1500))
+    return (lambda: [parse_kline(k) for k in json.loads(payload)]), None
+
+
+def stage_exchange_filters(args):
+    payload = _load_json_text(args.exchange_info, make_exchange_info())
+    return (lambda: parse_exchange_info(json.loads(payload))), None
+
+
+def stage_grid_quantize(args):
+    qty_grid, price_grid = Grid("0.001"), Grid("0.1")
+    values = [(1000 * 0.1 / p, p * 0.95, p * 1.05)
+              for p in (random.Random(5).uniform(20_000, 100_000) for _ in range(1000))]
+    it = itertools.cycle(values)
+
+    def op():
+        qty, sl, tp = next(it)
+        return (qty_grid.format(qty_grid.floor(qty)), price_grid.format(price_grid.floor(sl)),
+                price_grid.format(price_grid.floor(tp)))
+    return op, None
+
+
+def stage_cycle(args):
+    """
+    main.run_cycle 을 모의 거래소와 가상 시계로 실행. 반복마다 캔들 1개를 마감시키고
+    마감 50ms 뒤(WAKE_DELAY_MS 기본값)로 시계를 옮긴 다음 사이클 1회를 잽니다.
+    """
+    tmp = tempfile.mkdtemp(prefix="bench_suite_")
+    klines_path = os.path.join(tmp, "klines.json")
+    interval = 60_000
+    total = 200 + CYCLES_PER_ROUND * (args.rounds + 1) + 10
+    with open(klines_path, "w") as f:
+        json.dump(make_klines(total, interval), f)
+    os.environ.update(LOG_FILE=os.path.join(tmp, "bot.log"),
+                      STATE_FILE=os.path.join(tmp, "bot_state.json"),
+                      CANDLE_DB=os.path.join(tmp, "candles.sqlite3"),
+                      FILTER_CACHE_FILE=os.path.join(tmp, "exchange_filters.json"),
+                      PAPER_KLINES=klines_path, TIMEFRAME="1m", SYMBOLS="BTCUSDT",
+                      POSITION_RATIO="0.5")
+    import log_pipeline
+    import main
+    from exchange_filters import FilterRegistry
+    from paper_exchange import PaperExchange
+    log_pipeline.setup_logging(path=os.environ["LOG_FILE"], console=False)
+
+    clock = [time.time() * 1000 // interval * interval + 50]
+    exchange = PaperExchange.from_file(klines_path, ["BTCUSDT"], history=200,
+                                       now=lambda: clock[0], seed=1)
+
+    def set_clock():
+        main.server_clock.offset_ms = clock[0] - time.time() * 1000
+
+    set_clock()
+    registry = FilterRegistry(exchange, os.environ["FILTER_CACHE_FILE"])
+    registry.ensure()
+    st = main.setup_symbol(exchange, "BTCUSDT", registry)
+    main.run_cycle(exchange, st, None, registry, None)  # 저장소 / 인디케이터 초기화
+
+    def op():
+        clock[0] += interval
+        set_clock()
+        main.run_cycle(exchange, st, None, registry, None)
+    return op, CYCLES_PER_ROUND
+
+
+STAGES = {
+    "indicators_200": stage_indicators(200),
+    "indicators_1000": stage_indicators(1000),
+    "indicators_10000": stage_indicators(10_000),
+    "indicator_update": stage_indicator_update,
+    "kline_parse": stage_kline_parse,
+    "exchange_filters": stage_exchange_filters,
+    "grid_quantize": stage_grid_quantize,
+    "cycle": stage_cycle,
+}
+
+
+# --- 측정 ------------------------------------------------------------------------------
+def measure(op, number, rounds: int) -> dict:
+    """라운드마다 number 번 실행한 1회 평균(us). number 가 None 이면 라운드가 MIN_ROUND_SECONDS 이상이 되게 보정"""
+    if number is None:
+        op()  # 예열
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                op()
+            if time.perf_counter() - start >= MIN_ROUND_SECONDS / 5:
+                break
+            number *= 2
+        number = max(1, int(number * MIN_ROUND_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {"median_us": statistics.median(samples), "min_us": min(samples),
+            "max_us": max(samples), "number": number, "rounds": rounds}
+
+
+# --- 커밋별 결과 / 기준 비교 ------------------------------------------------------------
+def _git(*cmd):
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def commit_id() -> str:
+    """짧은 커밋 해시 (추적 파일이 수정된 상태면 -dirty)"""
+    sha = _git("rev-parse", "--short", "HEAD") or "unknown"
+    return f"{sha}-dirty" if _git("status", "--porcelain", "-uno") else sha
+
+
+def find_baseline(results_dir: str, current: str):
+    """HEAD 부터 조상 방향으로 가장 가까운 커밋 결과 파일 (현재 결과 자신은 제외)"""
+    for sha in _git("rev-list", "--max-count=200", "--abbrev-commit", "HEAD").split():
+        path = os.path.join(results_dir, f"{sha}.json")
+        if sha != current and os.path.exists(path):
+            return path
+    return None
+
+
+def parse_thresholds(values) -> tuple:
+    default, per_stage = DEFAULT_THRESHOLD, dict(STAGE_THRESHOLDS)
+    for value in values or []:
+        if "=" in value:
+            name, ratio = value.split("=", 1)
+            per_stage[name] = float(ratio)
+        else:
+            default = float(value)
+    return default, per_stage
+
+
+def compare(results: dict, baseline: dict, default: float, per_stage: dict) -> list:
+    """(단계, 현재 us, 기준 us, 변화율, 임계값, 회귀 여부) 목록"""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get("stages", {}).get(name) if baseline else None
+        limit = per_stage.get(name, default)
+        if base is None:
+            rows.append((name, result["median_us"], None, None, limit, False))
+            continue
+        change = result["median_us"] / base["median_us"] - 1
+        rows.append((name, result["median_us"], base["median_us"], change, limit, change > limit))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--stages", help="쉼표 구분 단계 이름 (기본 전체)")
+    parser.add_argument("--threshold", action="append",
+                        help=f"허용 중앙값 증가율 (기본 {DEFAULT_THRESHOLD}), 단계별은 이름=비율")
+    parser.add_argument("--baseline", help="비교할 결과 JSON (기본: 가장 가까운 조상 커밋 결과)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--no-save", action="store_true", help="결과 파일을 남기지 않음")
+    parser.add_argument("--klines", help="기록된 REST klines 응답 JSON")
+    parser.add_argument("--exchange-info", help="기록된 exchangeInfo 응답 JSON")
+    args = parser.parse_args()
+
+    names = args.stages.split(",") if args.stages else list(STAGES)
+    unknown = [n for n in names if n not in STAGES]
+    if unknown:
+        parser.error(f"알 수 없는 단계: {', '.join(unknown)} (가능: {', '.join(STAGES)})")
+
+    results = {}
+    for name in names:
+        op, number = STAGES[name](args)
+        results[name] = measure(op, number, args.rounds)
+
+    current = commit_id()
+    baseline_path = args.baseline or find_baseline(args.results_dir, current)
+    baseline = None
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    default, per_stage = parse_thresholds(args.threshold)
+    rows = compare(results, baseline, default, per_stage)
+
+    print(f"커밋 {current}, 기준 {baseline.get('commit') if baseline else '없음'}")
+    print(f"{'단계':<20}{'중앙값 us':>12}{'기준 us':>12}{'변화':>9}{'허용':>7}  결과")
+    for name, median, base, change, limit, regressed in rows:
+        base_text = f"{base:>12.2f}" if base is not None else f"{'-':>12}"
+        change_text = f"{change:>+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{name:<20}{median:>12.2f}{base_text}{change_text} {limit:>6.0%}  "
+              f"{'회귀' if regressed else 'ok'}")
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"{current}.json")
+        previous = {}
+        if os.path.exists(path) and args.stages:
+            # 일부 단계만 다시 잰 경우 나머지 단계 결과는 유지
+            with open(path, encoding="utf-8") as f:
+                previous = json.load(f).get("stages", {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"commit": current, "time": int(time.time()),
+                       "python": platform.python_version(), "machine": platform.node(),
+                       "stages": dict(previous, **results)}, f, indent=1)
+        print(f"결과 저장: {os.path.relpath(path, ROOT)}")
+
+    regressed = [row[0] for row in rows if row[5]]
+    if regressed:
+        print(f"회귀 단계: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+심볼/타임프레임별 로컬 캔들 저장소 (SQLite)
+
+마감된 캔들만 저장하고, 거래소에는 마지막 저장 캔들 이후 구간만 요청합니다(delta fetch).
+최근 캔들은 메모리 링 버퍼(ohlcv.OHLCVRing)에 보관해 전략이 바로 읽고, 저장된 이력은 백테스트에 재사용합니다.
+"""
+import logging
+import sqlite3
+import time
+
+import pandas as pd
+
+from metrics import API_ERRORS, STAGE_SECONDS
+from ohlcv import COLUMNS, OHLCVRing
+
+logger = logging.getLogger(__name__)
+
+# 바이낸스 kline 인터벌 → 밀리초
+INTERVAL_MS = {
+    "1m": 60_000,
+    "3m": 180_000,
+    "5m": 300_000,
+    "15m": 900_000,
+    "30m": 1_800_000,
+    "1h": 3_600_000,
+    "2h": 7_200_000,
+    "4h": 14_400_000,
+    "6h": 21_600_000,
+    "8h": 28_800_000,
+    "12h": 43_200_000,
+    "1d": 86_400_000,
+    "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+MAX_KLINES_PER_REQUEST = 1500  # USDⓈ-M klines limit 최대값
+
+
+def parse_kline(k) -> tuple:
+    """REST kline 배열 → 저장 행 (COLUMNS 순서)"""
+    return (int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]),
+            float(k[5]), int(k[6]), float(k[7]), int(k[8]), float(k[9]),
+            float(k[10]))
+
+
+def to_row(candle: dict) -> tuple:
+    """캔들 dict (스트림 이벤트 등) → 저장 행"""
+    return tuple(candle[c] for c in COLUMNS)
+
+
+class CandleStore:
+    """
+    한 심볼/타임프레임의 캔들 저장소.
+    live 는 마지막 sync 에서 받은 진행 중 캔들(저장하지 않음)입니다.
+    recent 는 최근 memory_limit 개 마감 캔들의 링 버퍼입니다.
+    """
+
+    def __init__(self, path: str, symbol: str, timeframe: str, memory_limit=1000):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.interval_ms = INTERVAL_MS[timeframe]
+        self.live = None
+        # 심볼별 사이클은 엔진에서 직렬화되지만 실행 스레드는 워커 풀에서 바뀜
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS candles ("
+            "symbol TEXT NOT NULL, timeframe TEXT NOT NULL, "
+            "open_time INTEGER NOT NULL, open REAL, high REAL, low REAL, close REAL, "
+            "volume REAL, close_time INTEGER, quote_volume REAL, trades INTEGER, "
+            "taker_buy_base REAL, taker_buy_quote REAL, "
+            "PRIMARY KEY (symbol, timeframe, open_time)) WITHOUT ROWID")
+        self._conn.commit()
+        self.recent = OHLCVRing(memory_limit)
+        self._reload_memory()
+
+    # --- 저장 / 조회 ---
+    def _reload_memory(self):
+        rows = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM candles "
+            "WHERE symbol=? AND timeframe=? ORDER BY open_time DESC LIMIT ?",
+            (self.symbol, self.timeframe, self.recent.capacity)).fetchall()
+        self.recent.clear()
+        self.recent.extend(reversed(rows))
+
+    def last_open_time(self):
+        return self.recent.last_open_time
+
+    def append(self, rows):
+        """마감 캔들 저장 (중복은 덮어씀). 메모리 끝보다 과거 캔들이 섞이면 메모리 재적재"""
+        rows = sorted(rows)
+        if not rows:
+            return
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO candles (symbol, timeframe, {', '.join(COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(COLUMNS))})",
+            [(self.symbol, self.timeframe) + tuple(r) for r in rows])
+        self._conn.commit()
+        last = self.last_open_time()
+        if last is None or rows[0][0] > last:
+            self.recent.extend(rows)
+        else:
+            self._reload_memory()
+
+    def load(self, start_ms=None, end_ms=None) -> pd.DataFrame:
+        """저장된 이력 전체(또는 구간)를 DataFrame 으로 (백테스트용)"""
+        return pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNS)} FROM candles "
+            "WHERE symbol=? AND timeframe=? AND open_time >= ? AND open_time <= ? "
+            "ORDER BY open_time",
+            self._conn,
+            params=(self.symbol, self.timeframe, start_ms or 0,
+                    end_ms if end_ms is not None else 2**62))
+
+    # --- 거래소 동기화 ---
+    def _fetch(self, client, start_ms, end_ms=None, now_ms=None):
+        """start_ms 이후 kline 을 페이지 단위로 모두 받아옴 (진행 중 캔들 포함)"""
+        until = end_ms if end_ms is not None else (now_ms or int(time.time() * 1000))
+        klines = []
+        while True:
+            # limit 은 필요한 만큼만 (klines 요청 가중치는 limit 구간에 비례)
+            expected = max(0, until - start_ms) // self.interval_ms + 2
+            limit = min(expected, MAX_KLINES_PER_REQUEST)
+            page = client.klines(symbol=self.symbol,
+                                 interval=self.timeframe,
+                                 startTime=start_ms,
+                                 endTime=end_ms,
+                                 limit=limit)
+            page = [k for k in page if isinstance(k, (list, tuple)) and len(k) >= 11]
+            klines.extend(page)
+            if len(page) < limit:
+                return klines
+            start_ms = int(page[-1][0]) + self.interval_ms
+
+    def _split_closed(self, klines, now_ms):
+        rows = [parse_kline(k) for k in klines]
+        closed = [r for r in rows if r[6] < now_ms]
+        live = rows[-1] if rows and rows[-1][6] >= now_ms else None
+        return closed, live
+
+    def sync(self, client, bootstrap=200, now_ms=None):
+        """
+        마지막 저장 캔들 이후만 받아서 저장. 새로 마감된 캔들 목록을 반환하고
+        진행 중 캔들은 self.live 에 보관합니다. 조회 실패 시 None.
+        저장소가 비어 있으면 최근 bootstrap 개로 시작합니다.
+        """
+        now_ms = now_ms or int(time.time() * 1000)
+        last = self.last_open_time()
+        try:
+            with STAGE_SECONDS.time(stage="kline_fetch"):
+                if last is None:
+                    klines = client.klines(symbol=self.symbol,
+                                           interval=self.timeframe,
+                                           limit=bootstrap)
+                else:
+                    klines = self._fetch(client, last + self.interval_ms, now_ms=now_ms)
+        except Exception as e:
+            API_ERRORS.inc(call="klines")
+            logger.error(f"[캔들 저장소] kline 조회 오류: {e}")
+            return None
+        if not klines:
+            logger.warning("[캔들 저장소] klines 데이터 없음")
+            return None
+
+        closed, self.live = self._split_closed(klines, now_ms)
+        if last is not None:
+            closed = [r for r in closed if r[0] > last]
+        self.append(closed)
+        return closed
+
+    def find_gaps(self) -> list:
+        """저장 구간 내부의 누락 구간 [(시작 open_time, 끝 open_time), ...]"""
+        rows = self._conn.execute(
+            "SELECT prev, open_time FROM ("
+            "  SELECT open_time, LAG(open_time) OVER (ORDER BY open_time) AS prev "
+            "  FROM candles WHERE symbol=? AND timeframe=?) "
+            "WHERE open_time - prev > ?",
+            (self.symbol, self.timeframe, self.interval_ms)).fetchall()
+        return [(prev + self.interval_ms, nxt - self.interval_ms) for prev, nxt in rows]
+
+    def repair_gaps(self, client) -> int:
+        """누락 구간을 거래소에서 다시 받아 채움. 채운 캔들 수 반환"""
+        filled = 0
+        for start, end in self.find_gaps():
+            try:
+                klines = self._fetch(client, start, end)
+            except Exception as e:
+                API_ERRORS.inc(call="klines")
+                logger.warning(f"[캔들 저장소] 누락 구간 복구 실패 ({start}~{end}): {e}")
+                continue
+            rows = [parse_kline(k) for k in klines]
+            self.append(rows)
+            filled += len(rows)
+        if filled:
+            logger.info(f"[캔들 저장소] 누락 캔들 {filled}개 복구")
+        return filled
+
+    def close(self):
+        self._conn.close()
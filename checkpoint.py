@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+봇 상태 체크포인트 (재시작 시 이어서 실행)
+
+심볼별 포지션 추적(previous_side / previous_qty), 열어 둔 보호 주문 ID, 인디케이터 상태,
+마지막으로 판단한 캔들, 마진/레버리지 설정 여부를 파일 하나에 담아 사이클마다 원자적으로 저장합니다.
+임시 파일에 쓰고 fsync 후 os.replace 로 교체하므로, 기록 중 크래시 / 전원 차단에도
+이전 또는 새 상태 중 하나가 온전히 남습니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+def atomic_write_json(path: str, data):
+    """임시 파일 기록 + fsync → os.replace (같은 디렉터리 안에서 원자적 교체)"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # 교체(rename) 자체도 디스크에 남도록 디렉터리 fsync
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class StateCheckpoint:
+    """
+    symbols[심볼] = SymbolState.to_checkpoint() 결과 dict.
+    update() 는 여러 워커 스레드에서 호출되며, save() 는 전체 심볼을 한 번에 기록합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.symbols = {}
+        self.saved_at = None
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """체크포인트 적재. 없거나 손상되면 False (처음부터 시작)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != VERSION:
+                raise ValueError(f"버전 불일치: {data.get('version')}")
+            symbols = dict(data["symbols"])
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"[체크포인트] 파일 읽기 실패 → 처음부터 시작: {e}")
+            return False
+        self.symbols = symbols
+        self.saved_at = data.get("saved_at")
+        return True
+
+    def get(self, symbol: str):
+        return self.symbols.get(symbol)
+
+    def update(self, symbol: str, state: dict):
+        with self._lock:
+            self.symbols[symbol] = state
+
+    def save(self) -> bool:
+        with self._lock:
+            data = {"version": VERSION, "saved_at": time.time(),
+                    "symbols": dict(self.symbols)}
+            try:
+                atomic_write_json(self.path, data)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"[체크포인트] 저장 실패: {e}")
+                return False
+        self.saved_at = data["saved_at"]
+        return True
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+거래소 REST 클라이언트 팩토리
+
+프로세스 전체가 UMFutures 클라이언트(= requests 세션 연결 풀) 하나를 재사용해
+봇 재시작 후에도 연결을 다시 맺지 않습니다. 연결 / 응답 제한 시간을 따로 두고,
+자동 재시도는 멱등 요청(GET / DELETE)과 요청이 나가기 전의 연결 실패에만 적용합니다
+(주문 POST 는 응답 유실 시 중복 주문 위험이 있어 재시도하지 않음).
+캔들 마감 직전 prewarm() 으로 유휴 중 끊긴 연결을 미리 다시 맺어 주문 경로의 TCP+TLS 비용을 없앱니다.
+서명 요청의 timestamp 는 서버 시각 추정값(clock.ServerClock)으로, recvWindow 는 기본값을 채워 보냅니다.
+"""
+import logging
+import threading
+import time
+
+from binance.um_futures import UMFutures
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "DELETE"})
+
+
+class SyncedUMFutures(UMFutures):
+    """서명 요청 timestamp 를 로컬 시계 대신 clock.timestamp() 로 (VM 시계 오차로 인한 -1021 거절 방지)"""
+
+    def __init__(self, *args, clock=None, recv_window=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.clock = clock
+        self.recv_window = recv_window
+
+    def sign_request(self, http_method, url_path, payload=None, special=False):
+        if self.clock is None and not self.recv_window:
+            return super().sign_request(http_method, url_path, payload, special)
+        # API.sign_request 와 같은 절차, timestamp 출처와 recvWindow 기본값만 다름
+        payload = {} if payload is None else payload
+        if self.recv_window:
+            payload.setdefault("recvWindow", self.recv_window)
+        payload["timestamp"] = (self.clock.timestamp() if self.clock is not None
+                                else int(time.time() * 1000))
+        query_string = self._prepare_params(payload, special)
+        payload["signature"] = self._get_sign(query_string)
+        return self.send_request(http_method, url_path, payload, special)
+
+
+def configure_session(session, pool_size: int = 10, retries: int = 2,
+                      backoff: float = 0.2):
+    """연결 풀 크기와 재시도 정책을 세션에 적용 (https / http 모두)"""
+    retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                  backoff_factor=backoff,
+                  allowed_methods=IDEMPOTENT_METHODS,
+                  status_forcelist=(502, 503, 504),
+                  respect_retry_after_header=False,  # 429/418 은 RateLimiter 가 처리
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                          max_retries=retry, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ClientFactory:
+    """
+    get() 은 같은 클라이언트를 돌려주며 wrap 이 있으면 한 번 감싼 결과를 캐시합니다.
+    timeout 은 (연결, 응답) 초. clock 은 서명 timestamp 용 ServerClock.
+    disabled 에 사유를 주면 get() 이 실 거래소 클라이언트를 만들지 않고 RuntimeError
+    (모의 거래소 모드에서 주문이 실 계정으로 새는 것을 막음).
+    """
+
+    def __init__(self, key: str, secret: str, base_url: str, timeout=(3.05, 10.0),
+                 pool_size: int = 10, retries: int = 2, wrap=None, clock=None,
+                 recv_window=None, disabled: str = ""):
+        self.key = key
+        self.secret = secret
+        self.base_url = base_url
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.wrap = wrap
+        self.clock = clock
+        self.recv_window = recv_window
+        self.disabled = disabled
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self.disabled:
+            raise RuntimeError(f"실 거래소 클라이언트 사용 불가: {self.disabled}")
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    client = SyncedUMFutures(key=self.key, secret=self.secret,
+                                             base_url=self.base_url, timeout=self.timeout,
+                                             clock=self.clock, recv_window=self.recv_window)
+                    configure_session(client.session, self.pool_size, self.retries)
+                    self._client = self.wrap(client) if self.wrap else client
+        return self._client
+
+    def reset(self):
+        """풀을 닫고 다음 get() 에서 새로 만듦 (연결 상태가 의심될 때)"""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.session.close()
+
+    def prewarm(self, connections: int = 1) -> int:
+        """
+        가벼운 요청(ping, weight 1)을 connections 개 동시에 보내 풀의 연결을 살려 둠.
+        살아 있는 연결은 그대로 재사용되고, 끊긴 연결만 새로 맺습니다. 성공 수 반환
+        """
+        client = self.get()
+        ok = []
+
+        def ping():
+            try:
+                client.ping()
+                ok.append(True)
+            except Exception as e:
+                logger.debug(f"[연결 예열] ping 실패: {e}")
+
+        threads = [threading.Thread(target=ping, name="prewarm", daemon=True)
+                   for _ in range(max(1, min(connections, self.pool_size)))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(sum(self.timeout) if isinstance(self.timeout, tuple) else self.timeout)
+        return len(ok)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+거래소 서버 시각 동기화
+
+GET /fapi/v1/time 을 몇 번 보내 왕복 시간이 가장 짧은 표본으로 (서버 - 로컬) 오프셋을 추정하고,
+백그라운드 스레드가 주기적으로 다시 맞춥니다. 캔들 마감 스케줄과 서명 요청 timestamp,
+마감 캔들 판정은 모두 이 추정 서버 시각을 기준으로 합니다(VM 시계 오차와 무관).
+"""
+import logging
+import threading
+import time
+
+from candle_store import INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+DRIFT_WARN_MS = 500  # 이보다 크게 어긋나면 경고 (서명 요청 거절 위험)
+
+
+def interval_ms(timeframe: str) -> int:
+    """TIMEFRAME 문자열(예: 15m, 1h) → 밀리초"""
+    try:
+        return INTERVAL_MS[timeframe]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 TIMEFRAME: {timeframe} "
+                         f"(가능: {', '.join(INTERVAL_MS)})") from None
+
+
+class ServerClock:
+    """offset_ms = 서버 시각 - 로컬 시각 (동기화 전에는 0 → 로컬 시각 그대로)"""
+
+    def __init__(self, client=None, samples: int = 3, sync_interval: float = 300.0):
+        self.client = client
+        self.samples = samples
+        self.sync_interval = sync_interval
+        self.offset_ms = 0.0
+        self.rtt_ms = None
+        self.synced_at = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def now_ms(self) -> float:
+        return time.time() * 1000 + self.offset_ms
+
+    def timestamp(self) -> int:
+        """서명 요청용 timestamp (추정 서버 시각, ms)"""
+        return int(self.now_ms())
+
+    def next_close_in(self, interval: int, wake_delay_ms: float = 0.0) -> float:
+        """다음 캔들 마감 + wake_delay_ms 시각까지 남은 초 (서버 시각 기준)"""
+        now = self.now_ms()
+        wake = (int((now - wake_delay_ms) // interval) + 1) * interval + wake_delay_ms
+        return (wake - now) / 1000
+
+    def sync(self) -> bool:
+        """samples 번 조회해 RTT 가 가장 짧은 표본의 오프셋 채택. 모두 실패하면 False"""
+        best = None
+        for _ in range(self.samples):
+            try:
+                t0 = time.time()
+                server = int(self.client.time()["serverTime"])
+                t1 = time.time()
+            except Exception as e:
+                logger.debug(f"[시각 동기화] 서버 시각 조회 실패: {e}")
+                continue
+            rtt = (t1 - t0) * 1000
+            if best is None or rtt < best[0]:
+                # 서버가 응답을 만든 시각 ≈ 왕복의 중간
+                best = (rtt, server - (t0 + t1) / 2 * 1000)
+        if best is None:
+            logger.warning("[시각 동기화] 서버 시각 조회 실패 → 이전 오프셋 유지")
+            return False
+        previous = self.offset_ms
+        self.rtt_ms, self.offset_ms = best
+        self.synced_at = time.monotonic()
+        level = logging.WARNING if abs(self.offset_ms) > DRIFT_WARN_MS else logging.DEBUG
+        logger.log(level, "[시각 동기화] 오프셋 %.1f ms (변화 %+.1f ms, RTT %.1f ms)",
+                   self.offset_ms, self.offset_ms - previous, self.rtt_ms)
+        return True
+
+    # --- 백그라운드 동기화 ---
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="clock-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.sync_interval):
+            self.sync()
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""멀티 심볼 트레이딩 엔진: 심볼별 상태 + 공용 캔들 마감 스케줄러 + 제한된 워커 풀"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Any, Optional
+
+from indicators import IndicatorState
+from metrics import CYCLES, STAGE_SECONDS
+from numeric import Grid
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolLogger(logging.LoggerAdapter):
+    """로그 앞에 [심볼] 태그를 붙이는 어댑터"""
+
+    def process(self, msg, kwargs):
+        return f"[{self.extra['symbol']}] {msg}", kwargs
+
+
+@dataclass
+class SymbolState:
+    """심볼 1개의 거래 상태 (기존 run_bot 클로저 변수들)"""
+    symbol: str
+    step_size: Decimal
+    min_qty: Decimal
+    tick_size: Decimal
+    store: Any  # CandleStore
+    min_notional: Decimal = Decimal("0")
+    indicator_state: Any = None  # IndicatorState
+    previous_side: Optional[str] = None
+    previous_qty: Decimal = Decimal("0")
+    last_decision_open_time: Optional[int] = None
+    # 열어 둔 보호 주문 ID (재시작 후 거래소 미체결 주문과 대조)
+    protective_orders: list = field(default_factory=list)
+    configured: bool = False  # 격리마진 / 레버리지 설정 완료
+    # 스케줄러가 스트림에서 꺼내 전달한, 아직 반영하지 않은 마감 캔들
+    pending_candles: deque = field(default_factory=deque, repr=False)
+    log: logging.LoggerAdapter = field(init=False, repr=False)
+    # 필터에서 미리 계산한 주문 수량 / 가격 격자 (판단 루프는 정수 칸 수와 float 만 사용)
+    qty_grid: Grid = field(init=False, repr=False)
+    price_grid: Grid = field(init=False, repr=False)
+    min_qty_units: int = field(init=False, repr=False)
+    min_notional_value: float = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.log = SymbolLogger(logger, {"symbol": self.symbol})
+        self.refresh_grids()
+
+    def refresh_grids(self):
+        """step_size / tick_size / min_qty / min_notional 이 바뀌면 호출"""
+        self.qty_grid = Grid(self.step_size)
+        self.price_grid = Grid(self.tick_size)
+        self.min_qty_units = self.qty_grid.parse(self.min_qty)
+        self.min_notional_value = float(self.min_notional)
+
+    # --- 체크포인트 (checkpoint.StateCheckpoint) ---
+    def to_checkpoint(self) -> dict:
+        return {"previous_side": self.previous_side,
+                "previous_qty": str(self.previous_qty),
+                "last_decision_open_time": self.last_decision_open_time,
+                "protective_orders": list(self.protective_orders),
+                "configured": self.configured,
+                "indicator": (self.indicator_state.to_dict()
+                              if self.indicator_state is not None else None)}
+
+    def restore(self, data: dict):
+        """체크포인트 값 복원. 잘못된 값은 기본값으로 두고 경고 (재시작이 멈추지 않도록)"""
+        side = data.get("previous_side")
+        if side not in (None, "LONG", "SHORT"):
+            self.log.warning(f"[체크포인트] 잘못된 previous_side {side!r} → 없음")
+            side = None
+        self.previous_side = side
+        try:
+            self.previous_qty = Decimal(str(data.get("previous_qty") or "0"))
+            if not self.previous_qty.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            self.log.warning(f"[체크포인트] 잘못된 previous_qty {data.get('previous_qty')!r} → 0")
+            self.previous_qty = Decimal("0")
+        open_time = data.get("last_decision_open_time")
+        self.last_decision_open_time = open_time if isinstance(open_time, int) else None
+        self.protective_orders = list(data.get("protective_orders") or [])
+        self.configured = bool(data.get("configured"))
+        if data.get("indicator"):
+            try:
+                self.indicator_state = IndicatorState.from_dict(data["indicator"])
+            except (KeyError, TypeError, ValueError) as e:
+                # 캔들 저장소에서 다시 계산되므로 버려도 됨
+                self.log.warning(f"[체크포인트] 인디케이터 상태 복원 실패 → 재계산: {e}")
+                self.indicator_state = None
+
+
+class TradingEngine:
+    """
+    모든 심볼이 하나의 캔들 마감 스케줄러를 공유합니다.
+    스트림이 연결되어 있으면 심볼별 마감 이벤트가 도착하는 즉시 해당 심볼만 실행하고,
+    마감 시각 + grace 까지 이벤트가 없는 심볼은 REST 경로로 실행합니다.
+    심볼 작업은 제한된 워커 풀에서 돌며, 이전 사이클이 아직 끝나지 않은 심볼은
+    이번 캔들을 건너뛰어 느린 심볼이 다른 심볼을 지연시키지 않게 합니다.
+    """
+
+    def __init__(self, states: dict, cycle, next_close_in, stream=None,
+                 max_workers=4, grace=5.0, health=None, prewarm=None, prewarm_lead=3.0):
+        self.states = states
+        self.cycle = cycle
+        self.next_close_in = next_close_in
+        self.stream = stream
+        self.grace = grace
+        self.health = health  # BotHealth (스케줄러 루프마다 heartbeat)
+        self.prewarm = prewarm  # 마감 prewarm_lead 초 전에 호출 (REST 연결 예열)
+        self.prewarm_lead = prewarm_lead
+        self.pool = ThreadPoolExecutor(max_workers=max_workers,
+                                       thread_name_prefix="symbol")
+        self._running = {}
+
+    def _run_cycle(self, state: SymbolState):
+        try:
+            with STAGE_SECONDS.time(stage="cycle"):
+                self.cycle(state)
+            CYCLES.inc(symbol=state.symbol, result="ok")
+        except Exception as e:
+            CYCLES.inc(symbol=state.symbol, result="error")
+            state.log.exception(f"메인 루프 예외: {e}")
+
+    def dispatch(self, symbols):
+        for symbol in symbols:
+            future = self._running.get(symbol)
+            if future is not None and not future.done():
+                self.states[symbol].log.warning("이전 사이클 진행 중 → 이번 캔들 건너뜀")
+                continue
+            self._running[symbol] = self.pool.submit(self._run_cycle,
+                                                     self.states[symbol])
+
+    def _stream_ready(self) -> bool:
+        if self.stream is None:
+            return False
+        if not self.stream.connected:
+            self.stream.reconnect()
+        return self.stream.connected
+
+    def _prewarm(self):
+        start = time.perf_counter()
+        try:
+            warmed = self.prewarm()
+            logger.debug(f"[엔진] 연결 예열 {warmed}개 ({(time.perf_counter() - start) * 1000:.0f} ms)")
+        except Exception as e:
+            logger.warning(f"[엔진] 연결 예열 실패: {e}")
+
+    def wait_and_dispatch(self):
+        """다음 캔들 마감까지 대기하며, 준비된 심볼부터 실행"""
+        pending = set(self.states)
+        use_stream = self._stream_ready()
+        close_in = self.next_close_in()
+        deadline = time.monotonic() + close_in + (self.grace if use_stream else 0)
+        if self.prewarm is not None and close_in > self.prewarm_lead:
+            # 마감 직전까지 기다렸다가 연결 예열 (유휴 중 끊긴 연결을 주문 경로 밖에서 다시 맺음)
+            time.sleep(close_in - self.prewarm_lead)
+            self._prewarm()
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # 마감 이벤트 미수신 심볼 (또는 REST 모드): REST 경로로 실행
+                self.dispatch(sorted(pending))
+                return
+            if use_stream and self.stream.connected:
+                ready = self.stream.wait_closed(remaining, pending)
+                for symbol in ready:
+                    # 스케줄러 스레드에서 꺼내 심볼 상태로 넘김 (사이클이 밀려도 유실 없음)
+                    self.states[symbol].pending_candles.extend(
+                        self.stream.drain(symbol))
+                if ready:
+                    self.dispatch(sorted(ready))
+                    pending -= ready
+            else:
+                logger.debug(f"다음 캔들 마감까지 {remaining:.1f}초 대기")
+                time.sleep(remaining)
+
+    def run_forever(self):
+        logger.info(f"[엔진] 시작: {len(self.states)}개 심볼 {sorted(self.states)}")
+        # 시작 직후 한 번: 이력으로 인디케이터 준비 + 현재 상태 점검
+        self.dispatch(sorted(self.states))
+        while True:
+            if self.health is not None:
+                self.health.heartbeat(self.next_close_in() + self.grace)
+            self.wait_and_dispatch()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+거래소 심볼 필터 레지스트리
+
+exchange_info() 를 한 번 파싱해 심볼 → 필터 dict 로 보관하고(O(1) 조회), 디스크에 TTL 과
+함께 저장해 재시작 시 다시 받지 않습니다. 백그라운드 스레드가 TTL 마다 새로 받아
+실행 중 필터 변경(tickSize 등)도 반영합니다.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SymbolFilters:
+    step_size: Decimal = Decimal("0.001")  # LOT_SIZE
+    min_qty: Decimal = Decimal("0.001")
+    tick_size: Decimal = Decimal("0.01")  # PRICE_FILTER
+    min_notional: Decimal = Decimal("0")  # MIN_NOTIONAL (최소 주문 금액)
+    price_precision: int = 2
+
+    def to_dict(self) -> dict:
+        return {k: str(v) for k, v in asdict(self).items()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{f.name: f.type(data[f.name]) for f in fields(cls) if f.name in data})
+
+
+DEFAULT_FILTERS = SymbolFilters()
+
+
+def parse_symbol(s: dict) -> SymbolFilters:
+    """exchange_info 의 심볼 항목 1개 → SymbolFilters (없는 필터는 기본값)"""
+    values = {}
+    for f in s.get("filters", []):
+        if not isinstance(f, dict):
+            continue
+        try:
+            kind = f.get("filterType")
+            if kind == "LOT_SIZE":
+                values["step_size"] = Decimal(str(f["stepSize"]))
+                values["min_qty"] = Decimal(str(f["minQty"]))
+            elif kind == "PRICE_FILTER":
+                tick = Decimal(str(f["tickSize"]))
+                values["tick_size"] = tick
+                values["price_precision"] = abs(int(tick.as_tuple().exponent))
+            elif kind == "MIN_NOTIONAL":
+                # USDⓈ-M 은 notional, 현물 형식은 minNotional
+                values["min_notional"] = Decimal(str(f.get("notional", f.get("minNotional"))))
+        except (KeyError, ArithmeticError, TypeError) as e:
+            logger.debug(f"[필터] {s.get('symbol')} {f.get('filterType')} 파싱 실패: {e}")
+    return SymbolFilters(**values)
+
+
+def parse_exchange_info(info) -> dict:
+    """exchange_info 응답 → {심볼: SymbolFilters}"""
+    if isinstance(info, str):
+        info = json.loads(info)
+    symbols = info.get("symbols", []) if isinstance(info, dict) else []
+    return {s["symbol"]: parse_symbol(s)
+            for s in symbols if isinstance(s, dict) and "symbol" in s}
+
+
+class FilterRegistry:
+    """
+    심볼 필터 캐시. get() 은 잠금 없이 dict 조회만 하고,
+    갱신은 새 dict 를 만들어 통째로 교체합니다.
+    """
+
+    def __init__(self, client, path: str = "exchange_filters.json", ttl: float = 3600.0):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self.fetched_at = 0.0
+        self._filters = {}
+        self._missing = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def get(self, symbol: str) -> SymbolFilters:
+        filters = self._filters.get(symbol)
+        if filters is None:
+            if symbol not in self._missing:
+                self._missing.add(symbol)
+                logger.warning(f"[필터] {symbol} 필터 정보 없음 → 기본값 사용")
+            return DEFAULT_FILTERS
+        return filters
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._filters
+
+    # --- 디스크 캐시 ---
+    def load(self) -> bool:
+        """디스크 캐시 적재 (TTL 초과여도 적재는 하고, 신선한지 여부를 반환)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            filters = {symbol: SymbolFilters.from_dict(v)
+                       for symbol, v in data["symbols"].items()}
+        except (OSError, ValueError, KeyError, ArithmeticError) as e:
+            logger.debug(f"[필터] 캐시 파일 읽기 실패: {e}")
+            return False
+        self._filters = filters
+        self.fetched_at = float(data.get("fetched_at", 0))
+        return self.age < self.ttl
+
+    def save(self):
+        data = {"fetched_at": self.fetched_at,
+                "symbols": {s: f.to_dict() for s, f in self._filters.items()}}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    # --- 거래소 갱신 ---
+    def refresh(self) -> bool:
+        """exchange_info 를 새로 받아 교체. 변경된 필터는 로그로 남김"""
+        try:
+            filters = parse_exchange_info(self.client.exchange_info())
+        except Exception as e:
+            logger.warning(f"[필터] exchange_info 조회 실패: {e}")
+            return False
+        if not filters:
+            logger.warning("[필터] exchange_info 에 심볼 정보 없음")
+            return False
+        old, self._filters = self._filters, filters
+        self.fetched_at = time.time()
+        self._missing.clear()
+        for symbol, new in filters.items():
+            prev = old.get(symbol)
+            if prev is not None and prev != new:
+                changes = ", ".join(
+                    f"{f.name} {getattr(prev, f.name)} → {getattr(new, f.name)}"
+                    for f in fields(SymbolFilters)
+                    if getattr(prev, f.name) != getattr(new, f.name))
+                logger.warning(f"[필터] {symbol} 필터 변경: {changes}")
+        try:
+            self.save()
+        except OSError as e:
+            logger.warning(f"[필터] 캐시 파일 저장 실패: {e}")
+        return True
+
+    def ensure(self):
+        """디스크 캐시가 신선하면 그대로, 아니면 거래소에서 받음 (실패 시 오래된 캐시라도 사용)"""
+        if self.load():
+            logger.info(f"[필터] 캐시 사용 ({len(self._filters)}개 심볼, {self.age:.0f}초 전)")
+            return
+        if self.refresh():
+            logger.info(f"[필터] exchange_info 갱신 ({len(self._filters)}개 심볼)")
+        elif self._filters:
+            logger.warning(f"[필터] 갱신 실패 → 오래된 캐시 사용 ({self.age:.0f}초 전)")
+
+    # --- 백그라운드 갱신 ---
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="filter-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # 실패하면 1분 뒤 재시도, 성공하면 다음 TTL 만료 시점까지 대기
+            wait = max(self.ttl - self.age, 0) if self.fetched_at else 0
+            if self._stop.wait(wait):
+                return
+            if not self.refresh():
+                self._stop.wait(min(60.0, self.ttl))
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""NumPy 기반 인디케이터 엔진 (EMA / Wilder RMA / RSI)"""
+import numpy as np
+
+# 블록 길이: 블록 내부는 행렬곱으로, 블록 간 상태는 재귀적으로 전달
+_BLOCK = 64
+
+
+# --- 1차 재귀 필터 ----------------------------------------------------------------------
+def _decay_matrix(decay: float, size: int) -> np.ndarray:
+    """L[j, k] = decay^(j-k) (k <= j), 그 외 0 인 하삼각 행렬"""
+    idx = np.arange(size)
+    lag = idx[:, None] - idx[None, :]
+    mat = np.power(decay, np.maximum(lag, 0), dtype=np.float64)
+    mat[lag < 0] = 0.0
+    return mat
+
+
+def linear_filter(u: np.ndarray, decay: float, init: float = 0.0) -> np.ndarray:
+    """
+    y[t] = decay * y[t-1] + u[t] (y[-1] = init) 를 파이썬 루프 없이 계산합니다.
+    블록 내부는 감쇠 행렬곱, 블록 끝 상태는 같은 필터를 재귀 적용해서 이어 붙입니다.
+    (역거듭제곱을 쓰지 않으므로 긴 시계열에서도 수치적으로 안정)
+    """
+    u = np.asarray(u, dtype=np.float64)
+    n = len(u)
+    if n == 0:
+        return u.copy()
+    if n <= _BLOCK:
+        powers = np.power(decay, np.arange(1, n + 1), dtype=np.float64)
+        return _decay_matrix(decay, n) @ u + powers * init
+
+    blocks = -(-n // _BLOCK)
+    padded = np.zeros(blocks * _BLOCK)
+    padded[:n] = u
+    U = padded.reshape(blocks, _BLOCK)
+
+    # 블록별 영상태 응답 (이전 블록 영향 제외)
+    Z = U @ _decay_matrix(decay, _BLOCK).T
+    # 블록 끝 상태: c[b] = decay^B * c[b-1] + Z[b, -1]
+    carry = linear_filter(Z[:, -1], decay**_BLOCK, init)
+    prev = np.empty(blocks)
+    prev[0] = init
+    prev[1:] = carry[:-1]
+    powers = np.power(decay, np.arange(1, _BLOCK + 1), dtype=np.float64)
+    Y = Z + prev[:, None] * powers[None, :]
+    return Y.ravel()[:n]
+
+
+# --- 인디케이터 -------------------------------------------------------------------------
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """pandas ewm(span=span, adjust=False).mean() 과 동일한 EMA"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy()
+    alpha = 2.0 / (span + 1)
+    return linear_filter(alpha * values, 1.0 - alpha, init=values[0])
+
+
+def rma(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder RMA: values[1:period+1] 의 SMA로 시드(인덱스 period) 후
+    avg[t] = (avg[t-1] * (period-1) + values[t]) / period.
+    values[0] 은 diff 결과의 NaN 자리이므로 사용하지 않으며, 시드 이전은 NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) <= period:
+        return out
+    out[period] = values[1:period + 1].mean()
+    out[period + 1:] = linear_filter(values[period + 1:] / period,
+                                     (period - 1) / period,
+                                     init=out[period])
+    return out
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI (RMA 기반 - Binance/TradingView와 동일). 시드 이전 구간은 NaN"""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.empty(len(close))
+    if len(close):
+        delta[0] = np.nan
+        delta[1:] = np.diff(close)
+    avg_gain = rma(np.clip(delta, 0, None), period)
+    avg_loss = rma(np.clip(-delta, 0, None), period)
+    return _rsi_from_averages(avg_gain, avg_loss)
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    # 손실 0 (또는 시드 이전) → 1e-10 으로 0 나눗셈 방지
+    avg_loss = np.where(np.isnan(avg_loss) | (avg_loss == 0), 1e-10, avg_loss)
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def backfill_head(values: np.ndarray) -> np.ndarray:
+    """앞쪽 NaN 구간을 첫 유효값으로 채움 (bfill 과 동일, 중간 NaN 은 없음을 가정)"""
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) and valid[0] > 0:
+        values = values.copy()
+        values[:valid[0]] = values[valid[0]]
+    return values
+
+
+def compute_indicators(close: np.ndarray) -> dict:
+    """전략에서 쓰는 EMA20 / EMA60 / RSI14 를 한 번에 계산"""
+    close = np.asarray(close, dtype=np.float64)
+    return {
+        "ema20": ema(close, 20),
+        "ema60": ema(close, 60),
+        "rsi": backfill_head(rsi(close, 14)),
+    }
+
+
+# --- 증분(스트리밍) 인디케이터 ------------------------------------------------------------
+class IndicatorState:
+    """
+    EMA / RMA 상태만 들고 있다가 새로 마감된 캔들 1개로 O(1) 갱신하는 인디케이터.
+    시작 시 또는 캔들 누락(gap) 시에만 from_history 로 재구성합니다.
+    last / prev 는 마지막 두 마감 캔들의 {"open_time", "close", "ema20", "ema60", "rsi"}.
+    """
+
+    def __init__(self, fast=20, slow=60, rsi_period=14):
+        self.fast = fast
+        self.slow = slow
+        self.rsi_period = rsi_period
+        self.interval_ms = None
+        self.count = 0
+        self.last_close = None
+        self.ema_fast = None
+        self.ema_slow = None
+        # RSI 시드 전에는 합계, 이후에는 RMA 평균
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last = None
+        self.prev = None
+
+    @property
+    def last_open_time(self):
+        return self.last["open_time"] if self.last else None
+
+    def _rsi(self):
+        if self.avg_gain is None:
+            return float("nan")
+        avg_loss = self.avg_loss or 1e-10
+        return 100 - 100 / (1 + self.avg_gain / avg_loss)
+
+    def _snapshot(self, open_time, close):
+        self.prev = self.last
+        self.last = {
+            "open_time": int(open_time),
+            "close": float(close),
+            "ema20": self.ema_fast,
+            "ema60": self.ema_slow,
+            "rsi": self._rsi(),
+        }
+
+    @classmethod
+    def from_history(cls, open_times, closes, fast=20, slow=60, rsi_period=14):
+        """마감된 캔들 이력으로 상태를 재구성 (벡터 계산 후 마지막 값만 보관)"""
+        state = cls(fast, slow, rsi_period)
+        open_times = np.asarray(open_times, dtype=np.int64)
+        closes = np.asarray(closes, dtype=np.float64)
+        n = len(closes)
+        if n == 0:
+            return state
+        if n >= 2:
+            state.interval_ms = int(open_times[-1] - open_times[-2])
+
+        ema_fast = ema(closes, fast)
+        ema_slow = ema(closes, slow)
+        delta = np.empty(n)
+        delta[0] = np.nan
+        delta[1:] = np.diff(closes)
+        gains = np.clip(delta, 0, None)
+        losses = np.clip(-delta, 0, None)
+        avg_gain = rma(gains, rsi_period)
+        avg_loss = rma(losses, rsi_period)
+        rsi_arr = _rsi_from_averages(avg_gain, avg_loss)
+
+        state.count = n
+        state.last_close = float(closes[-1])
+        state.ema_fast = float(ema_fast[-1])
+        state.ema_slow = float(ema_slow[-1])
+        if n > rsi_period:
+            state.avg_gain = float(avg_gain[-1])
+            state.avg_loss = float(avg_loss[-1])
+        else:
+            state.gain_sum = float(np.nansum(gains))
+            state.loss_sum = float(np.nansum(losses))
+        for i in (n - 2, n - 1):
+            if i < 0:
+                continue
+            state.prev = state.last
+            state.last = {
+                "open_time": int(open_times[i]),
+                "close": float(closes[i]),
+                "ema20": float(ema_fast[i]),
+                "ema60": float(ema_slow[i]),
+                "rsi": float(rsi_arr[i]),
+            }
+        return state
+
+    def update(self, open_time, close) -> bool:
+        """
+        새로 마감된 캔들 1개 반영. 이미 반영된 캔들은 무시하고 True,
+        캔들이 빠져 있으면(gap) 갱신하지 않고 False (호출측에서 재구성).
+        """
+        open_time = int(open_time)
+        close = float(close)
+        last_open = self.last_open_time
+        if last_open is not None:
+            if open_time <= last_open:
+                return True
+            if self.interval_ms is None:
+                self.interval_ms = open_time - last_open
+            elif open_time - last_open != self.interval_ms:
+                return False
+
+        if self.count == 0:
+            self.ema_fast = close
+            self.ema_slow = close
+        else:
+            a_fast = 2.0 / (self.fast + 1)
+            a_slow = 2.0 / (self.slow + 1)
+            self.ema_fast = (1 - a_fast) * self.ema_fast + a_fast * close
+            self.ema_slow = (1 - a_slow) * self.ema_slow + a_slow * close
+
+            delta = close - self.last_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            p = self.rsi_period
+            if self.count < p:
+                self.gain_sum += gain
+                self.loss_sum += loss
+            elif self.count == p:
+                self.avg_gain = (self.gain_sum + gain) / p
+                self.avg_loss = (self.loss_sum + loss) / p
+            else:
+                self.avg_gain = (self.avg_gain * (p - 1) + gain) / p
+                self.avg_loss = (self.avg_loss * (p - 1) + loss) / p
+
+        self.count += 1
+        self.last_close = close
+        self._snapshot(open_time, close)
+        return True
+
+    # --- 체크포인트 ---
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        state = cls(data["fast"], data["slow"], data["rsi_period"])
+        state.__dict__.update(data)
+        return state
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+논블로킹 로깅 파이프라인
+
+거래 스레드의 로그 호출은 LogRecord 를 큐에 넣기만 하고(포맷·디스크·stdout 쓰기 없음),
+백그라운드 QueueListener 가 회전(크기 또는 시각 기준) 파일과 콘솔에 씁니다.
+주문 / 체결 / 판단 이벤트는 선택적으로 JSON Lines 파일에 한 줄씩 남깁니다.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+
+from metrics import LOG_DROPPED
+
+EVENT_LOGGER = "events"
+
+_event_logger = logging.getLogger(EVENT_LOGGER)
+_event_logger.propagate = False
+_listener = None
+_queue_handler = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    레코드를 그대로 큐에 넣는 핸들러 (같은 프로세스 안이라 피클링용 사전 포맷 불필요).
+    메시지 포맷(% 인자 병합)은 리스너 스레드에서 하며, 큐가 가득 차면 버리고
+    /metrics 의 bot_log_records_dropped_total 로 집계합니다.
+    """
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.inc()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # 큐가 가득 차 있어도 남은 레코드를 다 쓴 뒤 종료되도록 블로킹 put
+        self.queue.put(self._sentinel)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """이벤트 레코드 → {"ts", "event", ...필드} 한 줄 JSON"""
+
+    def format(self, record):
+        data = {"ts": int(record.created * 1000), "event": record.getMessage()}
+        data.update(getattr(record, "fields", {}))
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _file_handler(path, max_bytes, backups, when):
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backups, encoding="utf-8")
+    return logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+
+
+def setup_logging(path: str = "trading_bot.log", level=logging.INFO,
+                  max_bytes: int = 10 * 1024 * 1024, backups: int = 5, when: str = "",
+                  event_path: str = "", console: bool = True, queue_size: int = 10_000):
+    """
+    루트 로거를 큐 핸들러 하나로 구성하고 리스너 스레드를 시작합니다.
+    when 을 주면 시각 기준(예: "midnight"), 아니면 max_bytes 크기 기준으로 회전.
+    event_path 를 주면 log_event() 이벤트를 JSON Lines 로 기록합니다.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+    # 포맷에 쓰지 않는 레코드 속성은 수집하지 않음 (호출 위치 스택 조회 / 프로세스 정보)
+    logging._srcfile = None
+    logging.logMultiprocessing = False
+    logging.logProcesses = False
+
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    file_handler = _file_handler(path, max_bytes, backups, when)
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+    if event_path:
+        event_handler = _file_handler(event_path, max_bytes, backups, when)
+        event_handler.setFormatter(JsonLinesFormatter())
+        # 이벤트 레코드만 이벤트 파일로, 일반 로그 파일에는 섞지 않음
+        event_handler.addFilter(lambda r: r.name == EVENT_LOGGER)
+        for handler in handlers:
+            handler.addFilter(lambda r: r.name != EVENT_LOGGER)
+        handlers.append(event_handler)
+
+    q = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(q)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    for handler in list(_event_logger.handlers):
+        _event_logger.removeHandler(handler)
+    if event_path:
+        _event_logger.addHandler(_queue_handler)
+        _event_logger.setLevel(logging.INFO)
+    else:
+        _event_logger.setLevel(logging.CRITICAL + 1)  # 비활성: log_event 즉시 반환
+
+    _listener = _Listener(q, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """큐에 남은 레코드를 모두 쓰고 리스너 종료 (종료 시 호출)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def log_event(event: str, **fields):
+    """
+    주문 / 체결 / 판단 이벤트 기록 (JSON Lines).
+    이벤트 로그가 꺼져 있으면 레코드를 만들지 않고 바로 반환합니다.
+    """
+    if _event_logger.isEnabledFor(logging.INFO):
+        _event_logger.info(event, extra={"fields": fields})
+
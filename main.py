@@ -1,44 +1,53 @@
 # -*- coding: utf-8 -*-
+import atexit
 import os
+import signal
 import time
 import logging
 from threading import Thread
-from decimal import Decimal, ROUND_DOWN, getcontext
-
-import pandas as pd
-from flask import Flask
-from telegram import Bot
-from telegram.error import TelegramError
-
-from binance.um_futures import UMFutures
+from decimal import Decimal, getcontext
+
+from indicators import IndicatorState
+from market_stream import KlineStream
+from candle_store import CandleStore, to_row
+from engine import SymbolLogger, SymbolState, TradingEngine
+from account_snapshot import fetch_snapshot
+from checkpoint import StateCheckpoint
+from user_stream import AccountStream
+from risk_monitor import RiskMonitor
+from exchange_filters import FilterRegistry
+from notifier import TelegramNotifier
+from log_pipeline import log_event, setup_logging, stop_logging
+from metrics import API_ERRORS, CLOSE_TO_ACK_SECONDS, REGISTRY, STAGE_SECONDS
+from status_server import BotHealth, StatusServer
+from profiler import Profiler, thread_stacks
+from rate_limit import RateLimitedClient, RateLimiter
+from client_factory import ClientFactory
+from paper_exchange import PaperExchange
+from clock import ServerClock, interval_ms
+from orders import protective_legs, submit_batch
+from strategy import (StrategyParams, entry_conditions,
+                      hard_sl_hit, position_pnl, protective_prices)
 
 # --- 로깅 설정 ----------------------------------------------------------------------------
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("trading_bot.log"),
-              logging.StreamHandler()])
+# 큐 핸들러 + 백그라운드 기록 스레드 (느린 디스크/stdout 이 주문 경로를 막지 않음)
+setup_logging(path=os.environ.get("LOG_FILE", "trading_bot.log"),
+              max_bytes=int(os.environ.get("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+              backups=int(os.environ.get("LOG_BACKUPS", 5)),
+              when=os.environ.get("LOG_ROTATE_WHEN", ""),  # 예: midnight (시각 기준 회전)
+              event_path=os.environ.get("EVENT_LOG_FILE", ""))  # 주문/체결/판단 JSON Lines
+atexit.register(stop_logging)
 logger = logging.getLogger(__name__)
 
-# --- Flask (간단한 헬스체크) --------------------------------------------------------------
-app = Flask(__name__)
-
-
-@app.route("/")
-def home():
-    return f"테스트넷 봇 살아있어요! 현재 시간: {time.strftime('%Y-%m-%d %H:%M:%S')}"
-
-
-def run_server():
-    # 구글 클라우드 호환: 포트 8080 (환경변수에서 읽기, 기본값 8080)
-    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 8080)))
-
-
 # --- 환경 변수 / 설정 --------------------------------------------------------------------
 API_KEY = os.environ.get("API_KEY", "")
 API_SECRET = os.environ.get("API_SECRET", "")
 
 SYMBOL = os.environ.get("SYMBOL", "BTCUSDT")
+# 여러 심볼을 한 프로세스에서 거래 (쉼표 구분, 미설정 시 SYMBOL 하나)
+SYMBOLS = [s.strip().upper()
+           for s in os.environ.get("SYMBOLS", SYMBOL).split(",") if s.strip()]
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", min(8, len(SYMBOLS))))
 TIMEFRAME = os.environ.get("TIMEFRAME", "15m")
 POSITION_RATIO = float(os.environ.get("POSITION_RATIO", 0.10))
 TRAIL_RATE = float(os.environ.get("TRAIL_RATE", 1.5))
@@ -47,7 +56,67 @@ BACKUP_TP = float(os.environ.get("BACKUP_TP", 5.0))  # 백업 익절 +5%
 BACKUP_SL = float(os.environ.get("BACKUP_SL", -5.0))  # 백업 손절 -5%
 TESTNET_BASE_URL = os.environ.get(
     "TESTNET_BASE_URL", "https://demo-fapi.binance.com")  # 정확한 Futures 테스트넷
-CANDLE_INTERVAL = 900  # 15분 = 900초
+CANDLE_INTERVAL_MS = interval_ms(TIMEFRAME)  # TIMEFRAME 에서 계산 (15m = 900000)
+# 캔들 마감(서버 시각) 후 몇 ms 뒤에 깨어날지 / 서버 시각 재동기화 주기 (초)
+WAKE_DELAY_MS = float(os.environ.get("WAKE_DELAY_MS", 50))
+CLOCK_SYNC_INTERVAL = float(os.environ.get("CLOCK_SYNC_INTERVAL", 300))
+# 서명 요청 recvWindow 기본값 (ms, 요청별로 지정한 값이 우선)
+RECV_WINDOW = int(os.environ.get("RECV_WINDOW", 5000))
+HISTORY_LIMIT = 200  # 인디케이터 재구성용 캔들 수
+CANDLE_DB = os.environ.get("CANDLE_DB", "candles.sqlite3")  # 로컬 캔들 저장소
+# 재시작용 상태 체크포인트 (포지션 추적 / 보호 주문 ID / 인디케이터 / 마지막 판단 캔들)
+STATE_FILE = os.environ.get("STATE_FILE", "bot_state.json")
+# 모의 거래소: 기록 klines JSON 경로를 주면 테스트넷 대신 로컬 시뮬레이터로 실행 (paper_exchange.py)
+# 시작 잔고 / 호출당 지연(ms) / 호출 실패 확률 — 모의 모드의 스트림·예열 기본값은 끔
+PAPER_KLINES = os.environ.get("PAPER_KLINES", "")
+PAPER_BALANCE = float(os.environ.get("PAPER_BALANCE", 10000))
+PAPER_LATENCY_MS = float(os.environ.get("PAPER_LATENCY_MS", 0))
+PAPER_ERROR_RATE = float(os.environ.get("PAPER_ERROR_RATE", 0))
+# 시세 수신: stream(웹소켓 kline 마감 이벤트, 끊기면 REST 대체) / rest(캔들 마감 폴링)
+MARKET_DATA_MODE = os.environ.get("MARKET_DATA_MODE", "rest" if PAPER_KLINES else "stream")
+STREAM_URL = os.environ.get("STREAM_URL",
+                            "wss://fstream.binancefuture.com")  # Futures 테스트넷 스트림
+STREAM_GRACE = 5.0  # 마감 예정 시각 이후 스트림 이벤트 대기 여유 (초)
+# 계정 상태: stream(사용자 데이터 스트림 캐시, 끊기면 REST 대체) / rest(사이클마다 REST 조회)
+ACCOUNT_DATA_MODE = os.environ.get("ACCOUNT_DATA_MODE", "rest" if PAPER_KLINES else "stream")
+# 계정 캐시를 REST 로 다시 맞추는 주기 (초, 이벤트 유실 대비)
+ACCOUNT_RESYNC_INTERVAL = float(os.environ.get("ACCOUNT_RESYNC_INTERVAL", 1800))
+# 캔들 사이 HARD SL 감시: 가격 스트림(aggTrade / markPrice@1s, 빈 값이면 끔) / 끊겼을 때 폴링 주기 (초)
+RISK_STREAM = os.environ.get("RISK_STREAM", "" if PAPER_KLINES else "aggTrade")
+RISK_POLL_INTERVAL = float(os.environ.get("RISK_POLL_INTERVAL", 1.0))
+# 전략 판단 파라미터 (백테스트와 공유, strategy.py)
+PARAMS = StrategyParams(position_ratio=POSITION_RATIO,
+                        trail_rate=TRAIL_RATE,
+                        hard_sl=HARD_SL,
+                        backup_tp=BACKUP_TP)
+# 잔고/포지션/미체결 주문 동시 조회 제한 시간 (초)
+SNAPSHOT_TIMEOUT = float(os.environ.get("SNAPSHOT_TIMEOUT", 3.0))
+# 거래소 심볼 필터 캐시 파일 / 갱신 주기 (초)
+FILTER_CACHE_FILE = os.environ.get("FILTER_CACHE_FILE", "exchange_filters.json")
+FILTER_TTL = float(os.environ.get("FILTER_TTL", 3600))
+# 보호 주문 배치 제출 시도 횟수 (실패한 leg 만 재전송)
+ORDER_RETRIES = int(os.environ.get("ORDER_RETRIES", 3))
+# API 예산 부족 시 최대 대기 (초, 넘으면 낮은 우선순위 호출은 연기)
+RATE_LIMIT_MAX_WAIT = float(os.environ.get("RATE_LIMIT_MAX_WAIT", 30))
+# REST 연결: 연결/응답 제한 시간(초), 풀 크기, 멱등 요청 재시도 횟수
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 10))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", max(10, 3 * len(SYMBOLS))))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+# 캔들 마감 몇 초 전에 연결을 예열할지 (0 이면 끔) / 예열할 연결 수 (심볼당 동시 조회 3개)
+PREWARM_LEAD = float(os.environ.get("PREWARM_LEAD", 0 if PAPER_KLINES else 3))
+PREWARM_CONNECTIONS = int(os.environ.get("PREWARM_CONNECTIONS",
+                                         min(HTTP_POOL_SIZE, 3 * len(SYMBOLS))))
+
+# readiness: 몇 캔들 동안 성공 사이클이 없으면 not ready / 연속 API 오류 허용 횟수
+READY_STALE_CYCLES = float(os.environ.get("READY_STALE_CYCLES", 2))
+READY_MAX_API_ERRORS = int(os.environ.get("READY_MAX_API_ERRORS", 3))
+
+# 실행 중 진단: 상태 서버 /debug/* 인증 토큰 (빈 값이면 경로 자체를 끔) /
+# SIGUSR2 로 켤 때 프로파일할 사이클 수 / .prof 저장 디렉터리
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_CYCLES = int(os.environ.get("PROFILE_CYCLES", 10))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
 
 # 텔레그램 설정
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
@@ -57,558 +126,633 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "")
 getcontext().prec = 18
 
 
-# 15분 캔들 동기화 함수
+# 캔들 마감 동기화 함수
 def get_candle_sleep_time():
-    """다음 캔들 마감까지의 대기 시간 계산 (초 단위)"""
-    now = time.time()
-    candle_progress = now % CANDLE_INTERVAL
-    sleep_time = CANDLE_INTERVAL - candle_progress
-    return sleep_time
+    """다음 캔들 마감(거래소 서버 시각 기준) + WAKE_DELAY_MS 까지의 대기 시간 (초 단위)"""
+    return server_clock.next_close_in(CANDLE_INTERVAL_MS, WAKE_DELAY_MS)
 
 
-# --- 텔레그램 알림 함수 -------------------------------------------------------------------
-def send_telegram_message(message: str):
-    """텔레그램으로 메시지 전송 (비동기 처리 - 봇 속도 영향 없음)"""
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        return  # 설정 안 됨 - 자동 스킵
+# --- 상태 서버 (liveness / readiness / 지표) ----------------------------------------------
+health = BotHealth(SYMBOLS, CANDLE_INTERVAL_MS / 1000,
+                   stale_cycles=READY_STALE_CYCLES,
+                   max_api_errors=READY_MAX_API_ERRORS,
+                   slack=STREAM_GRACE + 60)
+# 요청 시에만 켜는 사이클 프로파일 / 스레드 스택 / tracemalloc (꺼져 있으면 비용 없음)
+profiler = Profiler(PROFILE_DIR)
 
-    def _send():
+
+def run_server():
+    # 구글 클라우드 호환: 포트 8080 (환경변수에서 읽기, 기본값 8080)
+    StatusServer(health, "0.0.0.0", int(os.environ.get("PORT", 8080)),
+                 metrics=REGISTRY.render,
+                 profiler=profiler, debug_token=PROFILE_TOKEN).run()
+
+
+def install_signal_handlers():
+    """SIGUSR1: 모든 스레드 스택을 로그로 / SIGUSR2: 다음 PROFILE_CYCLES 사이클 프로파일"""
+    if not hasattr(signal, "SIGUSR1"):
+        return  # Windows
+
+    def dump_stacks():
+        logger.warning(f"[프로파일] 스레드 스택\n{thread_stacks()}")
+
+    def start_profile():
         try:
-            bot = Bot(token=TELEGRAM_BOT_TOKEN)
-            bot.send_message(chat_id=TELEGRAM_CHAT_ID,
-                             text=message,
-                             parse_mode="HTML")
-        except TelegramError as e:
-            logger.warning(f"[텔레그램] 메시지 전송 실패: {e}")
-        except Exception as e:
-            logger.warning(f"[텔레그램] 예상치 못한 오류: {e}")
+            profiler.start(PROFILE_CYCLES)
+        except RuntimeError as e:
+            logger.warning(f"[프로파일] {e}")
+
+    # 핸들러 안에서는 스레드만 띄움 (메인 스레드가 로깅 잠금을 쥔 채 중단됐을 수 있음)
+    signal.signal(signal.SIGUSR1,
+                  lambda *_: Thread(target=dump_stacks, name="debug", daemon=True).start())
+    signal.signal(signal.SIGUSR2,
+                  lambda *_: Thread(target=start_profile, name="debug", daemon=True).start())
+
+
+# --- 텔레그램 알림 함수 -------------------------------------------------------------------
+# 봇 클라이언트 1개 + 제한된 큐 + 워커 1개 (첫 알림 시 시작)
+notifier = TelegramNotifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+
 
-    # 별도 스레드에서 비동기 처리 (봇 속도에 영향 없음)
-    Thread(target=_send, daemon=True).start()
+def send_telegram_message(message: str):
+    """텔레그램 알림을 큐에 넣고 바로 반환 (설정 안 됨/큐 포화 시 버림 - 봇 속도 영향 없음)"""
+    notifier.send(message)
 
 
 # --- 유틸 / 거래소 정보 ------------------------------------------------------------------
-def safe_decimal(x):
-    return Decimal(str(x))
+# 요청 weight / 주문 수 예산은 재시작해도 이어지도록 프로세스 전체에서 하나 (IP / 계정 단위 제한)
+rate_limiter = RateLimiter(max_wait=RATE_LIMIT_MAX_WAIT)
+# 거래소 서버 시각 추정 (캔들 마감 스케줄 / 서명 timestamp / 마감 캔들 판정 기준)
+server_clock = ServerClock(sync_interval=CLOCK_SYNC_INTERVAL)
+# 클라이언트(연결 풀)도 하나를 재사용 (재시작 후 TCP+TLS 재연결 없음)
+client_factory = ClientFactory(API_KEY, API_SECRET, TESTNET_BASE_URL,
+                               timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+                               pool_size=HTTP_POOL_SIZE,
+                               retries=HTTP_RETRIES,
+                               clock=server_clock,
+                               recv_window=RECV_WINDOW,
+                               # 모의 모드에서는 실 계정 호출 자체를 막음 (get_client() 의 모의 클라이언트만 사용)
+                               disabled="모의 거래소 모드 (PAPER_KLINES)" if PAPER_KLINES else "",
+                               # 호출 전 예산 확인 + 응답 헤더(used-weight / order-count)로 보정
+                               wrap=lambda c: RateLimitedClient(c, rate_limiter))
+
+
+# 사이클마다 원자적으로 저장하는 상태 파일 (봇 스레드 재시작 / 프로세스 재시작 공용)
+checkpoint = StateCheckpoint(STATE_FILE)
+
+
+# 모의 거래소는 봇 스레드가 재시작해도 같은 인스턴스 (포지션 / 주문 / 잔고 유지)
+paper_client = None
 
 
 def get_client():
+    global paper_client
+    if PAPER_KLINES:
+        if paper_client is None:
+            exchange = PaperExchange.from_file(PAPER_KLINES, SYMBOLS,
+                                               balance=PAPER_BALANCE,
+                                               latency=PAPER_LATENCY_MS / 1000,
+                                               error_rate=PAPER_ERROR_RATE)
+            paper_client = RateLimitedClient(exchange, rate_limiter)
+            logger.info(f"모의 거래소 사용: {PAPER_KLINES} (잔고 {PAPER_BALANCE:.2f} USDT)")
+        return paper_client
     if not API_KEY or not API_SECRET:
         logger.error("API_KEY/API_SECRET 미설정. 환경변수를 확인하세요.")
         return None
     logger.info(f"테스트넷 연결: {TESTNET_BASE_URL}")
-    client = UMFutures(key=API_KEY,
-                       secret=API_SECRET,
-                       base_url=TESTNET_BASE_URL)
-    return client
-
+    return client_factory.get()
 
-def get_exchange_filters(client, symbol):
-    """
-    심볼의 stepSize(min qty)와 tickSize(가격 소수자리) 등을 시도해서 가져옵니다.
-    실패 시 기본값으로 돌아갑니다.
-    """
-    defaults = {
-        "stepSize": Decimal("0.001"),
-        "minQty": Decimal("0.001"),
-        "tickSize": Decimal("0.01"),
-        "pricePrecision": 2
-    }
-    try:
-        import json
-        info = client.exchange_info()
-        
-        # 응답이 string이면 JSON으로 파싱
-        if isinstance(info, str):
-            info = json.loads(info)
-        
-        # 응답이 dict 확인
-        if not isinstance(info, dict):
-            logger.warning(f"exchange_info 응답 타입 오류: {type(info)}")
-            return defaults
-            
-        symbols = info.get("symbols", [])
-        if not isinstance(symbols, list):
-            logger.warning("symbols가 list가 아님")
-            return defaults
-            
-        for s in symbols:
-            if not isinstance(s, dict):
-                continue
-            if s.get("symbol") == symbol:
-                filters = s.get("filters", [])
-                if not isinstance(filters, list):
-                    continue
-                for f in filters:
-                    if not isinstance(f, dict):
-                        continue
-                    if f.get("filterType") == "LOT_SIZE":
-                        try:
-                            step = Decimal(str(f.get("stepSize", "0.001")))
-                            minq = Decimal(str(f.get("minQty", "0.001")))
-                            defaults["stepSize"] = step
-                            defaults["minQty"] = minq
-                        except:
-                            pass
-                    if f.get("filterType") == "PRICE_FILTER":
-                        try:
-                            tick = f.get("tickSize", "0.01")
-                            tick_dec = Decimal(str(tick))
-                            defaults["tickSize"] = tick_dec
-                            exponent = tick_dec.as_tuple().exponent
-                            defaults["pricePrecision"] = int(abs(int(exponent)))
-                        except:
-                            pass
-                return defaults
-    except Exception as e:
-        logger.warning(f"심볼 정보 조회 실패 (기본값 사용): {e}")
-    return defaults
 
+# --- 인디케이터 계산 ---------------------------------------------------------------------
+def build_indicator_state(store: CandleStore) -> IndicatorState:
+    """저장소 링 버퍼의 최근 마감 캔들로 인디케이터 상태 재구성 (시작 시 / gap 발생 시, 복사 없는 뷰)"""
+    return IndicatorState.from_history(store.recent.column("open_time", HISTORY_LIMIT),
+                                       store.recent.column("close", HISTORY_LIMIT))
 
-def quantize_qty(qty: Decimal, step: Decimal):
-    """거래소 stepSize에 맞춰 내림 반올림 (정확도 보장)"""
-    if qty <= 0:
-        return Decimal("0")
-    # 거래소 규칙에 정확히 부합: (수량 / 스텝).내림 * 스텝
-    return (qty / step).to_integral_value(rounding=ROUND_DOWN) * step
 
+# --- 심볼 준비 ---------------------------------------------------------------------------
+def configure_symbol(client, log, symbol: str) -> bool:
+    """격리마진 / 레버리지 1배 설정 (실패해도 계속). 둘 다 적용되어 있으면 True"""
+    ok = True
+    try:
+        client.change_margin_type(symbol=symbol, marginType="ISOLATED")
+        log.info("격리마진 설정 완료")
+    except Exception as e:
+        # -4046: 이미 격리마진
+        if getattr(e, "error_code", None) != -4046:
+            ok = False
+            log.warning(f"격리마진 설정 실패: {e}")
 
-def quantize_price(price: Decimal, tick: Decimal):
-    """거래소 tickSize에 맞춰 가격 정밀도 조정 (Binance 오류 방지)"""
-    if price <= 0 or tick <= 0:
-        return price
-    # 거래소 규칙: (가격 / 틱).내림 * 틱
-    return (price / tick).to_integral_value(rounding=ROUND_DOWN) * tick
+    try:
+        client.change_leverage(symbol=symbol, leverage=1)
+        log.info("레버리지 1배 설정 완료")
+    except Exception as e:
+        ok = False
+        log.warning(f"레버리지 설정 실패: {e}")
+    return ok
 
 
-# --- 인디케이터 계산 ---------------------------------------------------------------------
-def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-    df = df.copy()
-    df["ema20"] = df["close"].ewm(span=20, adjust=False).mean()
-    df["ema60"] = df["close"].ewm(span=60, adjust=False).mean()
-
-    # Wilder's RSI (RMA 기반 - Binance/TradingView와 동일)
-    delta = df["close"].diff()
-    gains = delta.clip(lower=0)
-    losses = -delta.clip(upper=0)
-
-    # 첫 14 기간: SMA
-    avg_gain = gains.rolling(14).mean()
-    avg_loss = losses.rolling(14).mean()
-
-    # 이후: Wilder's EMA (alpha=1/14, 지수 평활)
-    for i in range(14, len(df)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * 13 + gains.iloc[i]) / 14
-        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * 13 + losses.iloc[i]) / 14
-
-    avg_loss = avg_loss.fillna(0).replace(0, 1e-10)  # type: ignore
-    df["rsi"] = 100 - 100 / (1 + avg_gain / avg_loss)
-    # NaN 방어: 초기 몇 개의 NaN 값을 처리 (Forward fill)
-    df["ema20"] = df["ema20"].fillna(method="bfill")  # type: ignore
-    df["ema60"] = df["ema60"].fillna(method="bfill")  # type: ignore
-    df["rsi"] = df["rsi"].fillna(method="bfill")  # type: ignore
-    return df
+def setup_symbol(client, symbol: str, registry: FilterRegistry, saved=None) -> SymbolState:
+    """
+    거래소 필터, 캔들 저장소, 체크포인트 복원, 격리마진/레버리지 설정.
+    saved 가 있으면(재시작) 포지션 추적 / 인디케이터를 이어받고, 이미 설정된 마진/레버리지는 건너뜀
+    """
+    log = SymbolLogger(logger, {"symbol": symbol})
+
+    filters = registry.get(symbol)
+    log.info(f"심볼 필터: stepSize={filters.step_size}, minQty={filters.min_qty}, "
+             f"tickSize={filters.tick_size}, minNotional={filters.min_notional}")
+
+    # 로컬 캔들 저장소: 재시작 시 저장된 이력에서 이어서, 누락 구간은 먼저 복구
+    store = CandleStore(CANDLE_DB, symbol, TIMEFRAME)
+    store.repair_gaps(client)
+
+    st = SymbolState(symbol=symbol,
+                     step_size=filters.step_size,
+                     min_qty=filters.min_qty,
+                     tick_size=filters.tick_size,
+                     min_notional=filters.min_notional,
+                     store=store)
+
+    # 증분 인디케이터 / 포지션 추적: 체크포인트에서 이어서 (없으면 첫 사이클에서 이력으로 재구성)
+    if saved:
+        st.restore(saved)
+        log.info(f"[체크포인트] 상태 복원 (포지션: {st.previous_side or '없음'}, "
+                 f"마지막 판단 캔들: {st.last_decision_open_time})")
+    if not st.configured:
+        st.configured = configure_symbol(client, log, symbol)
+    return st
+
+
+def reconcile(client, st: SymbolState):
+    """체크포인트의 포지션 추적을 거래소 상태와 대조 (재시작 직후 1회, 중단 중 변화 처리)"""
+    symbol, log = st.symbol, st.log
+    snap = fetch_snapshot(client, symbol, timeout=SNAPSHOT_TIMEOUT)
+    if not snap.ok["position"]:
+        log.warning("[재시작 대조] 포지션 조회 실패 → 첫 사이클에서 확인")
+        return
+    if st.previous_side is not None and snap.side is None:
+        # 중단된 동안 TS/TP/SL 체결로 종료됨 → 남은 보호 주문 정리
+        log.warning(f"[재시작 대조] 중단 중 {st.previous_side} 포지션 종료됨 → 미체결 주문 취소")
+        log_event("fill", symbol=symbol, kind="POSITION_CLOSED", side=st.previous_side,
+                  qty=st.previous_qty)
+        if snap.open_orders_exist or not snap.ok["open_orders"]:
+            try:
+                client.cancel_open_orders(symbol=symbol)
+            except Exception as e:
+                API_ERRORS.inc(call="cancel_open_orders")
+                log.warning(f"[재시작 대조] 미체결 주문 취소 실패: {e}")
+        st.protective_orders = []
+    elif snap.side is not None and snap.ok["open_orders"]:
+        open_ids = {o.get("orderId") for o in snap.open_orders}
+        gone = [i for i in st.protective_orders if i not in open_ids]
+        if gone:
+            log.warning(f"[재시작 대조] 보호 주문 {gone} 없음 (체결/취소됨)")
+        st.protective_orders = [i for i in st.protective_orders if i in open_ids]
+        if not open_ids:
+            log.warning("[재시작 대조] 보유 포지션에 보호 주문 없음 → HARD SL 감시만 동작")
+            send_telegram_message(f"⚠️ <b>보호 주문 없음</b>\n심볼: {symbol}\n포지션: {snap.side}")
+    if st.previous_side != snap.side:
+        log.info(f"[재시작 대조] 포지션 {st.previous_side or '없음'} → {snap.side or '없음'}")
+    st.previous_side, st.previous_qty = snap.side, snap.qty
+    risk_monitor.watch(symbol, snap.side, snap.entry_price, snap.qty)
 
 
 # --- 주요 로직 ---------------------------------------------------------------------------
-def run_bot():
-    client = get_client()
-    if client is None:
+def update_market_data(client, st: SymbolState, stream):
+    """
+    새로 마감된 캔들을 인디케이터/저장소에 반영하고 현재가를 반환.
+    스트림 이벤트가 있으면 REST 호출 없이, 없거나 누락이 있으면 REST delta 경로로.
+    """
+    state = st.indicator_state
+    closed = []
+    while st.pending_candles:
+        closed.append(st.pending_candles.popleft())
+    if closed and state is not None:
+        # 재연결 시 중복 수신된 캔들은 제외
+        closed = [c for c in closed if c["open_time"] > state.last_open_time]
+        # 스트림: 마감 캔들 이벤트만으로 증분 갱신 (REST 호출 없음)
+        applied = []
+        with STAGE_SECONDS.time(stage="indicators"):
+            for c in closed:
+                if not state.update(c["open_time"], c["close"]):
+                    st.log.warning("[스트림] 캔들 누락 감지 → REST 로 보정")
+                    break
+                applied.append(to_row(c))
+        st.store.append(applied)
+        if len(applied) == len(closed):
+            return stream.last_price.get(st.symbol)
+    # 시작 시 / 스트림 미사용·단절 시: REST 경로
+    return refresh_from_rest(client, st)
+
+
+def refresh_from_rest(client, st: SymbolState):
+    """REST 경로: 마지막 저장 캔들 이후만 받아(delta) 저장 후 인디케이터에 반영"""
+    store = st.store
+    new_rows = store.sync(client, bootstrap=HISTORY_LIMIT,
+                          now_ms=int(server_clock.now_ms()))
+    health.api_result(new_rows is not None)
+    if new_rows is None or store.live is None:
+        return None
+    last_price = store.live[4]
+    if st.indicator_state is not None:
+        with STAGE_SECONDS.time(stage="indicators"):
+            updated = all(st.indicator_state.update(r[0], r[4]) for r in new_rows)
+        if updated:
+            return last_price
+        st.log.warning("[인디케이터] 캔들 누락 감지 → 저장소 이력으로 재구성")
+        store.repair_gaps(client)
+    with STAGE_SECONDS.time(stage="indicators_rebuild"):
+        st.indicator_state = build_indicator_state(store)
+    return last_price
+
+
+def open_position(client, st: SymbolState, side: str, qty_units: int,
+                  current_price: float):
+    """
+    시장가 진입 후 보호 주문(트레일링 스탑 + 백업 익절)을 배치 1회로 생성.
+    qty_units 는 stepSize 격자 칸 수, 주문 파라미터에서만 10진 문자열로 바꿈
+    """
+    symbol, log = st.symbol, st.log
+    qty = st.qty_grid.format(qty_units)
+    try:
+        with STAGE_SECONDS.time(stage="entry_order"):
+            new_ord = client.new_order(symbol=symbol,
+                                       side="BUY" if side == "LONG" else "SELL",
+                                       type="MARKET",
+                                       quantity=qty)
+    except Exception as e:
+        API_ERRORS.inc(call="new_order")
+        log.error(f"{side} 진입 실패: {e}")
+        log_event("order", symbol=symbol, kind="MARKET", side=side, qty=qty,
+                  ok=False, error=str(e))
         return
-
-    # 시도: 격리/레버리지 (실패해도 계속)
+    # 판단 기준 캔들 마감 → 진입 주문 응답까지 (스케줄러 대기 + 데이터 + 판단 + 주문 왕복)
+    candle_close = (st.indicator_state.last_open_time + st.store.interval_ms) / 1000
+    CLOSE_TO_ACK_SECONDS.observe(server_clock.now_ms() / 1000 - candle_close)
+    log.info("%s 진입 주문 (2캔들 연속 확인): %s", side, new_ord)
+    # 체결가는 다음 사이클 / 계정 스트림에서 보정, 그 전까지 판단 가격 기준으로 감시
+    risk_monitor.watch(symbol, side, current_price, qty)
+    log_event("order", symbol=symbol, kind="MARKET", side=side, qty=qty,
+              price=current_price, ok=True, order_id=new_ord.get("orderId"))
+
+    # tickSize 격자로 내림 → 주문 가격 문자열
+    price_grid = st.price_grid
+    sl_price, tp_price = (price_grid.format(price_grid.floor(p))
+                          for p in protective_prices(side, current_price, PARAMS))
+    # 보호 주문을 먼저 보내고 알림은 나중에 (무방비 구간 최소화)
+    with STAGE_SECONDS.time(stage="protective_orders"):
+        legs = submit_batch(client,
+                            protective_legs(symbol, side, qty, PARAMS.trail_rate,
+                                            sl_price, tp_price),
+                            max_attempts=ORDER_RETRIES,
+                            log=log)
+
+    st.protective_orders = [leg.result.get("orderId") for leg in legs if leg.ok]
+
+    icon = "🟢" if side == "LONG" else "🔴"
+    send_telegram_message(
+        f"{icon} <b>{side} 진입</b>\n심볼: {symbol}\n수량: {qty}\n가격: {current_price:.2f}")
+    for leg in legs:
+        log_event("order", symbol=symbol, kind=leg.name, side=side, qty=qty,
+                  ok=leg.ok, attempts=leg.attempts,
+                  order_id=leg.result.get("orderId") if leg.ok else None, error=leg.error)
+        if leg.name == "TRAILING_STOP_MARKET":
+            label = f"트레일링 스탑 생성 (TSM={TRAIL_RATE}%)"
+        elif leg.name == "STOP_MARKET":
+            label = f"STOP_MARKET 백업 손절 생성 (SL={sl_price})"
+        else:
+            label = f"백업 익절 생성 (TP={tp_price}, TAKE_PROFIT_MARKET)"
+        if leg.ok:
+            log.info("[%s] %s: %s", side, label, leg.result)
+        elif leg.name == "STOP_MARKET":
+            log.error(
+                f"[{side}] STOP_MARKET 백업도 실패 (메인 루프 HARD_SL 체크만 가능): {leg.error}")
+        else:
+            log.warning(f"[{side}] {label} 실패 ({leg.attempts}회 시도): {leg.error}")
+        if leg.ok and leg.name == "TAKE_PROFIT_MARKET":
+            tp_icon = "📈" if side == "LONG" else "📉"
+            send_telegram_message(f"{tp_icon} <b>{side} 익절 설정</b> (TP: {tp_price})")
+
+
+def apply_filters(st: SymbolState, registry: FilterRegistry):
+    """레지스트리의 최신 필터를 심볼 상태에 반영 (실행 중 거래소 필터 변경 대응)"""
+    filters = registry.get(st.symbol)
+    new = (filters.step_size, filters.min_qty, filters.tick_size, filters.min_notional)
+    if new != (st.step_size, st.min_qty, st.tick_size, st.min_notional):
+        st.log.warning(f"[필터] 갱신 반영: stepSize={filters.step_size}, minQty={filters.min_qty}, "
+                       f"tickSize={filters.tick_size}, minNotional={filters.min_notional}")
+        st.step_size, st.min_qty, st.tick_size, st.min_notional = new
+        st.refresh_grids()
+
+
+def flatten_position(client, symbol: str, side: str, qty, price, pnl, log) -> bool:
+    """HARD SL: 시장가 reduceOnly 전량 청산 + 미체결 주문 취소 (캔들 사이클 / 리스크 감시 공용)"""
+    ok = False
     try:
-        client.change_margin_type(symbol=SYMBOL, marginType="ISOLATED")
-        logger.info("격리마진 설정 완료")
+        close_side = "SELL" if side == "LONG" else "BUY"
+        # 시장가로 전량 청산 (reduceOnly: 다른 경로가 먼저 청산했으면 거절되어 역포지션 방지)
+        with STAGE_SECONDS.time(stage="hard_sl_flatten"):
+            resp = client.new_order(symbol=symbol,
+                                    side=close_side,
+                                    type="MARKET",
+                                    quantity=str(qty),
+                                    reduceOnly="true")
+        ok = True
+        log.warning("HARD SL 청산 주문 체결: %s", resp)
+        log_event("fill", symbol=symbol, kind="HARD_SL", side=side, qty=qty,
+                  price=price, pnl_pct=pnl, order_id=resp.get("orderId"))
+        # 텔레그램 알림
+        msg = f"⚠️ <b>HARD SL 발동</b>\n심볼: {symbol}\n포지션: {side}\n손실: {pnl:.2f}%"
+        send_telegram_message(msg)
     except Exception as e:
-        logger.warning(f"격리마진 설정 실패: {e}")
-
+        API_ERRORS.inc(call="new_order")
+        log.error(f"HARD SL 청산 실패: {e}")
+    # 취소 시도 (예외 무시)
     try:
-        client.change_leverage(symbol=SYMBOL, leverage=1)
-        logger.info("레버리지 1배 설정 완료")
+        client.cancel_open_orders(symbol=symbol)
     except Exception as e:
-        logger.warning(f"레버리지 설정 실패: {e}")
-
-    filters = get_exchange_filters(client, SYMBOL)
-    step_size = filters["stepSize"]
-    min_qty = filters["minQty"]
-    tick_size = filters["tickSize"]
-    logger.info(
-        f"심볼 필터: stepSize={step_size}, minQty={min_qty}, tickSize={tick_size}")
+        API_ERRORS.inc(call="cancel_open_orders")
+        log.debug(f"미체결 주문 취소 실패: {e}")
+    return ok
 
-    logger.info("봇 시작: SYMBOL=%s, TIMEFRAME=%s, POSITION_RATIO=%.2f", SYMBOL,
-                TIMEFRAME, POSITION_RATIO)
 
-    def get_balance():
+def on_risk_breach(symbol: str, side: str, qty, entry_price: float, price: float) -> bool:
+    """
+    리스크 감시 스레드에서 HARD SL 가격 도달 시 호출 (캔들 사이클을 기다리지 않음).
+    청산은 run_bot 이 감시에 넘긴 클라이언트로 (모의 모드면 모의 거래소, 실 계정으로 새지 않음)
+    """
+    client = risk_monitor.client
+    if client is None:
+        logger.error(f"[{symbol}] HARD SL 청산 불가: 클라이언트 없음")
+        return False
+    pnl = position_pnl(side, entry_price, price)
+    return flatten_position(client, symbol, side, qty, price, pnl,
+                            SymbolLogger(logger, {"symbol": symbol}))
+
+
+# 캔들 사이 HARD SL 감시 (가격 스트림, 끊기면 REST 폴링)
+risk_monitor = RiskMonitor(SYMBOLS, HARD_SL, on_risk_breach,
+                           stream_url=STREAM_URL if RISK_STREAM else None,
+                           stream=RISK_STREAM, poll_interval=RISK_POLL_INTERVAL)
+
+
+def on_account_event(kind: str, symbol: str, data: dict):
+    """사용자 데이터 스트림 이벤트 → 리스크 감시 갱신 / 이벤트 로그 (스트림 스레드에서 호출)"""
+    if kind == "position":
+        risk_monitor.watch(symbol, data["side"], data["entry_price"], data["qty"])
+    elif kind == "fill":
+        log_event("fill", symbol=symbol, kind=data["type"], side=data["side"],
+                  qty=data["lastQty"], price=data["avgPrice"], order_id=data["orderId"],
+                  status=data["status"])
+
+
+def run_symbol_cycle(client, st: SymbolState, stream=None, registry=None, account=None):
+    """심볼 1개의 캔들 마감 사이클: 시세 반영 → 포지션 점검 → 진입/청산 판단"""
+    symbol = st.symbol
+    if registry is not None:
+        apply_filters(st, registry)
+    log = st.log
+
+    last_price = update_market_data(client, st, stream)
+    indicator_state = st.indicator_state
+    if (last_price is None or indicator_state is None
+            or indicator_state.prev is None):
+        log.info("데이터 부족, 대기")
+        return
+    health.candle(symbol, indicator_state.last_open_time)
+    # 같은 캔들로 두 번 판단하지 않음 (스트림/REST 가 같은 캔들을 중복 전달한 경우)
+    if indicator_state.last_open_time == st.last_decision_open_time:
+        return
+    st.last_decision_open_time = indicator_state.last_open_time
+
+    # 마지막 완성 캔들 기준으로 판단 (2개 캔들 연속 확인)
+    last_candle = indicator_state.last
+    prev_candle = indicator_state.prev
+    current_price = float(last_price)
+    last_close = last_candle["close"]
+
+    # 잔고 / 포지션 / 미체결 주문: 계정 스트림 캐시 우선, 준비 안 됐으면 REST 동시 조회
+    snap = account.snapshot(symbol) if account is not None else None
+    if snap is None:
+        snap = fetch_snapshot(client, symbol, timeout=SNAPSHOT_TIMEOUT)
+        health.api_result(snap.complete)
+    for name, err in snap.errors.items():
+        log.error(f"[계정 조회] {name} 조회 오류: {err}")
+    if not snap.ok["position"]:
+        # 포지션을 모르면 종료 감지/HARD SL/진입 모두 오판 위험 → 이번 사이클 스킵
+        log.warning("[계정 조회] 포지션 조회 실패 → 이번 사이클 스킵")
+        return
+    # 새 캔들 + 포지션 확인까지 끝난 사이클 (readiness 기준)
+    health.cycle_ok(symbol)
+    balance = snap.balance
+    side, qty, entry_price = snap.side, snap.qty, snap.entry_price
+    open_orders_exist = snap.open_orders_exist
+
+    # 포지션 종료 감지: 이전 상태와 비교하여 포지션이 사라지면 모든 미체결 주문 취소
+    position_closed = st.previous_side is not None and side is None
+    if position_closed:
+        # LONG/SHORT → 없음 (포지션 완전 종료)
+        log.warning("[포지션 종료 감지] 모든 미체결 주문 취소 시작")
+        log_event("fill", symbol=symbol, kind="POSITION_CLOSED", side=st.previous_side,
+                  qty=st.previous_qty, price=current_price)
+        if not open_orders_exist and snap.ok["open_orders"]:
+            # 계정 스트림이 체결 직후 이미 정리함
+            log.info("[포지션 종료 감지] 남은 미체결 주문 없음")
+        else:
+            try:
+                client.cancel_open_orders(symbol=symbol)
+                log.info("[포지션 종료 감지] 미체결 주문 모두 취소 완료 (TS/TP/SL 정리)")
+            except Exception as e:
+                API_ERRORS.inc(call="cancel_open_orders")
+                log.warning(f"[포지션 종료 감지] 미체결 주문 취소 실패: {e}")
+    elif st.previous_side is not None and st.previous_side != side and side is not None:
+        # LONG → SHORT 또는 SHORT → LONG (포지션 전환)
+        log.warning(
+            f"[포지션 전환 감지] {st.previous_side} → {side}: 미체결 주문 취소 시작")
         try:
-            acc = client.account(recvWindow=5000)
-            for a in acc.get("assets", []):
-                if a.get("asset") == "USDT":
-                    return float(a.get("availableBalance", 0))
+            client.cancel_open_orders(symbol=symbol)
+            log.info(f"[포지션 전환 감지] 미체결 주문 모두 취소 완료")
         except Exception as e:
-            logger.error(f"잔고 조회 오류: {e}")
-        return 0.0
+            API_ERRORS.inc(call="cancel_open_orders")
+            log.warning(f"[포지션 전환 감지] 미체결 주문 취소 실패: {e}")
+
+    # 상태 업데이트
+    st.previous_side = side
+    st.previous_qty = qty
+    if side is None:
+        st.protective_orders = []
+    risk_monitor.watch(symbol, side, entry_price, qty)
+    if position_closed:
+        # 보호 주문 체결 직후 사이클은 정리만 하고 진입하지 않음
+        # (계정 스트림이 이미 정리했어도 동일, backtest.simulate 와 같은 규칙)
+        return
 
-    def get_ohlcv():
-        try:
-            klines = client.klines(symbol=SYMBOL,
-                                   interval=TIMEFRAME,
-                                   limit=200)
-            if not klines or len(klines) == 0:
-                logger.warning("klines 데이터 없음")
-                return pd.DataFrame()
-
-            # klines를 리스트로 변환 (API 응답 안정화)
-            data = []
-            for kline in klines:
-                if isinstance(kline, (list, tuple)) and len(kline) >= 12:
-                    data.append([
-                        kline[0], kline[1], kline[2], kline[3], kline[4],
-                        kline[7], kline[6], kline[7], kline[8], kline[9],
-                        kline[10], 0
-                    ])
-
-            if not data:
-                logger.warning("변환된 klines 데이터 없음")
-                return pd.DataFrame()
-
-            df = pd.DataFrame(data,
-                              columns=[
-                                  "timestamp", "open", "high", "low", "close",
-                                  "volume", "close_time", "quote_volume",
-                                  "trades", "taker_buy_base",
-                                  "taker_buy_quote", "ignore"
-                              ])
-            for c in ["open", "high", "low", "close", "volume"]:
-                df[c] = pd.to_numeric(df[c], errors='coerce')
-            return df
-        except Exception as e:
-            logger.error(f"OHLCV 조회 오류: {e}")
-            return pd.DataFrame()
+    # entry_price=0 보호 로직 (ZeroDivision 방지)
+    if side and entry_price == 0:
+        log.warning("entry_price=0 → PnL 계산 불가. 포지션 조회 오류로 스킵")
+        return
 
-    def get_position():
-        # positionAmt가 0이면 포지션 없음
-        try:
-            positions = client.get_position_risk(symbol=SYMBOL,
-                                                 recvWindow=5000)
-            for p in positions:
-                if p.get("symbol") == SYMBOL:
-                    amt = Decimal(str(p.get("positionAmt", "0")))
-                    if amt == 0:
-                        return None, Decimal("0"), Decimal("0")
-                    entry = Decimal(str(p.get("entryPrice", "0")))
-                    side = "LONG" if amt > 0 else "SHORT"
-                    return side, abs(amt), entry
-        except Exception as e:
-            logger.error(f"포지션 조회 오류: {e}")
-        return None, Decimal("0"), Decimal("0")
+    # 상태 로깅 (포맷은 로그 스레드에서), 손익률은 한 번만 계산
+    pnl = position_pnl(side, entry_price, current_price) if side else None
+    if side:
+        log.info("가격: %.2f, 기준: %.2f, 잔고: %.4f USDT, 포지션: %s, PnL: %.2f%%",
+                 current_price, last_close, balance, side, pnl)
+    else:
+        log.info("가격: %.2f, 기준: %.2f, 잔고: %.4f USDT, 포지션: 없음",
+                 current_price, last_close, balance)
+
+    # HARD SL 체크
+    if side and hard_sl_hit(pnl, PARAMS):
+        log.warning("HARD SL 발동: 포지션 청산 시도")
+        risk_monitor.clear(symbol)
+        if flatten_position(client, symbol, side, qty, current_price, pnl, log):
+            # 시장가 청산은 이 사이클에서 정리까지 끝남 → 다음 캔들 마감에 바로 진입 판단
+            # (종료 감지로 보지 않음, backtest.simulate 의 HARD_SL 규칙과 같음)
+            st.previous_side = None
+            st.previous_qty = Decimal("0")
+            st.protective_orders = []
+        return
 
-    def has_open_orders():
-        try:
-            orders = client.get_open_orders(symbol=SYMBOL, recvWindow=5000)
-            return len(orders) > 0
-        except Exception as e:
-            logger.error(f"미체결 주문 조회 오류: {e} - 안전 모드로 새 진입 허용")
-            return False  # API 오류 시에도 진입 시도
+    # 포지션 없음 -> 진입 판단
+    if side is None:
+        # 고아 주문 정리: 포지션이 없으면서 미체결 주문이 있으면 자동 취소
+        if open_orders_exist:
+            log.warning("포지션 없음 + 미체결 주문 존재 (고아 주문) → 자동 취소")
+            try:
+                client.cancel_open_orders(symbol=symbol)
+                log.info("미체결 주문 모두 취소 완료")
+            except Exception as e:
+                API_ERRORS.inc(call="cancel_open_orders")
+                log.warning(f"미체결 주문 취소 실패: {e}")
+            return
+
+        # 잔고/미체결 주문 조회가 모두 성공했을 때만 진입 (부분/오래된 데이터로 거래 금지)
+        if not snap.complete:
+            log.warning(
+                f"[진입 보류] 계정 스냅샷 불완전 (실패: {', '.join(snap.failed)}) → 진입 스킵")
+            return
+
+        # 미체결 주문이 없을 때만 진입 시도
+        usdt_to_use = balance * POSITION_RATIO
+        if usdt_to_use <= 0:
+            log.warning(f"잔고 부족: 사용 가능 USDT={balance:.4f}, 필요 금액={usdt_to_use:.4f}")
+        else:
+            # 수량 계산 및 거래소 스텝/최소수량 반영 (stepSize 격자 칸 수로 내림)
+            raw_qty = usdt_to_use / current_price
+            qty_units = st.qty_grid.floor(raw_qty)
+            qty_value = st.qty_grid.to_float(qty_units)
+            log.info(
+                "[수량 계산] 사용 USDT=%.4f, 현재가=%.2f, 계산 수량=%.8f, 조정 수량=%s, 최소수량=%s",
+                usdt_to_use, current_price, raw_qty, st.qty_grid.format(qty_units), st.min_qty)
+
+            if qty_units < st.min_qty_units:
+                log.warning(
+                    f"[진입 불가] 계산된 수량 {qty_value:.8f} < 최소수량 {st.min_qty} → 진입 스킵"
+                )
+            elif qty_value * current_price < st.min_notional_value:
+                log.warning(
+                    f"[진입 불가] 주문 금액 {qty_value * current_price:.4f} < 최소 주문금액 {st.min_notional} → 진입 스킵"
+                )
+            else:
+                # 진입 조건: 2개 캔들 연속 확인으로 노이즈 필터링 (백테스트와 공용)
+                long_condition, short_condition = entry_conditions(
+                    last_candle["close"], last_candle["ema20"], last_candle["ema60"],
+                    last_candle["rsi"], prev_candle["ema20"], prev_candle["ema60"],
+                    PARAMS)
+
+                action = "LONG" if long_condition else "SHORT" if short_condition else None
+                log_event("decision", symbol=symbol, open_time=last_candle["open_time"],
+                          action=action, close=last_candle["close"],
+                          ema20=last_candle["ema20"], ema60=last_candle["ema60"],
+                          rsi=last_candle["rsi"], price=current_price)
+                if action is not None:
+                    open_position(client, st, action, qty_units, current_price)
+                else:
+                    log.info(
+                        "[진입 조건 미충족] EMA20=%.2f, EMA60=%.2f, 가격=%.2f, RSI=%.2f | "
+                        "이전 캔들: EMA20=%.2f, EMA60=%.2f",
+                        last_candle["ema20"], last_candle["ema60"], last_close,
+                        last_candle["rsi"], prev_candle["ema20"], prev_candle["ema60"])
 
-    # 포지션 상태 추적 (포지션 종료 감지용)
-    previous_side = None
-    previous_qty = Decimal("0")
 
-    # 메인 루프
-    while True:
-        try:
-            df = get_ohlcv()
-            if df.empty or len(df) < 2:
-                logger.info("데이터 부족, 대기")
-                time.sleep(get_candle_sleep_time())
-                continue
-
-            df = calculate_indicators(df)
-            # 마지막 완성 캔들 기준으로 판단 (2개 캔들 연속 확인)
-            last_candle = df.iloc[-2]
-            prev_candle = df.iloc[-3]
-            current_price = Decimal(str(df.iloc[-1]["close"]))
-            last_close = Decimal(str(last_candle["close"]))
-
-            balance = Decimal(str(get_balance()))
-            side, qty, entry_price = get_position()
-            open_orders_exist = has_open_orders()
-
-            # 포지션 종료 감지: 이전 상태와 비교하여 포지션이 사라지면 모든 미체결 주문 취소
-            if previous_side is not None and side is None:
-                # LONG/SHORT → 없음 (포지션 완전 종료)
-                logger.warning("[포지션 종료 감지] 모든 미체결 주문 취소 시작")
-                try:
-                    client.cancel_open_orders(symbol=SYMBOL)
-                    logger.info("[포지션 종료 감지] 미체결 주문 모두 취소 완료 (TS/TP/SL 정리)")
-                except Exception as e:
-                    logger.warning(f"[포지션 종료 감지] 미체결 주문 취소 실패: {e}")
-            elif previous_side is not None and previous_side != side and side is not None:
-                # LONG → SHORT 또는 SHORT → LONG (포지션 전환)
-                logger.warning(
-                    f"[포지션 전환 감지] {previous_side} → {side}: 미체결 주문 취소 시작")
-                try:
-                    client.cancel_open_orders(symbol=SYMBOL)
-                    logger.info(f"[포지션 전환 감지] 미체결 주문 모두 취소 완료")
-                except Exception as e:
-                    logger.warning(f"[포지션 전환 감지] 미체결 주문 취소 실패: {e}")
-
-            # 상태 업데이트
-            previous_side = side
-            previous_qty = qty
-
-            # entry_price=0 보호 로직 (ZeroDivision 방지)
-            if side and entry_price == 0:
-                logger.warning("entry_price=0 → PnL 계산 불가. 포지션 조회 오류로 스킵")
-                time.sleep(get_candle_sleep_time())
-                continue
-
-            # 상태 로깅
-            state_msg = f"가격: {current_price:.2f}, 기준: {last_close:.2f}, 잔고: {balance:.4f} USDT, 포지션: {side or '없음'}"
-            if side:
-                pnl = ((current_price / entry_price - 1) if side == "LONG" else
-                       (1 - current_price / entry_price)) * 100
-                state_msg += f", PnL: {pnl:.2f}%"
-            logger.info(state_msg)
-
-            # HARD SL 체크
-            if side:
-                pnl = ((current_price / entry_price - 1) if side == "LONG" else
-                       (1 - current_price / entry_price)) * 100
-                if pnl <= HARD_SL:
-                    logger.warning("HARD SL 발동: 포지션 청산 시도")
-                    try:
-                        close_side = "SELL" if side == "LONG" else "BUY"
-                        # 시장가로 전량 청산
-                        resp = client.new_order(symbol=SYMBOL,
-                                                side=close_side,
-                                                type="MARKET",
-                                                quantity=float(qty))
-                        logger.warning(f"HARD SL 청산 주문 체결: {resp}")
-                        # 텔레그램 알림
-                        msg = f"⚠️ <b>HARD SL 발동</b>\n포지션: {side}\n손실: {pnl:.2f}%"
-                        send_telegram_message(msg)
-                    except Exception as e:
-                        logger.error(f"HARD SL 청산 실패: {e}")
-                    # 취소 시도 (예외 무시)
-                    try:
-                        client.cancel_open_orders(symbol=SYMBOL)
-                    except Exception as e:
-                        logger.debug(f"미체결 주문 취소 실패: {e}")
-                    time.sleep(get_candle_sleep_time())
-                    continue
-
-            # 포지션 없음 -> 진입 판단
-            if side is None:
-                # 고아 주문 정리: 포지션이 없으면서 미체결 주문이 있으면 자동 취소
-                if open_orders_exist:
-                    logger.warning("포지션 없음 + 미체결 주문 존재 (고아 주문) → 자동 취소")
-                    try:
-                        client.cancel_open_orders(symbol=SYMBOL)
-                        logger.info("미체결 주문 모두 취소 완료")
-                    except Exception as e:
-                        logger.warning(f"미체결 주문 취소 실패: {e}")
-                    time.sleep(get_candle_sleep_time())
-                    continue
-
-                # 미체결 주문이 없을 때만 진입 시도
-                usdt_to_use = balance * Decimal(str(POSITION_RATIO))
-                if usdt_to_use <= 0:
-                    logger.warning(
-                        f"잔고 부족: 사용 가능 USDT={balance:.4f}, 필요 금액={balance * Decimal(str(POSITION_RATIO)):.4f}"
-                    )
-                else:
-                    # 수량 계산 및 거래소 스텝/최소수량 반영
-                    raw_qty = usdt_to_use / current_price
-                    qty_decimal = quantize_qty(raw_qty, step_size)
-                    logger.info(
-                        f"[수량 계산] 사용 USDT={usdt_to_use:.4f}, 현재가={current_price:.2f}, 계산 수량={raw_qty:.8f}, 조정 수량={qty_decimal:.8f}, 최소수량={min_qty:.8f}"
-                    )
-
-                    if qty_decimal < min_qty:
-                        logger.warning(
-                            f"[진입 불가] 계산된 수량 {qty_decimal:.8f} < 최소수량 {min_qty:.8f} → 진입 스킵"
-                        )
-                    else:
-                        # 진입 조건: 2개 캔들 연속 확인으로 노이즈 필터링
-                        long_condition = (
-                            last_candle["ema20"] > last_candle["ema60"]
-                            and prev_candle["ema20"] > prev_candle["ema60"]
-                            and last_close > last_candle["ema20"]
-                            and last_candle["rsi"] < 68)
-                        short_condition = (
-                            last_candle["ema20"] < last_candle["ema60"]
-                            and prev_candle["ema20"] < prev_candle["ema60"]
-                            and last_close < last_candle["ema20"]
-                            and last_candle["rsi"] > 32)
-
-                        if long_condition:
-                            try:
-                                # 시장가 진입
-                                new_ord = client.new_order(
-                                    symbol=SYMBOL,
-                                    side="BUY",
-                                    type="MARKET",
-                                    quantity=float(qty_decimal))
-                                logger.info(
-                                    f"LONG 진입 주문 (2캔들 연속 확인): {new_ord}")
-                                # 텔레그램 알림
-                                msg = f"🟢 <b>LONG 진입</b>\n심볼: {SYMBOL}\n수량: {qty_decimal}\n가격: {current_price:.2f}"
-                                send_telegram_message(msg)
-
-                                # 1) 트레일링 스탑 (주요 손절기구)
-                                try:
-                                    trail = client.new_order(
-                                        symbol=SYMBOL,
-                                        side="SELL",
-                                        type="TRAILING_STOP_MARKET",
-                                        quantity=float(qty_decimal),
-                                        callbackRate=float(TRAIL_RATE),
-                                        reduceOnly=True)
-                                    logger.info(
-                                        f"[LONG] 트레일링 스탑 생성 (TSM={TRAIL_RATE}%): {trail}"
-                                    )
-                                except Exception as e:
-                                    logger.warning(
-                                        f"[LONG] 트레일링 스탑 생성 실패 ({e}) → STOP_MARKET 백업 활성화"
-                                    )
-                                    # TSM 실패 → STOP_MARKET 백업 주문 즉시 생성
-                                    try:
-                                        sl_price = current_price * (
-                                            1 -
-                                            Decimal(str(abs(HARD_SL))) / 100)
-                                        sl_price = quantize_price(
-                                            sl_price, tick_size)
-                                        backup_sl = client.new_order(
-                                            symbol=SYMBOL,
-                                            side="SELL",
-                                            type="STOP_MARKET",
-                                            quantity=float(qty_decimal),
-                                            stopPrice=float(sl_price),
-                                            reduceOnly=True)
-                                        logger.info(
-                                            f"[LONG] STOP_MARKET 백업 손절 생성 (SL={sl_price:.2f}): {backup_sl}"
-                                        )
-                                    except Exception as e2:
-                                        logger.error(
-                                            f"[LONG] STOP_MARKET 백업도 실패 (메인 루프 HARD_SL 체크만 가능): {e2}"
-                                        )
-
-                                # 2) 백업 익절 (TP: +5%, TAKE_PROFIT_MARKET으로 확실한 체결)
-                                try:
-                                    tp_price = current_price * (
-                                        1 + Decimal(str(BACKUP_TP)) / 100)
-                                    tp_price = quantize_price(
-                                        tp_price, tick_size)
-                                    take_profit = client.new_order(
-                                        symbol=SYMBOL,
-                                        side="SELL",
-                                        type="TAKE_PROFIT_MARKET",
-                                        quantity=float(qty_decimal),
-                                        stopPrice=float(tp_price),
-                                        reduceOnly=True)
-                                    logger.info(
-                                        f"[LONG] 백업 익절 생성 (TP={tp_price:.2f}, TAKE_PROFIT_MARKET): {take_profit}"
-                                    )
-                                    msg = f"📈 <b>LONG 익절 설정</b> (TP: {tp_price:.2f})"
-                                    send_telegram_message(msg)
-                                except Exception as e:
-                                    logger.warning(f"[LONG] 백업 익절 생성 실패: {e}")
-                            except Exception as e:
-                                logger.error(f"LONG 진입 실패: {e}")
-
-                        elif short_condition:
-                            try:
-                                new_ord = client.new_order(
-                                    symbol=SYMBOL,
-                                    side="SELL",
-                                    type="MARKET",
-                                    quantity=float(qty_decimal))
-                                logger.info(
-                                    f"SHORT 진입 주문 (2캔들 연속 확인): {new_ord}")
-                                # 텔레그램 알림
-                                msg = f"🔴 <b>SHORT 진입</b>\n심볼: {SYMBOL}\n수량: {qty_decimal}\n가격: {current_price:.2f}"
-                                send_telegram_message(msg)
-
-                                # 1) 트레일링 스탑 (주요 손절기구)
-                                try:
-                                    trail = client.new_order(
-                                        symbol=SYMBOL,
-                                        side="BUY",
-                                        type="TRAILING_STOP_MARKET",
-                                        quantity=float(qty_decimal),
-                                        callbackRate=float(TRAIL_RATE),
-                                        reduceOnly=True)
-                                    logger.info(
-                                        f"[SHORT] 트레일링 스탑 생성 (TSM={TRAIL_RATE}%): {trail}"
-                                    )
-                                except Exception as e:
-                                    logger.warning(
-                                        f"[SHORT] 트레일링 스탑 생성 실패 ({e}) → STOP_MARKET 백업 활성화"
-                                    )
-                                    # TSM 실패 → STOP_MARKET 백업 주문 즉시 생성
-                                    try:
-                                        sl_price = current_price * (
-                                            1 +
-                                            Decimal(str(abs(HARD_SL))) / 100)
-                                        sl_price = quantize_price(
-                                            sl_price, tick_size)
-                                        backup_sl = client.new_order(
-                                            symbol=SYMBOL,
-                                            side="BUY",
-                                            type="STOP_MARKET",
-                                            quantity=float(qty_decimal),
-                                            stopPrice=float(sl_price),
-                                            reduceOnly=True)
-                                        logger.info(
-                                            f"[SHORT] STOP_MARKET 백업 손절 생성 (SL={sl_price:.2f}): {backup_sl}"
-                                        )
-                                    except Exception as e2:
-                                        logger.error(
-                                            f"[SHORT] STOP_MARKET 백업도 실패 (메인 루프 HARD_SL 체크만 가능): {e2}"
-                                        )
-
-                                # 2) 백업 익절 (TP: -5%, SHORT이므로 가격이 내려갈 때, TAKE_PROFIT_MARKET)
-                                try:
-                                    tp_price = current_price * (
-                                        1 - Decimal(str(BACKUP_TP)) / 100)
-                                    tp_price = quantize_price(
-                                        tp_price, tick_size)
-                                    take_profit = client.new_order(
-                                        symbol=SYMBOL,
-                                        side="BUY",
-                                        type="TAKE_PROFIT_MARKET",
-                                        quantity=float(qty_decimal),
-                                        stopPrice=float(tp_price),
-                                        reduceOnly=True)
-                                    logger.info(
-                                        f"[SHORT] 백업 익절 생성 (TP={tp_price:.2f}, TAKE_PROFIT_MARKET): {take_profit}"
-                                    )
-                                    msg = f"📉 <b>SHORT 익절 설정</b> (TP: {tp_price:.2f})"
-                                    send_telegram_message(msg)
-                                except Exception as e:
-                                    logger.warning(f"[SHORT] 백업 익절 생성 실패: {e}")
-                            except Exception as e:
-                                logger.error(f"SHORT 진입 실패: {e}")
-                        else:
-                            logger.info(
-                                f"[진입 조건 미충족] "
-                                f"EMA20={last_candle['ema20']:.2f}, EMA60={last_candle['ema60']:.2f}, "
-                                f"가격={last_close:.2f}, RSI={last_candle['rsi']:.2f} | "
-                                f"이전 캔들: EMA20={prev_candle['ema20']:.2f}, EMA60={prev_candle['ema60']:.2f}"
-                            )
-
-            # 루프 슬립: 다음 캔들 마감 시까지 동기화
-            sleep_time = get_candle_sleep_time()
-            logger.debug(f"다음 캔들 마감까지 {sleep_time:.1f}초 대기")
-            time.sleep(sleep_time)
+def run_cycle(client, st: SymbolState, stream, registry, account):
+    """심볼 사이클 실행 후 결과와 무관하게 상태 체크포인트 저장"""
+    try:
+        run_symbol_cycle(client, st, stream, registry, account)
+    finally:
+        checkpoint.update(st.symbol, st.to_checkpoint())
+        with STAGE_SECONDS.time(stage="checkpoint"):
+            checkpoint.save()
 
-        except Exception as e:
-            logger.exception(f"메인 루프 예외: {e}")
-            time.sleep(get_candle_sleep_time())
+
+def run_bot():
+    client = get_client()
+    if client is None:
+        return
+
+    # 서버 시각 동기화 후 주기적으로 재동기화 (VM 시계 오차 보정)
+    server_clock.client = client
+    server_clock.sync()
+    server_clock.start()
+
+    # 심볼 필터: 디스크 캐시(TTL) 우선, 이후 백그라운드에서 주기적으로 갱신
+    registry = FilterRegistry(client, FILTER_CACHE_FILE, ttl=FILTER_TTL)
+    registry.ensure()
+    registry.start()
+
+    # 체크포인트가 있으면 이어서 시작하고, 중단된 동안의 변화는 거래소와 대조
+    restored = checkpoint.load()
+    states = {}
+    for symbol in SYMBOLS:
+        saved = checkpoint.get(symbol) if restored else None
+        st = states[symbol] = setup_symbol(client, symbol, registry, saved)
+        if saved:
+            reconcile(client, st)
+        checkpoint.update(symbol, st.to_checkpoint())
+    checkpoint.save()
+
+    logger.info("봇 시작: SYMBOLS=%s, TIMEFRAME=%s, POSITION_RATIO=%.2f",
+                ",".join(SYMBOLS), TIMEFRAME, POSITION_RATIO)
+
+    # 웹소켓 kline 스트림: 전체 심볼을 연결 하나로 (실패 시 REST 폴링으로 동작)
+    stream = None
+    if MARKET_DATA_MODE == "stream":
+        stream = KlineStream(SYMBOLS, TIMEFRAME, STREAM_URL)
+        stream.start()
+
+    # 캔들 사이 HARD SL 감시 (보유 포지션이 생기면 틱마다 판정)
+    risk_monitor.client = client
+    risk_monitor.start()
+
+    # 사용자 데이터 스트림: 체결 즉시 남은 보호 주문 취소 + 계정 상태 캐시
+    account = None
+    if ACCOUNT_DATA_MODE == "stream":
+        account = AccountStream(client, SYMBOLS, STREAM_URL,
+                                resync_interval=ACCOUNT_RESYNC_INTERVAL,
+                                on_event=on_account_event)
+        account.start()
+
+    # 공용 캔들 마감 스케줄러 + 제한된 워커 풀
+    engine = TradingEngine(states,
+                           lambda st: profiler.call(run_cycle, client, st, stream,
+                                                    registry, account),
+                           next_close_in=get_candle_sleep_time,
+                           stream=stream,
+                           max_workers=MAX_WORKERS,
+                           grace=STREAM_GRACE,
+                           health=health,
+                           prewarm=(lambda: client_factory.prewarm(PREWARM_CONNECTIONS))
+                           if PREWARM_LEAD > 0 and not PAPER_KLINES else None,
+                           prewarm_lead=PREWARM_LEAD)
+    try:
+        engine.run_forever()
+    finally:
+        registry.stop()
+        server_clock.stop()
+        risk_monitor.stop()
+        if account is not None:
+            account.stop()
 
 
 # --- 봇 스레드 관리 (강건한 자동 재시작) -------------------------------------------------------
@@ -622,10 +766,15 @@ def bot_thread_wrapper():
             restart_count += 1
             logger.info(f"[스레드 관리] 봇 시작 (재시작 횟수: {restart_count})")
             run_bot()
+            # 클라이언트 생성 실패 등으로 반환 → liveness 실패로 표시하고 재시도
+            health.mark_down("봇 시작 실패 (API 클라이언트 없음)")
+            logger.warning(f"[스레드 관리] 봇 시작 실패, {retry_delay}초 후 재시작...")
+            time.sleep(retry_delay)
         except KeyboardInterrupt:
             logger.info("[스레드 관리] 사용자 중단 신호")
             break
         except Exception as e:
+            health.mark_down(f"봇 크래시: {e}")
             logger.error(f"[스레드 관리] 봇 크래시: {e}")
             logger.warning(f"[스레드 관리] {retry_delay}초 후 재시작...")
             time.sleep(retry_delay)
@@ -636,16 +785,19 @@ def bot_thread_wrapper():
 # --- 실행부 -------------------------------------------------------------------------------
 if __name__ == "__main__":
     # 봇 스레드: 강건한 자동 재시작 (daemon=False로 정상 종료 대기)
-    bot_thread = Thread(target=bot_thread_wrapper, daemon=False)
+    install_signal_handlers()
+    bot_thread = Thread(target=bot_thread_wrapper, name="bot", daemon=False)
     bot_thread.start()
     logger.info("[메인] 봇 스레드 시작")
 
-    # Flask 서버: 메인 스레드에서 실행
+    # 상태 서버: 메인 스레드에서 실행
     try:
-        logger.info("[메인] Flask 서버 시작")
+        logger.info("[메인] 상태 서버 시작")
         run_server()
     except Exception as e:
-        logger.error(f"[메인] Flask 서버 오류: {e}")
+        logger.error(f"[메인] 상태 서버 오류: {e}")
     finally:
         logger.info("[메인] 프로그램 종료")
+        # 큐에 남은 텔레그램 알림 전송 (최대 5초)
+        notifier.stop()
         # 봇 스레드가 daemon=False이므로 자동으로 대기함
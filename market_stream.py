@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""웹소켓 kline 스트림: 캔들 마감(x=true) 이벤트가 오는 즉시 전략을 깨웁니다."""
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+
+logger = logging.getLogger(__name__)
+
+
+def parse_kline_event(data: dict):
+    """kline 이벤트 → (마감 여부, 캔들 dict)"""
+    k = data["k"]
+    candle = {
+        "open_time": int(k["t"]),
+        "close_time": int(k["T"]),
+        "open": float(k["o"]),
+        "high": float(k["h"]),
+        "low": float(k["l"]),
+        "close": float(k["c"]),
+        "volume": float(k["v"]),
+        "quote_volume": float(k["q"]),
+        "trades": int(k["n"]),
+        "taker_buy_base": float(k["V"]),
+        "taker_buy_quote": float(k["Q"]),
+    }
+    return bool(k.get("x")), candle
+
+
+class KlineStream:
+    """
+    여러 심볼의 <symbol>@kline_<interval> 을 연결 하나로 구독합니다.
+    마감 캔들은 심볼별 큐에 쌓고, 진행 중 캔들의 종가는 last_price[심볼] 로 보관합니다.
+    연결이 끊기면 connected=False → 호출측은 REST 경로로 대체합니다.
+    """
+
+    def __init__(self, symbols, interval: str, stream_url: str):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.stream_url = stream_url
+        self.connected = False
+        self.last_price = {}
+        self.last_event_time = None
+        self._client = None
+        self._closed = {s: deque(maxlen=1000) for s in self.symbols}
+        self._cond = threading.Condition()
+
+    # --- 연결 관리 ---
+    def start(self) -> bool:
+        try:
+            self._client = UMFuturesWebsocketClient(
+                stream_url=self.stream_url,
+                on_message=self._on_message,
+                on_close=self._on_close,
+                on_error=self._on_error)
+            self._client.subscribe(
+                [f"{s.lower()}@kline_{self.interval}" for s in self.symbols])
+            self.connected = True
+            logger.info(
+                f"[스트림] kline 구독 시작: {','.join(self.symbols)} {self.interval} ({self.stream_url})")
+        except Exception as e:
+            self.connected = False
+            logger.warning(f"[스트림] 연결 실패 (REST 경로 사용): {e}")
+        return self.connected
+
+    def reconnect(self) -> bool:
+        self.stop()
+        return self.start()
+
+    def stop(self):
+        client, self._client = self._client, None
+        was_connected, self.connected = self.connected, False
+        if client is not None and was_connected:
+            try:
+                client.stop()
+            except Exception as e:
+                logger.debug(f"[스트림] 종료 중 오류: {e}")
+
+    def _on_close(self, _):
+        logger.warning("[스트림] 연결 종료 → REST 경로로 대체")
+        self._disconnected()
+
+    def _on_error(self, _, error):
+        logger.warning(f"[스트림] 오류 → REST 경로로 대체: {error}")
+        self._disconnected()
+
+    def _disconnected(self):
+        self.connected = False
+        with self._cond:
+            self._cond.notify_all()
+
+    # --- 메시지 처리 ---
+    def _on_message(self, _, message):
+        data = json.loads(message)
+        if not isinstance(data, dict) or data.get("e") != "kline":
+            return  # 구독 응답 등
+        symbol = data.get("s")
+        if symbol not in self._closed:
+            return
+        is_final, candle = parse_kline_event(data)
+        self.last_price[symbol] = candle["close"]
+        self.last_event_time = time.time()
+        if is_final:
+            with self._cond:
+                self._closed[symbol].append(candle)
+                self._cond.notify_all()
+
+    def wait_closed(self, timeout: float, symbols=None) -> set:
+        """
+        symbols 중 하나라도 마감 캔들이 도착할 때까지 대기 (꺼내지는 않음).
+        마감 캔들이 쌓여 있는 심볼 집합을 반환
+        """
+        symbols = self.symbols if symbols is None else symbols
+
+        def ready():
+            return {s for s in symbols if self._closed[s]}
+
+        with self._cond:
+            self._cond.wait_for(lambda: ready() or not self.connected,
+                                timeout=timeout)
+            return ready()
+
+    def drain(self, symbol: str) -> list:
+        """심볼의 쌓여 있는 마감 캔들을 모두 꺼냄 (오래된 순)"""
+        with self._cond:
+            candles = list(self._closed[symbol])
+            self._closed[symbol].clear()
+        return candles
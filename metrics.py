@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+경량 지표 수집 (Prometheus 텍스트 형식 출력)
+
+Histogram 은 누적 버킷(Prometheus histogram)과 함께 최근 window 개 표본을 보관해
+p50 / p99 를 summary 형식(<이름>_recent{quantile=...})으로도 내보냅니다.
+observe / inc 는 잠금 + 리스트 갱신뿐이라 사이클 경로에서 호출해도 부담이 없습니다.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.99)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _fmt(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # 라벨 없는 카운터는 처음부터 0 으로 노출
+        self._values = {} if self.labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}")
+        return lines
+
+
+class _Series:
+    __slots__ = ("counts", "total", "count", "recent")
+
+    def __init__(self, n_buckets, window):
+        self.counts = [0] * (n_buckets + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+                 window: int = 1024):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.window = window
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets), self.window)
+            series.counts[bisect_left(self.buckets, value)] += 1
+            series.total += value
+            series.count += 1
+            series.recent.append(value)
+
+    @contextmanager
+    def time(self, **labels):
+        """with 블록 소요 시간(초)을 기록 (예외가 나도 기록)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels):
+        """최근 window 개 표본의 q 분위수 (표본 없으면 None)"""
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        if series is None:
+            return None
+        with self._lock:
+            values = sorted(series.recent)
+        return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        recent = [f"# HELP {self.name}_recent {self.help} (최근 {self.window}개 기준 분위수)",
+                  f"# TYPE {self.name}_recent summary"]
+        with self._lock:
+            items = sorted((key, list(s.counts), s.total, s.count, sorted(s.recent))
+                           for key, s in self._series.items())
+        names = self.labelnames + ("le",)
+        for key, counts, total, count, values in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_fmt(bound),))} "
+                             f"{cumulative}")
+            label = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{label} {_fmt(total)}")
+            lines.append(f"{self.name}_count{label} {count}")
+            for q in QUANTILES:
+                value = values[min(len(values) - 1, int(q * len(values)))]
+                recent.append(f"{self.name}_recent"
+                              f"{_labels(self.labelnames + ('quantile',), key + (q,))} "
+                              f"{_fmt(value)}")
+            recent.append(f"{self.name}_recent_sum{label} {_fmt(sum(values))}")
+            recent.append(f"{self.name}_recent_count{label} {len(values)}")
+        return lines + recent
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# --- 봇 지표 ------------------------------------------------------------------------------
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "bot_stage_seconds", "사이클 단계별 소요 시간(초)", ("stage",)))
+CLOSE_TO_ACK_SECONDS = REGISTRY.register(Histogram(
+    "bot_close_to_ack_seconds", "캔들 마감부터 진입 주문 응답까지(초)", (),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)))
+API_ERRORS = REGISTRY.register(Counter(
+    "bot_api_errors_total", "거래소 API 호출 오류 수", ("call",)))
+ORDER_RETRIES = REGISTRY.register(Counter(
+    "bot_order_retries_total", "보호 주문 재전송 수", ("order",)))
+CYCLES = REGISTRY.register(Counter(
+    "bot_cycles_total", "심볼 사이클 실행 수", ("symbol", "result")))
+RATE_LIMIT_DELAYED = REGISTRY.register(Counter(
+    "bot_rate_limit_delayed_total", "요청 예산 부족으로 대기 / 연기된 호출 수", ("priority", "result")))
+RATE_LIMIT_HITS = REGISTRY.register(Counter(
+    "bot_rate_limit_hits_total", "429 / 418 응답 수", ("status",)))
+LOG_DROPPED = REGISTRY.register(Counter(
+    "bot_log_records_dropped_total", "로그 큐 포화로 버린 레코드 수"))
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+텔레그램 알림 서비스
+
+봇 클라이언트(연결 풀) 하나와 전용 워커 스레드 하나로 모든 알림을 보냅니다.
+거래 스레드는 제한된 큐에 넣기만 하고 바로 돌아가며(큐가 가득 차면 버리고 집계),
+워커는 짧은 시간 안에 몰린 메시지를 한 건으로 합쳐 전송 간격 제한과
+재시도(RetryAfter / 네트워크 오류 백오프)를 적용합니다.
+"""
+import asyncio
+import logging
+import queue
+import re
+import threading
+import time
+from datetime import timedelta
+
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, InvalidToken, RetryAfter, TelegramError
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096  # 텔레그램 메시지 최대 길이
+SEPARATOR = "\n\n"
+_HTML_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+
+
+def truncate_html(text: str, limit: int) -> str:
+    """
+    HTML 모드 메시지를 limit 글자 이하로 자름. 잘린 태그 / 엔티티(&amp; 등)는 빼고
+    열려 있는 태그는 닫아서, 텔레그램이 파싱 오류(400)로 전체를 거절하지 않게 합니다.
+    """
+    if len(text) <= limit:
+        return text
+    cut = limit
+    while True:
+        head = text[:cut]
+        lt = head.rfind("<")
+        if lt > head.rfind(">"):
+            head = head[:lt]
+        amp = head.rfind("&")
+        if amp > head.rfind(";"):
+            head = head[:amp]
+        open_tags = []
+        for m in _HTML_TAG.finditer(head):
+            name = m.group(2).lower()
+            if not m.group(1):
+                open_tags.append(name)
+            elif name in open_tags:
+                del open_tags[len(open_tags) - 1 - open_tags[::-1].index(name)]
+        closing = "".join(f"</{name}>" for name in reversed(open_tags))
+        if len(head) + len(closing) <= limit:
+            return head + closing
+        cut = min(len(head), limit - len(closing))
+        if cut <= 0:
+            return ""
+
+
+def pack_messages(messages, limit: int = MAX_MESSAGE_LENGTH, html: bool = True) -> list:
+    """메시지들을 limit 글자 이하 묶음으로 합침 (단독으로 긴 메시지는 잘라냄, html 이면 태그 보존)"""
+    batches, current = [], ""
+    for message in messages:
+        message = truncate_html(message, limit) if html else message[:limit]
+        if current and len(current) + len(SEPARATOR) + len(message) > limit:
+            batches.append(current)
+            current = ""
+        current = f"{current}{SEPARATOR}{message}" if current else message
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TelegramNotifier:
+    """
+    send() 는 큐에 넣기만 하는 논블로킹 호출입니다. 첫 호출 시 워커를 시작합니다.
+    stats: queued / sent(전송 묶음 수) / coalesced(합쳐 보낸 메시지 수) / dropped / retries
+    """
+
+    def __init__(self, token: str, chat_id: str, maxsize: int = 100,
+                 coalesce_window: float = 1.0, min_interval: float = 1.0,
+                 max_retries: int = 5, max_backoff: float = 60.0, parse_mode="HTML"):
+        self.token = token
+        self.chat_id = chat_id
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.parse_mode = parse_mode
+        self.stats = dict.fromkeys(("queued", "sent", "coalesced", "dropped", "retries"), 0)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._last_sent = 0.0
+        self._dropped_reported = 0
+        self._initialized = False
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token and self.chat_id)
+
+    def send(self, message: str) -> bool:
+        if not self.enabled or self._stopping:
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """남은 메시지를 보낼 시간을 timeout 초까지 주고 워커 종료"""
+        self._stopping = True
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    # --- 워커 ---
+    def _collect(self):
+        """첫 메시지를 기다린 뒤 coalesce_window 동안 더 모아서 반환. 종료 신호면 None"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        messages = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                message = self._queue.get(timeout=remaining) if remaining > 0 \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                return messages
+            if message is None:
+                self._queue.put_nowait(None)  # 이번 묶음을 보낸 뒤 종료
+                return messages
+            messages.append(message)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        bot = Bot(token=self.token,
+                  request=HTTPXRequest(connection_pool_size=2, read_timeout=10.0))
+        try:
+            while True:
+                messages = self._collect()
+                if messages is None:
+                    return
+                dropped = self.stats["dropped"] - self._dropped_reported
+                if dropped:
+                    messages.append(f"⚠️ 이전 알림 {dropped}건 누락 (큐 포화 또는 전송 실패)")
+                    self._dropped_reported += dropped
+                for text in pack_messages(messages, html=self.parse_mode == "HTML"):
+                    self._deliver(loop, bot, text)
+                self.stats["coalesced"] += len(messages)
+        finally:
+            try:
+                if self._initialized:
+                    loop.run_until_complete(bot.shutdown())
+            except Exception as e:
+                logger.debug(f"[텔레그램] 종료 중 오류: {e}")
+            loop.close()
+
+    def _deliver(self, loop, bot, text: str):
+        """전송 간격 제한 + 재시도. 끝내 실패하면 dropped 로 집계"""
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                if not self._initialized:
+                    # 최초 전송 시 초기화 (실패하면 전송 실패와 같이 재시도)
+                    loop.run_until_complete(bot.initialize())
+                    self._initialized = True
+                loop.run_until_complete(bot.send_message(chat_id=self.chat_id, text=text,
+                                                         parse_mode=self.parse_mode))
+                self._last_sent = time.monotonic()
+                self.stats["sent"] += 1
+                return
+            except RetryAfter as e:
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                logger.warning(f"[텔레그램] 전송 제한 → {delay}초 후 재시도")
+                time.sleep(delay)
+            except (BadRequest, Forbidden, InvalidToken) as e:
+                logger.warning(f"[텔레그램] 메시지 전송 실패 (재시도 안 함): {e}")
+                break
+            except TelegramError as e:
+                if attempt == self.max_retries:
+                    logger.warning(f"[텔레그램] 메시지 전송 실패: {e}")
+                    break
+                logger.debug(f"[텔레그램] 전송 오류 → {backoff:.0f}초 후 재시도: {e}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception as e:
+                logger.warning(f"[텔레그램] 예상치 못한 오류: {e}")
+                break
+            self.stats["retries"] += 1
+        self.stats["dropped"] += 1
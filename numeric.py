@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+거래소 tick / step 격자 기반 고정소수점 수치 계층
+
+가격 / 잔고 / 손익률은 float 로 계산하고, 주문 수량과 주문 가격은 격자 위 정수 칸 수로 다룹니다.
+10진 문자열 ↔ 정수 변환은 거래소 경계(필터 파싱, 주문 파라미터)에서 한 번만 하므로
+판단 루프에는 Decimal 생성 / 나눗셈이 없습니다. 내림은 (값 / 칸).내림 * 칸 과 같은 결과입니다.
+"""
+import math
+from decimal import Decimal
+
+# float 나눗셈 오차 보정 (예: 0.3 / 0.1 = 2.9999999999999996 → 3 칸). 칸 수 크기에 비례하는
+# 상대 허용치(수 ulp)라서 칸 수가 1e8 을 넘어도 격자 위 값을 한 칸 낮게 내리지 않고,
+# 격자보다 조금이라도 작은 값을 다음 칸으로 올리지 않음
+_REL_TOLERANCE = 1e-15
+
+
+class Grid:
+    """step 간격 격자. 값 = 칸 수(int) * step"""
+
+    __slots__ = ("step", "decimals", "_units")
+
+    def __init__(self, step):
+        step = Decimal(str(step)).normalize()
+        if step <= 0:
+            raise ValueError(f"격자 간격은 0보다 커야 합니다: {step}")
+        self.decimals = max(0, -step.as_tuple().exponent)
+        self._units = int(step.scaleb(self.decimals))  # step 을 10^-decimals 단위 정수로
+        self.step = float(step)
+
+    def floor(self, value: float) -> int:
+        """value 이하의 최대 격자 칸 수 (음수 / 0 이하 값은 0)"""
+        if value <= 0:
+            return 0
+        q = value / self.step
+        n = round(q)
+        if abs(q - n) <= _REL_TOLERANCE * max(1.0, q):
+            return n
+        return math.floor(q)
+
+    def parse(self, text) -> int:
+        """거래소 10진 문자열 → 칸 수 (정확, 격자에 맞지 않으면 내림)"""
+        scaled = Decimal(str(text)).scaleb(self.decimals)
+        return int(scaled) // self._units
+
+    def to_float(self, n: int) -> float:
+        return round(n * self._units / 10 ** self.decimals, self.decimals)
+
+    def format(self, n: int) -> str:
+        """칸 수 → 주문 파라미터용 10진 문자열 (지수 표기 없이, 정확히)"""
+        digits = str(abs(n * self._units)).rjust(self.decimals + 1, "0")
+        sign = "-" if n < 0 else ""
+        if not self.decimals:
+            return sign + digits
+        return f"{sign}{digits[:-self.decimals]}.{digits[-self.decimals:]}"
+
+    def __repr__(self):
+        return f"Grid({self.format(1)})"
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+NumPy 기반 고정 용량 OHLCV 링 버퍼
+
+타입이 정해진 레코드 배열(open_time / close_time / trades 는 int64, 나머지 float64)에 마감 캔들을 제자리로 추가합니다.
+배열을 용량의 2배로 잡고 끝에 닿을 때만 최근 행을 앞으로 옮기므로(약 capacity 번 추가마다 1회)
+최근 n 행은 항상 연속 구간 → column() 이 복사 없는 뷰를 돌려주고, 인디케이터는 뷰 위에서 바로 계산합니다.
+"""
+import numpy as np
+
+# 컬럼 (REST kline 배열 순서, ignore 제외) — 저장소 테이블과 같은 순서
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume", "close_time",
+           "quote_volume", "trades", "taker_buy_base", "taker_buy_quote")
+_INT_COLUMNS = frozenset({"open_time", "close_time", "trades"})
+DTYPE = np.dtype([(name, np.int64 if name in _INT_COLUMNS else np.float64) for name in COLUMNS])
+
+
+class OHLCVRing:
+    """최근 capacity 개 캔들. 행은 COLUMNS 순서의 튜플로 추가 / 조회합니다."""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._data = np.zeros(2 * capacity, dtype=DTYPE)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def append(self, row):
+        if self._end == len(self._data):
+            self._compact(1)
+        self._data[self._end] = tuple(row)
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def extend(self, rows):
+        """여러 행을 한 번에 변환해 추가 (용량을 넘는 앞부분은 버림)"""
+        rows = [tuple(row) for row in rows][-self.capacity:]
+        n = len(rows)
+        if not n:
+            return
+        if self._end + n > len(self._data):
+            self._compact(n)
+        self._data[self._end:self._end + n] = np.array(rows, dtype=DTYPE)
+        self._end += n
+        self._start = max(self._start, self._end - self.capacity)
+
+    def _compact(self, room: int):
+        """최근 행을 앞으로 옮겨 room 행 자리 확보"""
+        keep = min(len(self), self.capacity - room)
+        self._data[:keep] = self._data[self._end - keep:self._end]
+        self._start, self._end = 0, keep
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """컬럼의 최근 n 행(기본 전체) 읽기 전용 뷰 (복사 없음, 오래된 순)"""
+        start = self._start if n is None else max(self._start, self._end - n)
+        view = self._data[name][start:self._end]
+        view.flags.writeable = False
+        return view
+
+    def row(self, i: int = -1) -> tuple:
+        """i 번째 행 (음수는 끝에서부터) → 파이썬 값 튜플"""
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError("캔들 인덱스 범위 초과")
+        return self._data[(self._end + i) if i < 0 else (self._start + i)].item()
+
+    @property
+    def last_open_time(self):
+        return int(self._data["open_time"][self._end - 1]) if len(self) else None
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
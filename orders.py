@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+주문 제출 계층: 진입 후 보호 주문(트레일링 스탑 / 백업 손절 / 백업 익절)을
+배치 요청(POST /fapi/v1/batchOrders) 한 번으로 보내고, 실패한 leg 만 재시도합니다.
+
+leg 마다 고정 newClientOrderId 를 붙여, 배치 응답을 못 받았을 때(읽기 시간 초과 등)는
+미체결 주문에서 그 ID 를 찾아 이미 접수된 leg 를 확인한 뒤 나머지만 다시 보냅니다
+(같은 ID 재전송은 거래소가 -4116 으로 거절 → 중복 보호 주문 없음).
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Optional
+
+from binance.error import ClientError
+
+from metrics import API_ERRORS, ORDER_RETRIES
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_ORDERS = 5  # USDⓈ-M batchOrders 최대 주문 수
+DUPLICATE_CLIENT_ID = -4116  # 같은 newClientOrderId 의 미체결 주문이 이미 있음
+
+
+def new_client_order_id() -> str:
+    """거래소 형식(^[.A-Z:/a-z0-9_-]{1,36}$)의 주문 ID"""
+    return f"bot-{uuid.uuid4().hex[:24]}"
+
+
+@dataclass
+class OrderLeg:
+    """
+    배치의 주문 1건. 거절되면 fallback 이 있으면 같은 시도 안에서 그 주문으로 대체.
+    uncertain: 접수 여부를 확인하지 못함 → 대체하지 않고 같은 ID 로 재전송
+    """
+    name: str
+    params: dict
+    fallback: Optional["OrderLeg"] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    uncertain: bool = False
+    history: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.params.setdefault("newClientOrderId", new_client_order_id())
+
+    @property
+    def client_order_id(self) -> str:
+        return self.params["newClientOrderId"]
+
+    @property
+    def ok(self) -> bool:
+        return self.result is not None
+
+
+def _fmt(value) -> str:
+    """배치 주문 파라미터는 문자열 (Decimal 은 지수 표기 없이)"""
+    if isinstance(value, Decimal):
+        return format(value.normalize(), "f")
+    return str(value)
+
+
+def protective_legs(symbol: str, side: str, qty: Decimal, trail_rate: float,
+                    sl_price: Decimal, tp_price: Decimal) -> list:
+    """
+    side(LONG/SHORT) 포지션의 보호 주문 leg 목록.
+    1) 트레일링 스탑 (실패 시 STOP_MARKET 백업 손절로 대체) 2) 백업 익절
+    """
+    close_side = "SELL" if side == "LONG" else "BUY"
+    base = {"symbol": symbol, "side": close_side, "quantity": _fmt(qty),
+            "reduceOnly": "true"}
+    stop_loss = OrderLeg("STOP_MARKET",
+                         dict(base, type="STOP_MARKET", stopPrice=_fmt(sl_price)))
+    trailing = OrderLeg("TRAILING_STOP_MARKET",
+                        dict(base, type="TRAILING_STOP_MARKET",
+                             callbackRate=_fmt(trail_rate)),
+                        fallback=stop_loss)
+    take_profit = OrderLeg("TAKE_PROFIT_MARKET",
+                           dict(base, type="TAKE_PROFIT_MARKET",
+                                stopPrice=_fmt(tp_price)))
+    return [trailing, take_profit]
+
+
+def _send_batch(client, legs) -> list:
+    """legs 를 배치로 전송하고 leg 별 (결과, 오류, 접수 여부 불명) 목록 반환"""
+    try:
+        resp = client.new_batch_order(batchOrders=[leg.params for leg in legs])
+    except ClientError as e:
+        # 요청 자체가 거절됨 (접수된 leg 없음)
+        return [(None, str(e), False)] * len(legs)
+    except Exception as e:
+        # 응답 유실 / 5xx: 거래소가 이미 접수했을 수 있음
+        return [(None, str(e), True)] * len(legs)
+    if not isinstance(resp, list) or len(resp) != len(legs):
+        return [(None, f"unexpected batch response: {resp}", True)] * len(legs)
+    out = []
+    for item in resp:
+        if isinstance(item, dict) and "orderId" in item:
+            out.append((item, None, False))
+        else:
+            duplicate = isinstance(item, dict) and item.get("code") == DUPLICATE_CLIENT_ID
+            out.append((None, str(item), duplicate))
+    return out
+
+
+def _open_orders_by_client_id(client, legs, log) -> Optional[dict]:
+    """legs 심볼의 미체결 주문 {clientOrderId: 주문}, 조회 실패 시 None"""
+    found = {}
+    for symbol in {leg.params["symbol"] for leg in legs}:
+        try:
+            orders = client.get_orders(symbol=symbol)
+        except Exception as e:
+            API_ERRORS.inc(call="get_orders")
+            log.warning(f"[주문] 접수 확인용 미체결 주문 조회 실패: {e}")
+            return None
+        found.update((o.get("clientOrderId"), o) for o in orders)
+    return found
+
+
+def _reconcile(client, legs, log):
+    """접수 여부 불명인 leg 를 미체결 주문과 대조 (있으면 성공 처리, 확인 못 하면 uncertain)"""
+    found = _open_orders_by_client_id(client, legs, log)
+    for leg in legs:
+        order = found.get(leg.client_order_id) if found is not None else None
+        if order is not None:
+            log.info(f"[주문] {leg.name} 응답 유실, 미체결 주문에서 접수 확인 ({order.get('orderId')})")
+            leg.result, leg.error = order, None
+            leg.history[-1] = "reconciled"
+        leg.uncertain = order is None and found is None
+
+
+def _submit(client, final, indices, attempt, log):
+    """final[i] (i ∈ indices) 를 배치 한도씩 전송하고 결과 기록"""
+    for start in range(0, len(indices), MAX_BATCH_ORDERS):
+        chunk = indices[start:start + MAX_BATCH_ORDERS]
+        results = _send_batch(client, [final[i] for i in chunk])
+        unknown = []
+        for i, (result, error, maybe_sent) in zip(chunk, results):
+            leg = final[i]
+            if attempt > 1:
+                ORDER_RETRIES.inc(order=leg.name)
+            if error is not None:
+                API_ERRORS.inc(call="batch_order")
+            leg.attempts += 1
+            leg.result, leg.error = result, error
+            leg.uncertain = False
+            leg.history.append(error or "ok")
+            if maybe_sent:
+                unknown.append(leg)
+        if unknown:
+            _reconcile(client, unknown, log)
+
+
+def submit_batch(client, legs, max_attempts: int = 3, log=logger) -> list:
+    """
+    legs 를 배치로 제출. 실패한 leg 만 다시 보내고, 거절된 leg 에 fallback 이 있으면
+    같은 시도 안에서 대체 주문을 바로 보냅니다 (max_attempts=1 이어도 손절 주문이 남도록).
+    반환값은 최종 leg 목록 (fallback 으로 대체된 경우 대체 leg) — 각 leg.ok / error 확인.
+    """
+    final = list(legs)
+    todo = list(range(len(final)))
+    for attempt in range(1, max(1, max_attempts) + 1):
+        if not todo:
+            break
+        send = todo
+        while send:
+            _submit(client, final, send, attempt, log)
+            send = []
+            for i in todo:
+                leg = final[i]
+                if not leg.ok and leg.fallback is not None and not leg.uncertain:
+                    log.warning(f"[주문] {leg.name} 실패 ({leg.error}) → {leg.fallback.name} 로 대체")
+                    final[i] = leg.fallback
+                    send.append(i)
+        todo = [i for i in todo if not final[i].ok]
+        if attempt < max_attempts:
+            for i in todo:
+                leg = final[i]
+                log.warning(f"[주문] {leg.name} 실패 ({leg.error}) → 재시도 {attempt}/{max_attempts - 1}")
+    return final
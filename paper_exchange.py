@@ -0,0 +1,518 @@
+# -*- coding: utf-8 -*-
+"""
+모의 거래소 (paper trading / 오프라인 부하 테스트용 UMFutures 대역)
+
+봇이 쓰는 REST 메서드(klines, account, get_position_risk, get_orders, new_order,
+new_batch_order, cancel_open_orders 등)를 같은 이름 / 같은 응답 형식으로 프로세스 안에서 처리합니다.
+기록된 REST klines 를 현재 시각에 맞춰 옮겨 재생하며, 캔들이 마감될 때마다 그 캔들의
+가격 경로(시가 → 저가/고가 → 종가)로 STOP_MARKET / TAKE_PROFIT_MARKET / TRAILING_STOP_MARKET 을 체결합니다.
+MARKET 주문은 진행 중 캔들의 시가로 즉시 체결됩니다(진행 중 캔들은 시가 하나로만 보임).
+호출마다 지연(latency + jitter)과 오류(error_rate, fail_next)를 주입할 수 있습니다.
+
+봇: PAPER_KLINES=klines.json TIMEFRAME=1m python main.py
+"""
+import functools
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from binance.error import ClientError, ParameterRequiredError
+
+from candle_store import INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+STOP_TYPES = ("STOP_MARKET", "TAKE_PROFIT_MARKET", "TRAILING_STOP_MARKET")
+DEFAULT_FILTERS = {"tickSize": "0.1", "stepSize": "0.001", "minQty": "0.001", "notional": "100"}
+
+
+def _reject(code: int, message: str, status: int = 400):
+    return ClientError(status, code, message, {})
+
+
+def injected_error():
+    """주입 오류 기본값 (거래소 내부 오류 / 일시 장애)"""
+    return _reject(-1001, "Internal error; unable to process your request. Please try again.", 503)
+
+
+def _num(value: float) -> str:
+    """응답 숫자 문자열 (지수 표기 없이)"""
+    text = f"{value:.8f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def _endpoint(func):
+    """지연 / 오류 주입 후 거래소 상태 잠금 안에서 실행 (경과한 캔들의 체결을 먼저 처리)"""
+    @functools.wraps(func)
+    def call(self, *args, **kwargs):
+        self._before_call(func.__name__)
+        with self._lock:
+            self._catch_up()
+            return func(self, *args, **kwargs)
+    return call
+
+
+@dataclass
+class _Market:
+    """심볼 1개의 기록 캔들 재생 위치와 포지션 (one-way 모드)"""
+    symbol: str
+    klines: list  # 현재 시각 기준으로 옮긴 REST kline 배열
+    interval: int
+    cursor: int  # 진행 중 캔들 인덱스 (이전 캔들은 마감)
+    filters: dict
+    amt: float = 0.0  # 부호 있는 포지션 수량
+    entry: float = 0.0
+    leverage: int = 20
+    margin_type: str = "CROSSED"
+    orders: dict = field(default_factory=dict)  # orderId → 미체결 주문 dict
+    exhausted: bool = False
+
+    @property
+    def price(self) -> float:
+        """현재가 = 진행 중 캔들 시가 (기록이 끝났으면 마지막 종가)"""
+        if self.cursor < len(self.klines):
+            return float(self.klines[self.cursor][1])
+        return float(self.klines[-1][4])
+
+
+class PaperExchange:
+    """
+    klines: {심볼: REST klines 리스트}. history 개 캔들이 시작 시점에 이미 마감된 상태로 보이도록
+    시각을 옮기며, 이후 캔들은 실제 시간(now)에 맞춰 마감됩니다.
+    now: 거래소 시각(ms) 함수 (기본 벽시계, 테스트에서는 가상 시계로 직접 진행).
+    latency / jitter: 호출마다 지연 (초). error_rate: 호출이 injected_error() 로 실패할 확률.
+    """
+
+    def __init__(self, klines: dict, balance: float = 10000.0, history: int = 500,
+                 fee_rate: float = 0.0004, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, filters: dict = None, now=None, seed=None):
+        self._now = now or (lambda: time.time() * 1000)
+        self.balance = balance
+        self.fee_rate = fee_rate
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = Counter()
+        self.trades = []
+        self.fees = 0.0
+        self.realized = 0.0
+        self._rng = random.Random(seed)
+        self._failures = {}
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._markets = {}
+        now_ms = int(self._now())
+        for symbol, rows in klines.items():
+            rows = [list(k) for k in rows]
+            if len(rows) < 2:
+                raise ValueError(f"{symbol}: 기록 캔들이 2개 이상 필요합니다")
+            interval = int(rows[1][0]) - int(rows[0][0])
+            cursor = min(history, len(rows) - 1)
+            shift = now_ms // interval * interval - int(rows[cursor][0])
+            for k in rows:
+                k[0], k[6] = int(k[0]) + shift, int(k[6]) + shift
+            self._markets[symbol] = _Market(symbol, rows, interval, cursor,
+                                            dict(DEFAULT_FILTERS, **(filters or {}).get(symbol, {})))
+
+    @classmethod
+    def from_file(cls, path: str, symbols, **kwargs):
+        """
+        JSON 파일: REST klines 리스트(모든 심볼에 같은 캔들) 또는 {심볼: klines}.
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            missing = [s for s in symbols if s not in data]
+            if missing:
+                raise ValueError(f"기록 캔들 없는 심볼: {', '.join(missing)}")
+            klines = {s: data[s] for s in symbols}
+        else:
+            klines = {s: data for s in symbols}
+        return cls(klines, **kwargs)
+
+    # --- 오류 / 지연 주입 ---
+    def fail_next(self, name: str, error=None, times: int = 1):
+        """
+        다음 times 번의 name 호출을 실패시킴. name 은 메서드 이름(new_order 등) 또는
+        주문 유형(TRAILING_STOP_MARKET 등, 배치 주문에서는 해당 leg 만 실패)
+        """
+        with self._lock:
+            self._failures.setdefault(name, []).extend([error or injected_error()] * times)
+
+    def _take_failure(self, name: str):
+        queue = self._failures.get(name)
+        if queue:
+            raise queue.pop(0)
+
+    def _before_call(self, name: str):
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.calls[name] += 1
+            self._take_failure(name)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                raise injected_error()
+
+    # --- 캔들 재생 / 체결 엔진 ---
+    def _market(self, symbol) -> _Market:
+        market = self._markets.get(symbol)
+        if market is None:
+            raise _reject(-1121, "Invalid symbol.")
+        return market
+
+    def _catch_up(self):
+        """현재 시각까지 마감된 캔들마다 조건부 주문 체결 판정"""
+        now = self._now()
+        for market in self._markets.values():
+            while market.cursor < len(market.klines) and market.klines[market.cursor][6] < now:
+                self._match(market, market.klines[market.cursor])
+                market.cursor += 1
+            if market.cursor >= len(market.klines) and not market.exhausted:
+                market.exhausted = True
+                logger.warning(f"[모의 거래소] {market.symbol} 기록 캔들 소진 → 마지막 종가로 고정")
+
+    def _match(self, market: _Market, kline):
+        o, h, lo, c = (float(v) for v in kline[1:5])
+        # 캔들 안 가격 경로: 양봉은 시가 → 저가 → 고가 → 종가, 음봉은 시가 → 고가 → 저가 → 종가
+        path = (o, lo, h, c) if c >= o else (o, h, lo, c)
+        for a, b in zip(path, path[1:]):
+            for order in list(market.orders.values()):
+                if order["orderId"] not in market.orders:
+                    continue  # 같은 구간에서 앞선 체결로 취소 / 만료됨
+                price = self._trigger(order, a, b)
+                if price is not None:
+                    self._fill(market, order, price, kline[6])
+
+    @staticmethod
+    def _cross(level: float, up: bool, a: float, b: float):
+        """a → b 로 움직이는 동안 level 에 닿으면 체결가 (처음부터 넘어 있으면 a, 갭)"""
+        if up:
+            return a if a >= level else (level if b >= level else None)
+        return a if a <= level else (level if b <= level else None)
+
+    def _trigger(self, order: dict, a: float, b: float):
+        sell = order["side"] == "SELL"
+        if order["type"] != "TRAILING_STOP_MARKET":
+            # STOP 은 불리한 방향(SELL=하락), TAKE_PROFIT 은 유리한 방향으로 발동
+            up = (order["type"] == "STOP_MARKET") != sell
+            return self._cross(float(order["stopPrice"]), up, a, b)
+        if order["_extreme"] is None:
+            # 활성화 가격 도달 전 (SELL 은 상승으로, BUY 는 하락으로 활성화)
+            if self._cross(order["_activate"], sell, a, b) is None:
+                return None
+            order["_extreme"] = order["_activate"]
+            a = order["_activate"]
+        rate = float(order["priceRate"]) / 100
+        if sell:
+            if b >= a:
+                order["_extreme"] = max(order["_extreme"], b)
+                return None
+            return self._cross(order["_extreme"] * (1 - rate), False, a, b)
+        if b <= a:
+            order["_extreme"] = min(order["_extreme"], b)
+            return None
+        return self._cross(order["_extreme"] * (1 + rate), True, a, b)
+
+    def _fill(self, market: _Market, order: dict, price: float, when: int):
+        market.orders.pop(order["orderId"], None)
+        qty = abs(market.amt) if order["closePosition"] else float(order["origQty"])
+        closing = (market.amt > 0) == (order["side"] == "SELL") and market.amt != 0
+        if order["reduceOnly"] or order["closePosition"]:
+            qty = min(qty, abs(market.amt)) if closing else 0.0
+        if qty <= 0:
+            order["status"] = "EXPIRED"  # 줄일 포지션 없음
+            return
+        self._trade(market, order["side"], qty, price)
+        order.update(status="FILLED", executedQty=_num(qty), avgPrice=_num(price),
+                     cumQuote=_num(qty * price), updateTime=int(when))
+
+    def _trade(self, market: _Market, side: str, qty: float, price: float):
+        signed = qty if side == "BUY" else -qty
+        amt = market.amt
+        realized = 0.0
+        if amt == 0 or (amt > 0) == (signed > 0):
+            market.entry = (market.entry * abs(amt) + price * qty) / (abs(amt) + qty)
+        else:
+            closed = min(qty, abs(amt))
+            realized = closed * (price - market.entry) * (1 if amt > 0 else -1)
+            if qty > abs(amt):
+                market.entry = price  # 반대 포지션으로 전환
+        market.amt = round(amt + signed, 12)
+        if market.amt == 0:
+            market.entry = 0.0
+        fee = price * qty * self.fee_rate
+        self.balance += realized - fee
+        self.realized += realized
+        self.fees += fee
+        self.trades.append({"symbol": market.symbol, "side": side, "qty": qty, "price": price,
+                            "realized": realized, "fee": fee, "time": int(self._now())})
+
+    # --- 계정 계산 ---
+    def _unrealized(self, market: _Market) -> float:
+        return market.amt * (market.price - market.entry) if market.amt else 0.0
+
+    def _available(self) -> float:
+        used = sum(abs(m.amt) * m.entry / m.leverage for m in self._markets.values())
+        pnl = sum(self._unrealized(m) for m in self._markets.values())
+        return self.balance + pnl - used
+
+    # --- 주문 ---
+    def _place(self, symbol=None, side=None, type=None, quantity=None, reduceOnly=None,
+               closePosition=None, stopPrice=None, callbackRate=None, activationPrice=None,
+               newClientOrderId=None, **kwargs) -> dict:
+        market = self._market(symbol)
+        if newClientOrderId and any(o["clientOrderId"] == newClientOrderId
+                                    for o in market.orders.values()):
+            raise _reject(-4116, "ClientOrderId is duplicated.")
+        if side not in ("BUY", "SELL"):
+            raise _reject(-1117, "Invalid side.")
+        if type != "MARKET" and type not in STOP_TYPES:
+            raise _reject(-1116, "Invalid orderType.")
+        self._take_failure(type)
+        reduce_only = str(reduceOnly).lower() == "true"
+        close_position = str(closePosition).lower() == "true"
+        qty = 0.0 if close_position else self._quantity(market, quantity)
+        price = market.price
+        if type == "MARKET":
+            closing = market.amt != 0 and (market.amt > 0) == (side == "SELL")
+            if reduce_only:
+                if not closing:
+                    raise _reject(-2022, "ReduceOnly Order is rejected.")
+                qty = min(qty, abs(market.amt))
+            else:
+                opening = qty - (abs(market.amt) if closing else 0.0)
+                if opening > 0 and price * qty < float(market.filters["notional"]):
+                    raise _reject(-4164, "Order's notional must be no smaller than "
+                                         f"{market.filters['notional']} (unless you choose reduce only).")
+                if opening > 0 and price * opening / market.leverage > self._available():
+                    raise _reject(-2019, "Margin is insufficient.")
+        order = self._new_order_dict(market, side, type, qty, reduce_only, close_position,
+                                     newClientOrderId)
+        if type == "MARKET":
+            self._trade(market, side, qty, price)
+            order.update(status="FILLED", executedQty=_num(qty), avgPrice=_num(price),
+                         cumQuote=_num(qty * price))
+            return order
+        if type == "TRAILING_STOP_MARKET":
+            rate = float(callbackRate or 0)
+            if rate <= 0:
+                raise _reject(-1102, "Mandatory parameter 'callbackRate' was not sent, "
+                                     "was empty/null, or malformed.")
+            activate = float(activationPrice) if activationPrice else price
+            order.update(priceRate=_num(rate), activatePrice=_num(activate), _activate=activate,
+                         _extreme=None if activationPrice else price)
+        else:
+            if stopPrice is None:
+                raise _reject(-1102, "Mandatory parameter 'stopPrice' was not sent, "
+                                     "was empty/null, or malformed.")
+            stop = float(stopPrice)
+            up = (type == "STOP_MARKET") != (side == "SELL")
+            if (price >= stop) if up else (price <= stop):
+                raise _reject(-2021, "Order would immediately trigger.")
+            order["stopPrice"] = _num(stop)
+        market.orders[order["orderId"]] = order
+        return order
+
+    @staticmethod
+    def _quantity(market: _Market, quantity) -> float:
+        try:
+            qty = Decimal(str(quantity))
+        except (InvalidOperation, ValueError):
+            raise _reject(-1102, "Mandatory parameter 'quantity' was not sent, "
+                                 "was empty/null, or malformed.") from None
+        if qty <= 0:
+            raise _reject(-4003, "Quantity less than or equal to zero.")
+        if qty % Decimal(market.filters["stepSize"]):
+            raise _reject(-1111, "Precision is over the maximum defined for this asset.")
+        if qty < Decimal(market.filters["minQty"]):
+            raise _reject(-4003, f"Quantity less than minQty {market.filters['minQty']}.")
+        return float(qty)
+
+    def _new_order_dict(self, market, side, type_, qty, reduce_only, close_position,
+                        client_order_id=None) -> dict:
+        order_id = next(self._order_ids)
+        now = int(self._now())
+        return {"orderId": order_id, "symbol": market.symbol, "status": "NEW",
+                "clientOrderId": client_order_id or f"paper_{order_id}",
+                "price": "0", "avgPrice": "0",
+                "origQty": _num(qty), "executedQty": "0", "cumQuote": "0",
+                "timeInForce": "GTC", "type": type_, "origType": type_,
+                "reduceOnly": reduce_only, "closePosition": close_position, "side": side,
+                "positionSide": "BOTH", "stopPrice": "0", "workingType": "CONTRACT_PRICE",
+                "time": now, "updateTime": now}
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        return {k: v for k, v in order.items() if not k.startswith("_")}
+
+    @_endpoint
+    def new_order(self, **kwargs):
+        return self._public(self._place(**kwargs))
+
+    @_endpoint
+    def new_batch_order(self, batchOrders: list):
+        """leg 별 결과 (실패한 leg 는 {"code", "msg"}), 거래소와 같이 나머지 leg 는 계속 처리"""
+        out = []
+        for params in batchOrders:
+            try:
+                out.append(self._public(self._place(**params)))
+            except ClientError as e:
+                out.append({"code": e.error_code, "msg": e.error_message})
+        return out
+
+    @_endpoint
+    def cancel_order(self, symbol: str, orderId: int = None, **kwargs):
+        order = self._market(symbol).orders.pop(orderId, None)
+        if order is None:
+            raise _reject(-2011, "Unknown order sent.")
+        order.update(status="CANCELED", updateTime=int(self._now()))
+        return self._public(order)
+
+    @_endpoint
+    def cancel_open_orders(self, symbol: str, **kwargs):
+        market = self._market(symbol)
+        for order in market.orders.values():
+            order.update(status="CANCELED", updateTime=int(self._now()))
+        market.orders.clear()
+        return {"code": 200, "msg": "The operation of cancel all open order is done."}
+
+    @_endpoint
+    def get_open_orders(self, symbol: str, orderId: int = None, origClientOrderId: str = None,
+                        **kwargs):
+        """미체결 주문 1건 (커넥터와 같이 orderId / origClientOrderId 필수). 목록은 get_orders"""
+        if orderId is None and origClientOrderId is None:
+            raise ParameterRequiredError(["orderId"])
+        for order in self._market(symbol).orders.values():
+            if (order["orderId"] == orderId if orderId is not None
+                    else order["clientOrderId"] == origClientOrderId):
+                return self._public(order)
+        raise _reject(-2013, "Order does not exist.")
+
+    @_endpoint
+    def get_orders(self, symbol: str = None, **kwargs):
+        """미체결 주문 목록 (symbol 없으면 전체 심볼)"""
+        markets = [self._market(symbol)] if symbol else self._markets.values()
+        return [self._public(o) for m in markets for o in m.orders.values()]
+
+    # --- 계정 / 포지션 ---
+    @_endpoint
+    def account(self, **kwargs):
+        pnl = sum(self._unrealized(m) for m in self._markets.values())
+        available = self._available()
+        return {"totalWalletBalance": _num(self.balance),
+                "totalUnrealizedProfit": _num(pnl),
+                "totalMarginBalance": _num(self.balance + pnl),
+                "availableBalance": _num(available),
+                "assets": [{"asset": "USDT", "walletBalance": _num(self.balance),
+                            "unrealizedProfit": _num(pnl),
+                            "marginBalance": _num(self.balance + pnl),
+                            "availableBalance": _num(available)}],
+                "positions": [self._position(m) for m in self._markets.values()]}
+
+    @_endpoint
+    def balance(self, **kwargs):
+        return [{"asset": "USDT", "balance": _num(self.balance),
+                 "availableBalance": _num(self._available())}]
+
+    def _position(self, market: _Market) -> dict:
+        return {"symbol": market.symbol, "positionAmt": _num(market.amt),
+                "entryPrice": _num(market.entry), "markPrice": _num(market.price),
+                "unRealizedProfit": _num(self._unrealized(market)),
+                "leverage": str(market.leverage), "marginType": market.margin_type.lower(),
+                "positionSide": "BOTH", "updateTime": int(self._now())}
+
+    @_endpoint
+    def get_position_risk(self, symbol: str = None, **kwargs):
+        markets = [self._market(symbol)] if symbol else self._markets.values()
+        return [self._position(m) for m in markets]
+
+    @_endpoint
+    def change_leverage(self, symbol: str, leverage: int, **kwargs):
+        market = self._market(symbol)
+        market.leverage = int(leverage)
+        return {"symbol": symbol, "leverage": market.leverage, "maxNotionalValue": "1000000"}
+
+    @_endpoint
+    def change_margin_type(self, symbol: str, marginType: str, **kwargs):
+        market = self._market(symbol)
+        if market.margin_type == marginType.upper():
+            raise _reject(-4046, "No need to change margin type.")
+        market.margin_type = marginType.upper()
+        return {"code": 200, "msg": "success"}
+
+    # --- 시세 / 거래소 정보 ---
+    @_endpoint
+    def klines(self, symbol: str, interval: str, limit: int = 500, startTime=None,
+               endTime=None, **kwargs):
+        """마감 캔들 + 진행 중 캔들(시가 하나로 평평한 캔들)"""
+        market = self._market(symbol)
+        if INTERVAL_MS.get(interval) != market.interval:
+            raise _reject(-1120, "Invalid interval.")
+        rows = market.klines[:market.cursor]
+        if market.cursor < len(market.klines):
+            k = market.klines[market.cursor]
+            rows = rows + [[k[0], k[1], k[1], k[1], k[1], "0", k[6], "0", 0, "0", "0", "0"]]
+        if startTime is not None:
+            rows = [k for k in rows if k[0] >= int(startTime)]
+        if endTime is not None:
+            rows = [k for k in rows if k[0] <= int(endTime)]
+        limit = int(limit)
+        return [list(k) for k in (rows[:limit] if startTime is not None else rows[-limit:])]
+
+    @_endpoint
+    def ticker_price(self, symbol: str = None, **kwargs):
+        now = int(self._now())
+        if symbol:
+            return {"symbol": symbol, "price": _num(self._market(symbol).price), "time": now}
+        return [{"symbol": m.symbol, "price": _num(m.price), "time": now}
+                for m in self._markets.values()]
+
+    @_endpoint
+    def exchange_info(self, **kwargs):
+        return {"timezone": "UTC", "serverTime": int(self._now()),
+                "symbols": [{"symbol": m.symbol, "status": "TRADING",
+                             "filters": [{"filterType": "PRICE_FILTER",
+                                          "tickSize": m.filters["tickSize"]},
+                                         {"filterType": "LOT_SIZE",
+                                          "stepSize": m.filters["stepSize"],
+                                          "minQty": m.filters["minQty"]},
+                                         {"filterType": "MIN_NOTIONAL",
+                                          "notional": m.filters["notional"]}]}
+                            for m in self._markets.values()]}
+
+    @_endpoint
+    def time(self):
+        return {"serverTime": int(self._now())}
+
+    @_endpoint
+    def ping(self):
+        return {}
+
+    @_endpoint
+    def new_listen_key(self):
+        return {"listenKey": "paper"}
+
+    @_endpoint
+    def renew_listen_key(self, listenKey: str):
+        return {}
+
+    @_endpoint
+    def close_listen_key(self, listenKey: str):
+        return {}
+
+    # --- 결과 ---
+    def summary(self) -> dict:
+        """부하 테스트 / 모의 운용 결과 요약"""
+        with self._lock:
+            self._catch_up()
+            return {"balance": round(self.balance, 8), "realized": round(self.realized, 8),
+                    "fees": round(self.fees, 8), "trades": len(self.trades),
+                    "positions": {m.symbol: m.amt for m in self._markets.values() if m.amt},
+                    "calls": dict(self.calls)}
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+실행 중인 봇 진단 (필요할 때만 켜는 프로파일링)
+
+  - cProfile: 다음 N 개 심볼 사이클을 워커 스레드에서 프로파일해 합친 뒤 .prof 파일과 텍스트 보고서로 남김
+  - 스레드 스택: 모든 스레드(스케줄러, symbol 워커, telegram, 스트림, 상태 서버 등)의 현재 스택
+  - tracemalloc: 시작 이후 메모리 할당 상위 위치 / 시작 시점 대비 증가분
+
+꺼져 있을 때 사이클 경로의 비용은 정수 비교 한 번이고, tracemalloc 은 켠 동안만 추적합니다.
+상태 서버의 /debug/* (토큰 인증) 또는 SIGUSR1(스택) / SIGUSR2(프로파일) 로 켭니다.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+
+def thread_stacks() -> str:
+    """모든 스레드의 현재 스택 (스레드 이름 / daemon 여부 포함)"""
+    threads = {t.ident: t for t in threading.enumerate()}
+    out = []
+    for ident, frame in sorted(sys._current_frames().items()):
+        t = threads.get(ident)
+        name = t.name if t is not None else "?"
+        daemon = " daemon" if t is not None and t.daemon else ""
+        out.append(f"--- {name} (ident={ident}{daemon}) ---\n")
+        out.extend(traceback.format_stack(frame))
+    return "".join(out)
+
+
+class Profiler:
+    """
+    start(cycles) 로 켜면 call() 로 감싼 다음 cycles 개 사이클을 프로파일합니다.
+    여러 워커가 동시에 돌면 사이클마다 따로 프로파일한 뒤 합칩니다
+    (동시 프로파일을 허용하지 않는 인터프리터에서는 겹친 사이클을 건너뜀).
+    """
+
+    def __init__(self, out_dir: str = "profiles", top: int = 40):
+        self.out_dir = out_dir
+        self.top = top
+        self.sort = "cumulative"
+        self.remaining = 0
+        self.requested = 0
+        self.profiled = 0
+        self.skipped = 0
+        self.started_at = None
+        self.last_report = None
+        self.last_path = None
+        self._stats = None
+        self._tm_base = None
+        self._lock = threading.Lock()
+
+    # --- cProfile ---
+    def start(self, cycles: int = 10, sort: str = "cumulative") -> dict:
+        if sort not in SORT_KEYS:
+            raise ValueError(f"정렬 기준은 {', '.join(SORT_KEYS)} 중 하나")
+        with self._lock:
+            if self.remaining:
+                raise RuntimeError(f"프로파일 진행 중 (남은 사이클 {self.remaining})")
+            self._stats = None
+            self.sort = sort
+            self.requested = self.remaining = max(1, int(cycles))
+            self.profiled = self.skipped = 0
+            self.started_at = time.time()
+        logger.info(f"[프로파일] 다음 {self.requested}개 사이클 프로파일 시작 (정렬: {sort})")
+        return self.status()
+
+    def call(self, func, *args, **kwargs):
+        """사이클 실행. 프로파일이 꺼져 있으면 그대로 호출"""
+        if not self.remaining:
+            return func(*args, **kwargs)
+        with self._lock:
+            if not self.remaining:
+                take = False
+            else:
+                self.remaining -= 1
+                take = True
+        if not take:
+            return func(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 스레드의 프로파일이 활성 (동시 프로파일 불가) → 이 사이클은 건너뜀
+            with self._lock:
+                self.skipped += 1
+                self.remaining += 1
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._collect(profile)
+
+    def _collect(self, profile):
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+            self.profiled += 1
+            done = self.profiled >= self.requested
+        if done:
+            self._finish()
+
+    def _finish(self):
+        stats, self._stats = self._stats, None
+        path = None
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            path = os.path.join(self.out_dir,
+                                time.strftime("profile_%Y%m%d_%H%M%S.prof"))
+            stats.dump_stats(path)
+        except OSError as e:
+            logger.warning(f"[프로파일] .prof 저장 실패: {e}")
+            path = None
+        buf = io.StringIO()
+        stats.stream = buf
+        stats.sort_stats(self.sort).print_stats(self.top)
+        header = (f"사이클 {self.profiled}개 (건너뜀 {self.skipped}), "
+                  f"{time.time() - self.started_at:.1f}초 동안, 정렬 {self.sort}\n")
+        self.last_report, self.last_path = header + buf.getvalue(), path
+        logger.warning(f"[프로파일] 완료 ({path or '파일 없음'})\n{self.last_report}")
+
+    def status(self) -> dict:
+        return {"running": bool(self.remaining), "requested": self.requested,
+                "remaining": self.remaining, "profiled": self.profiled,
+                "skipped": self.skipped, "sort": self.sort, "last_file": self.last_path,
+                "tracemalloc": tracemalloc.is_tracing()}
+
+    # --- tracemalloc ---
+    def tracemalloc_start(self, frames: int = 10) -> dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, int(frames)))
+            self._tm_base = tracemalloc.take_snapshot()
+            logger.info(f"[프로파일] tracemalloc 시작 (프레임 {frames})")
+        return self.status()
+
+    def tracemalloc_stop(self) -> dict:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("[프로파일] tracemalloc 중지")
+        self._tm_base = None
+        return self.status()
+
+    def tracemalloc_report(self, top: int = 20) -> str:
+        """추적 중인 할당 상위 top 위치 + 시작 시점 대비 증가 상위 top"""
+        if not tracemalloc.is_tracing():
+            return "tracemalloc 꺼짐 (먼저 시작하세요)\n"
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        current, peak = tracemalloc.get_traced_memory()
+        out = [f"추적 메모리 현재 {current / 1024:.1f} KiB, 최대 {peak / 1024:.1f} KiB\n",
+               f"\n[할당 상위 {top}]\n"]
+        out.extend(f"{stat}\n" for stat in snapshot.statistics("lineno")[:top])
+        if self._tm_base is not None:
+            out.append(f"\n[시작 대비 증가 상위 {top}]\n")
+            growth = snapshot.compare_to(self._tm_base.filter_traces(ignore), "lineno")
+            out.extend(f"{stat}\n" for stat in growth[:top])
+        return "".join(out)
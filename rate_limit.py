@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+API 요청 예산 관리 (바이낸스 request weight / 주문 수 제한)
+
+제한 종류마다 토큰 버킷을 두고, 호출 전에 메서드별 비용(weight, 주문 수)만큼 토큰을 받습니다.
+응답 헤더(X-MBX-USED-WEIGHT-1M, X-MBX-ORDER-COUNT-10S/1M)의 서버 사용량으로 버킷을 보정하고,
+429/418 응답의 Retry-After 동안은 모든 호출을 멈춥니다.
+우선순위가 낮은 호출(거래소 정보 갱신 등)은 예산 일부를 남겨 두어야만 나가므로
+예산이 빠듯할 때는 뒤로 밀리고, 주문은 남은 예산을 모두 쓸 수 있습니다.
+"""
+import logging
+import threading
+import time
+
+from metrics import RATE_LIMIT_DELAYED, RATE_LIMIT_HITS
+
+logger = logging.getLogger(__name__)
+
+# 호출 우선순위
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+# 우선순위별로 남겨 둬야 하는 예산 비율 (LOW 는 버킷의 30% 이상 남아 있을 때만 호출)
+RESERVE = {HIGH: 0.0, NORMAL: 0.1, LOW: 0.3}
+
+# 제한 종류 → (한도, 창 길이(초), 사용량 응답 헤더). USDⓈ-M 기본값 (exchangeInfo rateLimits)
+DEFAULT_LIMITS = {
+    "weight_1m": (2400, 60.0, "x-mbx-used-weight-1m"),
+    "orders_10s": (300, 10.0, "x-mbx-order-count-10s"),
+    "orders_1m": (1200, 60.0, "x-mbx-order-count-1m"),
+}
+ORDER_LIMITS = ("orders_10s", "orders_1m")
+
+
+def _klines_weight(kwargs) -> int:
+    limit = int(kwargs.get("limit", 500))
+    return 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+
+
+# 클라이언트 메서드 → (weight 또는 kwargs 로 계산하는 함수, 주문 수, 우선순위)
+CALLS = {
+    "klines": (_klines_weight, 0, NORMAL),
+    "ticker_price": (lambda kw: 1 if kw.get("symbol") else 2, 0, NORMAL),
+    "account": (5, 0, NORMAL),
+    "balance": (5, 0, NORMAL),
+    "get_position_risk": (5, 0, NORMAL),
+    "get_open_orders": (1, 0, NORMAL),  # 주문 1건 조회 (/fapi/v1/openOrder)
+    "get_orders": (lambda kw: 1 if kw.get("symbol") else 40, 0, NORMAL),
+    "new_order": (1, 1, HIGH),
+    "new_batch_order": (5, lambda kw: len(kw.get("batchOrders", ())), HIGH),
+    "cancel_open_orders": (1, 0, HIGH),
+    "cancel_order": (1, 0, HIGH),
+    "exchange_info": (1, 0, LOW),
+    "change_leverage": (1, 0, LOW),
+    "change_margin_type": (1, 0, LOW),
+    "new_listen_key": (1, 0, NORMAL),
+    "renew_listen_key": (1, 0, NORMAL),
+    "close_listen_key": (1, 0, LOW),
+    "time": (1, 0, LOW),
+    "ping": (1, 0, LOW),
+}
+
+
+class RateLimitDeferred(Exception):
+    """우선순위 낮은 호출이 max_wait 안에 예산을 못 받았거나, 차단(429/418)이 길어 호출을 미룸"""
+
+
+class TokenBucket:
+    """capacity 개 토큰, window 초에 걸쳐 가득 차도록 연속 충전"""
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float, reserve: float) -> float:
+        """cost 를 가져가고도 capacity * reserve 가 남을 때까지 기다릴 시간 (초)"""
+        short = cost + self.capacity * reserve - self.tokens
+        return 0.0 if short <= 0 else short / self.rate
+
+    def sync(self, used: int):
+        """서버가 알려준 사용량이 더 많으면 그만큼 토큰을 줄임 (다른 프로세스/IP 공유분 반영)"""
+        self.tokens = min(self.tokens, float(self.capacity - used))
+
+
+class RateLimiter:
+    """
+    프로세스 전체가 공유하는 예산 (weight 는 IP 단위, 주문 수는 계정 단위 제한).
+    acquire() 는 필요한 만큼 대기하며, 대기 중에는 잠금을 풀어 우선순위 높은 호출이 먼저 가져갑니다.
+    """
+
+    def __init__(self, limits=None, max_wait: float = 30.0):
+        limits = limits or DEFAULT_LIMITS
+        self.buckets = {kind: TokenBucket(limit, window)
+                        for kind, (limit, window, _) in limits.items()}
+        self.headers = {header: kind for kind, (_, _, header) in limits.items()}
+        self.max_wait = max_wait
+        self.banned_until = 0.0
+        self.stats = dict.fromkeys(("calls", "deferred", "waits", "hits"), 0)
+        self._cond = threading.Condition()
+
+    def acquire(self, weight: int = 1, orders: int = 0, priority: int = NORMAL) -> float:
+        """
+        예산을 받을 때까지 대기하고 대기 시간(초)을 반환.
+        LOW 가 max_wait 안에 못 받거나 차단이 max_wait 보다 길면 RateLimitDeferred.
+        """
+        costs = {"weight_1m": weight}
+        if orders:
+            costs.update(dict.fromkeys(ORDER_LIMITS, orders))
+        costs = {k: v for k, v in costs.items() if v and k in self.buckets}
+        reserve = RESERVE[priority]
+        label = PRIORITY_NAMES[priority]
+        start = time.monotonic()
+        delayed = False
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self.banned_until - now
+                for kind, cost in costs.items():
+                    bucket = self.buckets[kind]
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_time(cost, reserve))
+                if wait <= 0:
+                    for kind, cost in costs.items():
+                        self.buckets[kind].tokens -= cost
+                    self.stats["calls"] += 1
+                    return now - start
+                waited = now - start
+                if waited + wait > self.max_wait:
+                    # 우선순위 낮은 호출, 또는 차단(429/418)이 남은 대기 한도보다 길면 미룸
+                    banned = self.banned_until - now > self.max_wait - waited
+                    if priority == LOW or banned:
+                        self.stats["deferred"] += 1
+                        RATE_LIMIT_DELAYED.inc(priority=label, result="deferred")
+                        reason = "요청 제한 차단 중" if banned else "API 예산 부족"
+                        raise RateLimitDeferred(f"{reason} ({wait:.1f}초 대기 필요)")
+                    if waited >= self.max_wait:
+                        # 주문 / 사이클 조회는 무한정 미루지 않음 (서버 판단에 맡김)
+                        logger.warning(f"[요청 제한] {waited:.1f}초 대기 후에도 예산 부족 → 그대로 호출")
+                        self.stats["calls"] += 1
+                        return waited
+                    wait = self.max_wait - waited
+                if not delayed:
+                    delayed = True
+                    self.stats["waits"] += 1
+                    RATE_LIMIT_DELAYED.inc(priority=label, result="waited")
+                self._cond.wait(wait)
+
+    def observe(self, status: int, headers):
+        """응답 헤더로 버킷 보정. 429(제한 초과) / 418(IP 차단)이면 Retry-After 동안 정지"""
+        with self._cond:
+            for header, kind in self.headers.items():
+                value = headers.get(header)
+                if value is not None:
+                    try:
+                        self.buckets[kind].sync(int(value))
+                    except ValueError:
+                        pass
+            if status in (418, 429):
+                try:
+                    retry_after = float(headers.get("retry-after", 60))
+                except ValueError:
+                    retry_after = 60.0
+                self.banned_until = max(self.banned_until, time.monotonic() + retry_after)
+                self.stats["hits"] += 1
+                RATE_LIMIT_HITS.inc(status=status)
+                logger.error(f"[요청 제한] HTTP {status} → {retry_after:.0f}초 동안 API 호출 중지")
+            self._cond.notify_all()
+
+    def usage(self) -> dict:
+        """제한 종류별 사용 비율 (0~1)"""
+        now = time.monotonic()
+        with self._cond:
+            out = {}
+            for kind, bucket in self.buckets.items():
+                bucket.refill(now)
+                out[kind] = round(1 - bucket.tokens / bucket.capacity, 3)
+            return out
+
+
+def call_cost(name: str, kwargs: dict):
+    """메서드 이름 + 인자 → (weight, 주문 수, 우선순위). 표에 없으면 None"""
+    spec = CALLS.get(name)
+    if spec is None:
+        return None
+    weight, orders, priority = spec
+    weight = weight(kwargs) if callable(weight) else weight
+    orders = orders(kwargs) if callable(orders) else orders
+    return weight, orders, priority
+
+
+class RateLimitedClient:
+    """
+    UMFutures 래퍼. CALLS 에 있는 메서드는 호출 전에 예산을 받고,
+    requests 세션 응답 훅으로 모든 응답(오류 포함)의 사용량 헤더를 반영합니다.
+    반환값 / 예외는 원래 클라이언트와 같습니다.
+    """
+
+    def __init__(self, client, limiter: RateLimiter):
+        self._client = client
+        self.limiter = limiter
+        session = getattr(client, "session", None)
+        if session is not None:
+            session.hooks["response"].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        self.limiter.observe(response.status_code,
+                             {k.lower(): v for k, v in response.headers.items()})
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in CALLS or not callable(attr):
+            return attr
+        limiter = self.limiter
+
+        def call(*args, **kwargs):
+            limiter.acquire(*call_cost(name, kwargs))
+            return attr(*args, **kwargs)
+
+        call.__name__ = name
+        return call
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+로컬 kline 리플레이 웹소켓 서버 (테스트용 바이낸스 스트림 대역)
+
+기록된 REST klines(JSON 리스트)를 바이낸스 kline 이벤트 형식으로 재생합니다.
+캔들마다 진행 중(x=false) 이벤트 몇 개를 보낸 뒤 마감(x=true) 이벤트를 보냅니다.
+--user-events 로 기록된 사용자 데이터 이벤트(ORDER_TRADE_UPDATE / ACCOUNT_UPDATE)를
+재생하는 계정 스트림 대역으로도 동작합니다.
+
+실행: python replay_server.py klines.json --port 8765 --candle-delay 1.0
+      python replay_server.py --user-events fills.json --port 8766 --event-delay 0.2
+봇:   MARKET_DATA_MODE=stream STREAM_URL=ws://127.0.0.1:8765 python main.py
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# --- 최소 웹소켓 프레이밍 (RFC 6455) -------------------------------------------------------
+def _recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("client closed")
+        buf += chunk
+    return buf
+
+
+def read_frame(sock):
+    """클라이언트 프레임 1개 → (opcode, payload)"""
+    b1, b2 = _recv_exact(sock, 2)
+    opcode = b1 & 0x0F
+    length = b2 & 0x7F
+    if length == 126:
+        length = struct.unpack(">H", _recv_exact(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack(">Q", _recv_exact(sock, 8))[0]
+    mask = _recv_exact(sock, 4) if b2 & 0x80 else None
+    payload = _recv_exact(sock, length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+def write_frame(sock, payload: bytes, opcode=0x1):
+    """서버 → 클라이언트 프레임 (마스킹 없음)"""
+    header = bytes([0x80 | opcode])
+    n = len(payload)
+    if n < 126:
+        header += bytes([n])
+    elif n < 1 << 16:
+        header += bytes([126]) + struct.pack(">H", n)
+    else:
+        header += bytes([127]) + struct.pack(">Q", n)
+    sock.sendall(header + payload)
+
+
+def handshake(sock) -> str:
+    """HTTP Upgrade 요청 처리. 요청 경로 반환"""
+    request = b""
+    while b"\r\n\r\n" not in request:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise ConnectionError("client closed during handshake")
+        request += chunk
+    lines = request.decode("latin-1").split("\r\n")
+    path = lines[0].split(" ")[1]
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            k, v = line.split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+    accept = base64.b64encode(
+        hashlib.sha1((headers["sec-websocket-key"] + _WS_GUID).encode()).digest()).decode()
+    sock.sendall(("HTTP/1.1 101 Switching Protocols\r\n"
+                  "Upgrade: websocket\r\n"
+                  "Connection: Upgrade\r\n"
+                  f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+    return path
+
+
+# --- kline 이벤트 ---------------------------------------------------------------------------
+def kline_event(kline, symbol: str, interval: str, close: str, is_final: bool) -> dict:
+    """REST kline 배열 → 웹소켓 kline 이벤트"""
+    return {
+        "e": "kline",
+        "E": int(time.time() * 1000),
+        "s": symbol,
+        "k": {
+            "t": int(kline[0]),
+            "T": int(kline[6]),
+            "s": symbol,
+            "i": interval,
+            "o": str(kline[1]),
+            "c": str(close),
+            "h": str(kline[2]),
+            "l": str(kline[3]),
+            "v": str(kline[5]),
+            "n": int(kline[8]),
+            "x": is_final,
+            "q": str(kline[7]),
+            "V": str(kline[9]),
+            "Q": str(kline[10]),
+            "B": "0",
+        },
+    }
+
+
+def accept_subscribe(sock, timeout: float):
+    """구독 요청(SUBSCRIBE) 1개를 읽고 응답. 요청 params 반환 (timeout 안에 없으면 [])"""
+    sock.settimeout(timeout)
+    params = []
+    try:
+        opcode, payload = read_frame(sock)
+        if opcode == 0x1:
+            req = json.loads(payload)
+            params = req.get("params") or []
+            write_frame(sock, json.dumps({"result": None, "id": req.get("id")}).encode())
+    except socket.timeout:
+        pass
+    sock.settimeout(None)
+    return params
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _ReplayServer:
+    """접속마다 _serve(sock) 를 스레드에서 실행하는 로컬 웹소켓 서버 공통부"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        outer = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                outer._serve(self.request)
+
+        self._server = _ThreadingServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"ws://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _serve(self, sock):
+        raise NotImplementedError
+
+
+class KlineReplayServer(_ReplayServer):
+    """
+    기록된 klines 를 접속한 클라이언트에게 재생하는 로컬 서버.
+    candle_delay 초마다 캔들 1개가 마감되며, 그 사이 ticks_per_candle 번 진행 중 이벤트를 보냅니다.
+    drop_after 를 주면 해당 캔들 수만큼 보낸 뒤 연결을 끊어 스트림 장애를 재현합니다.
+    """
+
+    def __init__(self, klines, symbol="BTCUSDT", interval="15m", host="127.0.0.1",
+                 port=0, candle_delay=1.0, ticks_per_candle=3, drop_after=None):
+        self.klines = list(klines)
+        self.symbol = symbol
+        self.interval = interval
+        self.candle_delay = candle_delay
+        self.ticks_per_candle = ticks_per_candle
+        self.drop_after = drop_after
+        self.sent_final = 0
+        super().__init__(host, port)
+
+    def _serve(self, sock):
+        try:
+            handshake(sock)
+            accept_subscribe(sock, self.candle_delay or 1.0)
+
+            tick_delay = self.candle_delay / (self.ticks_per_candle + 1)
+            for kline in self.klines:
+                open_, close = float(kline[1]), float(kline[4])
+                for i in range(1, self.ticks_per_candle + 1):
+                    price = open_ + (close - open_) * i / (self.ticks_per_candle + 1)
+                    self._send(sock, kline, f"{price:.8f}", False)
+                    time.sleep(tick_delay)
+                self._send(sock, kline, kline[4], True)
+                self.sent_final += 1
+                if self.drop_after is not None and self.sent_final >= self.drop_after:
+                    logger.info("[리플레이] 연결 강제 종료 (장애 재현)")
+                    return
+                time.sleep(tick_delay)
+            write_frame(sock, struct.pack(">H", 1000), opcode=0x8)
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"[리플레이] 클라이언트 연결 종료: {e}")
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _send(self, sock, kline, close, is_final):
+        event = kline_event(kline, self.symbol, self.interval, close, is_final)
+        write_frame(sock, json.dumps(event).encode())
+
+
+class UserDataReplayServer(_ReplayServer):
+    """
+    기록된 사용자 데이터 이벤트를 구독한 클라이언트에게 event_delay 초 간격으로 재생하는 로컬 서버.
+    이벤트 시각(E, T)은 전송 시각으로 바꿉니다. subscribed 에 구독한 listenKey 가 쌓입니다.
+    """
+
+    def __init__(self, events, host="127.0.0.1", port=0, event_delay=0.2, start_delay=0.5):
+        self.events = list(events)
+        self.event_delay = event_delay
+        self.start_delay = start_delay
+        self.subscribed = []
+        self.sent = 0
+        super().__init__(host, port)
+
+    def _serve(self, sock):
+        try:
+            handshake(sock)
+            self.subscribed.extend(accept_subscribe(sock, 1.0))
+            time.sleep(self.start_delay)  # 클라이언트의 REST 초기 동기화 이후에 재생
+            for event in self.events:
+                event = dict(event, E=int(time.time() * 1000))
+                if "T" in event:
+                    event["T"] = event["E"]
+                write_frame(sock, json.dumps(event).encode())
+                self.sent += 1
+                time.sleep(self.event_delay)
+            # 클라이언트가 끊을 때까지 연결 유지 (계정 스트림은 상시 연결)
+            while True:
+                opcode, _ = read_frame(sock)
+                if opcode == 0x8:
+                    return
+        except (ConnectionError, OSError) as e:
+            logger.debug(f"[리플레이] 클라이언트 연결 종료: {e}")
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 kline 리플레이 웹소켓 서버")
+    parser.add_argument("klines", nargs="?", help="REST klines 응답을 저장한 JSON 파일")
+    parser.add_argument("--user-events",
+                        help="사용자 데이터 이벤트 JSON 리스트 (계정 스트림 대역으로 실행)")
+    parser.add_argument("--event-delay", type=float, default=0.2)
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="15m")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--candle-delay", type=float, default=1.0)
+    parser.add_argument("--ticks", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.user_events:
+        with open(args.user_events) as f:
+            events = json.load(f)
+        server = UserDataReplayServer(events, port=args.port,
+                                      event_delay=args.event_delay).start()
+        logger.info(f"[리플레이] 사용자 데이터 이벤트 {len(events)}개 재생 서버: {server.url}")
+    elif args.klines:
+        with open(args.klines) as f:
+            klines = json.load(f)
+        server = KlineReplayServer(klines, args.symbol, args.interval, port=args.port,
+                                   candle_delay=args.candle_delay,
+                                   ticks_per_candle=args.ticks).start()
+        logger.info(f"[리플레이] {len(klines)}개 캔들 재생 서버: {server.url}")
+    else:
+        parser.error("klines 파일 또는 --user-events 가 필요합니다")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
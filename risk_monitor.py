@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+캔들 사이 HARD SL 감시
+
+보유 포지션마다 HARD SL 발동 가격을 float 로 미리 계산해 두고, 체결가 / 마크 가격 스트림의
+틱마다 비교 한 번으로 판정합니다(틱 처리에 Decimal / DataFrame 없음).
+스트림이 끊기면 poll_interval 초마다 REST 현재가를 조회합니다(보유 포지션이 있을 때만).
+발동하면 on_breach(symbol, side, qty, entry_price, price) 를 워커 스레드에서 바로 호출합니다.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+
+from metrics import API_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+def trigger_price(side: str, entry_price: float, hard_sl: float) -> float:
+    """position_pnl(side, entry, price) <= hard_sl 이 되는 경계 가격"""
+    if side == "LONG":
+        return entry_price * (1 + hard_sl / 100)
+    return entry_price * (1 - hard_sl / 100)
+
+
+class RiskMonitor:
+    """
+    watch(symbol, side, entry_price, qty) 로 감시를 걸고 clear(symbol) 로 해제합니다.
+    발동한 심볼은 감시에서 빠지며, on_breach 가 False 를 돌려주면(청산 실패)
+    retry_delay 초 뒤 다음 틱에서 다시 발동합니다.
+    stream: 구독할 스트림 종류 (aggTrade / markPrice@1s 등, 이벤트의 p 필드를 가격으로 사용)
+    """
+
+    def __init__(self, symbols, hard_sl: float, on_breach, stream_url: str = None,
+                 stream: str = "aggTrade", client=None, poll_interval: float = 1.0,
+                 retry_delay: float = 2.0):
+        self.symbols = list(symbols)
+        self.hard_sl = hard_sl
+        self.on_breach = on_breach
+        self.stream_url = stream_url
+        self.stream = stream
+        self.client = client
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.connected = False
+        self.last_price = {}
+        # symbol → (LONG 여부, 발동 가격, side, qty, 진입가) — 틱마다 읽으므로 튜플 하나로
+        self._watch = {}
+        self._retry_at = {}
+        self._lock = threading.Lock()
+        self._ws = None
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="risk-flatten")
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- 감시 대상 ---
+    def watch(self, symbol: str, side: str, entry_price, qty):
+        if not side or not entry_price:
+            self.clear(symbol)
+            return
+        entry = float(entry_price)
+        self._watch[symbol] = (side == "LONG", trigger_price(side, entry, self.hard_sl),
+                               side, qty, entry)
+
+    def clear(self, symbol: str):
+        self._watch.pop(symbol, None)
+        self._retry_at.pop(symbol, None)
+
+    def check(self, symbol: str, price: float):
+        """틱 1개 판정 (스트림 / 폴링 공용)"""
+        self.last_price[symbol] = price
+        w = self._watch.get(symbol)
+        if w is None or not (price <= w[1] if w[0] else price >= w[1]):
+            return
+        if symbol in self._retry_at and time.monotonic() < self._retry_at[symbol]:
+            return
+        with self._lock:
+            if self._watch.get(symbol) is not w:
+                return  # 다른 스레드가 이미 발동
+            del self._watch[symbol]
+        logger.warning(f"[{symbol}] [리스크] HARD SL 가격 도달 ({w[2]}, 가격 {price}, "
+                       f"발동가 {w[1]:.8g}) → 즉시 청산")
+        self._pool.submit(self._flatten, symbol, w, price)
+
+    def _flatten(self, symbol: str, w, price: float):
+        try:
+            ok = self.on_breach(symbol, w[2], w[3], w[4], price)
+        except Exception as e:
+            logger.error(f"[{symbol}] [리스크] 청산 처리 오류: {e}")
+            ok = False
+        if ok is False:
+            # 청산 실패 → 감시 복구 (새 포지션 정보가 이미 들어왔으면 그대로 둠)
+            self._retry_at[symbol] = time.monotonic() + self.retry_delay
+            self._watch.setdefault(symbol, w)
+
+    # --- 가격 수신 ---
+    def start(self):
+        self._stop.clear()
+        self._connect()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="risk-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._close_ws()
+
+    def _connect(self) -> bool:
+        self._close_ws()
+        if not self.stream_url:
+            return False
+        try:
+            self._ws = UMFuturesWebsocketClient(stream_url=self.stream_url,
+                                                on_message=self._on_message,
+                                                on_close=self._on_close,
+                                                on_error=self._on_error)
+            self._ws.subscribe([f"{s.lower()}@{self.stream}" for s in self.symbols])
+            self.connected = True
+            logger.info(f"[리스크] {self.stream} 구독 시작: {','.join(self.symbols)}")
+        except Exception as e:
+            self.connected = False
+            logger.warning(f"[리스크] 스트림 연결 실패 (REST 폴링 사용): {e}")
+        return self.connected
+
+    def _close_ws(self):
+        ws, self._ws = self._ws, None
+        was_connected, self.connected = self.connected, False
+        if ws is not None and was_connected:
+            try:
+                ws.stop()
+            except Exception as e:
+                logger.debug(f"[리스크] 종료 중 오류: {e}")
+
+    def _on_message(self, _, message):
+        data = json.loads(message)
+        price = data.get("p") if isinstance(data, dict) else None
+        if price is not None:
+            self.check(data["s"], float(price))
+
+    def _on_close(self, _):
+        if not self._stop.is_set():
+            logger.warning("[리스크] 스트림 연결 종료 → REST 폴링")
+        self.connected = False
+
+    def _on_error(self, _, error):
+        if not self._stop.is_set():
+            logger.warning(f"[리스크] 스트림 오류 → REST 폴링: {error}")
+        self.connected = False
+
+    def _run(self):
+        """스트림이 끊긴 동안 보유 심볼 현재가 폴링 + 주기적 재연결"""
+        next_reconnect = time.monotonic() + 30
+        while not self._stop.wait(self.poll_interval):
+            if self.connected:
+                continue
+            for symbol in list(self._watch):
+                self._poll(symbol)
+            if self.stream_url and time.monotonic() >= next_reconnect:
+                next_reconnect = time.monotonic() + 30
+                self._connect()
+
+    def _poll(self, symbol: str):
+        if self.client is None:
+            return
+        try:
+            price = float(self.client.ticker_price(symbol=symbol)["price"])
+        except Exception as e:
+            API_ERRORS.inc(call="ticker_price")
+            logger.debug(f"[{symbol}] [리스크] 현재가 조회 실패: {e}")
+            return
+        self.check(symbol, price)
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+상태 서버 (표준 라이브러리 asyncio HTTP)
+
+봇 상태를 BotHealth 에 모아 두고, 작은 asyncio 서버가 조회만 합니다.
+  /        liveness 요약 (기존 헬스체크 경로, 살아있으면 200 아니면 503)
+  /healthz liveness: 스케줄러가 예고한 시각 안에 다시 돌아왔는지, 봇이 중단 상태가 아닌지
+  /readyz  readiness: 심볼별 최근 성공 사이클 / 마지막 처리 캔들 / 연속 API 오류
+  /metrics Prometheus 지표 (metrics.py)
+  /debug/* 진단 (debug_token 을 줬을 때만, Authorization: Bearer <토큰> 필요)
+    GET  /debug/stacks                        모든 스레드 스택
+    POST /debug/profile?cycles=10&sort=cumulative  다음 N 사이클 cProfile
+    GET  /debug/profile                       진행 상태 / 마지막 보고서
+    POST /debug/tracemalloc?action=start|stop&frames=10
+    GET  /debug/tracemalloc?top=20            할당 상위 / 시작 대비 증가
+"""
+import asyncio
+import hmac
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs
+
+from profiler import thread_stacks
+
+logger = logging.getLogger(__name__)
+
+READ_TIMEOUT = 5.0  # 요청 헤더 수신 제한 (초)
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 503: "Service Unavailable"}
+TEXT = "text/plain; charset=utf-8"
+
+
+def _param(params: dict, name: str, default):
+    return params.get(name, [default])[0]
+
+
+class BotHealth:
+    """
+    거래 스레드들이 갱신하는 상태 (대입만 하므로 호출 비용은 무시할 수준).
+    interval: 캔들 주기(초). stale_cycles: 몇 캔들 동안 성공 사이클이 없으면 not ready 로 볼지.
+    """
+
+    def __init__(self, symbols, interval: float, startup_grace: float = 300.0,
+                 stale_cycles: float = 2.0, max_api_errors: int = 3, slack: float = 60.0):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.startup_grace = startup_grace
+        self.stale_cycles = stale_cycles
+        self.max_api_errors = max_api_errors
+        self.slack = slack
+        self.started_at = time.time()
+        self.heartbeat_due = None  # 스케줄러가 다음에 돌아오기로 한 시각
+        self.down_reason = None
+        self.last_cycle = {}  # 심볼 → 마지막 성공 사이클 시각
+        self.last_candle = {}  # 심볼 → 마지막 처리 캔들 open_time (ms)
+        self.api_errors_in_row = 0
+        self.last_api_ok = None
+        self._lock = threading.Lock()
+
+    # --- 갱신 (봇 스레드) ---
+    def heartbeat(self, expect_within: float):
+        """스케줄러 루프 1회. expect_within 초 안에 다시 호출될 예정"""
+        self.heartbeat_due = time.time() + expect_within
+        self.down_reason = None
+
+    def mark_down(self, reason: str):
+        self.down_reason = reason
+        self.heartbeat_due = None
+
+    def candle(self, symbol: str, open_time: int):
+        self.last_candle[symbol] = open_time
+
+    def cycle_ok(self, symbol: str):
+        self.last_cycle[symbol] = time.time()
+
+    def api_result(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.api_errors_in_row = 0
+                self.last_api_ok = time.time()
+            else:
+                self.api_errors_in_row += 1
+
+    # --- 판정 ---
+    def liveness(self, now=None):
+        now = now or time.time()
+        if self.down_reason:
+            return False, {"reason": self.down_reason}
+        if self.heartbeat_due is None:
+            ok = now - self.started_at < self.startup_grace
+            return ok, {"reason": "시작 중" if ok else "스케줄러 미시작"}
+        late = now - self.heartbeat_due
+        return late < self.slack, {"heartbeat_late_s": round(max(late, 0.0), 1)}
+
+    def readiness(self, now=None):
+        now = now or time.time()
+        live, detail = self.liveness(now)
+        checks = {"live": live}
+        stale = self.interval * self.stale_cycles + self.slack
+        symbols = {}
+        for symbol in self.symbols:
+            cycle = self.last_cycle.get(symbol)
+            candle = self.last_candle.get(symbol)
+            # 마지막 처리 캔들의 마감 시각 기준 경과 시간
+            candle_age = now - candle / 1000 - self.interval if candle is not None else None
+            symbols[symbol] = {
+                "cycle_age_s": None if cycle is None else round(now - cycle, 1),
+                "candle_age_s": None if candle_age is None else round(candle_age, 1),
+                "ok": (cycle is not None and now - cycle < stale
+                       and candle_age is not None and candle_age < stale),
+            }
+        checks["symbols"] = all(s["ok"] for s in symbols.values())
+        checks["api"] = self.api_errors_in_row < self.max_api_errors
+        detail.update(symbols=symbols, api_errors_in_row=self.api_errors_in_row)
+        return all(v for v in checks.values()), dict(checks=checks, **detail)
+
+
+class StatusServer:
+    """요청 1건 = 연결 1개 (Connection: close). 헬스체크 / 스크레이프 용도로 충분합니다."""
+
+    def __init__(self, health: BotHealth, host: str = "0.0.0.0", port: int = 8080,
+                 metrics=None, profiler=None, debug_token: str = ""):
+        self.health = health
+        self.host = host
+        self.port = port
+        self.metrics = metrics  # 호출 시 Prometheus 텍스트를 반환하는 함수
+        self.profiler = profiler  # profiler.Profiler (/debug/*)
+        self.debug_token = debug_token
+
+    def route(self, path: str):
+        """경로 → (상태 코드, Content-Type, 본문 bytes)"""
+        if path == "/":
+            live, _ = self.health.liveness()
+            text = (f"테스트넷 봇 {'살아있어요' if live else '응답 없음'}! "
+                    f"현재 시간: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            return 200 if live else 503, TEXT, text.encode()
+        if path in ("/healthz", "/readyz"):
+            ok, detail = (self.health.liveness() if path == "/healthz"
+                          else self.health.readiness())
+            body = json.dumps(dict(status="ok" if ok else "fail", **detail),
+                              ensure_ascii=False).encode()
+            return 200 if ok else 503, "application/json", body
+        if path == "/metrics" and self.metrics is not None:
+            return 200, "text/plain; version=0.0.4; charset=utf-8", self.metrics().encode()
+        return 404, TEXT, b"not found"
+
+    def route_debug(self, method: str, path: str, params: dict, token: str):
+        """/debug/* → (상태 코드, Content-Type, 본문 bytes). 토큰이 없으면 경로 자체를 숨김"""
+        if self.profiler is None or not self.debug_token:
+            return 404, TEXT, b"not found"
+        if not hmac.compare_digest(token.encode(), self.debug_token.encode()):
+            return 401, TEXT, b"unauthorized"
+        p = self.profiler
+        try:
+            if path == "/debug/stacks" and method in ("GET", "HEAD"):
+                return 200, TEXT, thread_stacks().encode()
+            if path == "/debug/profile":
+                if method == "POST":
+                    status = p.start(int(_param(params, "cycles", 10)),
+                                     _param(params, "sort", "cumulative"))
+                elif p.remaining or p.last_report is None:
+                    status = p.status()
+                else:
+                    return 200, TEXT, p.last_report.encode()
+                return 200, "application/json", json.dumps(status, ensure_ascii=False).encode()
+            if path == "/debug/tracemalloc":
+                if method == "POST":
+                    status = (p.tracemalloc_stop() if _param(params, "action", "start") == "stop"
+                              else p.tracemalloc_start(int(_param(params, "frames", 10))))
+                    return 200, "application/json", json.dumps(status).encode()
+                return 200, TEXT, p.tracemalloc_report(int(_param(params, "top", 20))).encode()
+        except ValueError as e:
+            return 400, TEXT, str(e).encode()
+        except RuntimeError as e:
+            return 409, TEXT, str(e).encode()
+        return 404, TEXT, b"not found"
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            token = ""
+            while True:  # 헤더는 인증 토큰만 보고 버림
+                line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "authorization":
+                    scheme, _, token = value.strip().partition(" ")
+                    token = token.strip() if scheme.lower() == "bearer" else ""
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2:
+                return
+            method, (path, _, query) = parts[0], parts[1].partition("?")
+            if path.startswith("/debug/"):
+                # 진단 작업은 오래 걸릴 수 있어 이벤트 루프 밖에서 (스택 / 스냅샷 수집)
+                status, ctype, body = await asyncio.get_running_loop().run_in_executor(
+                    None, self.route_debug, method, path, parse_qs(query), token)
+            elif method not in ("GET", "HEAD"):
+                status, ctype, body = 405, TEXT, b"method not allowed"
+            else:
+                status, ctype, body = self.route(path)
+            head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                    f"Cache-Control: no-store\r\nConnection: close\r\n\r\n").encode()
+            writer.write(head if method == "HEAD" else head + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.warning(f"[상태 서버] 요청 처리 오류: {e}")
+        finally:
+            writer.close()
+
+    async def serve(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"[상태 서버] {self.host}:{self.port} 대기 중")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        """현재 스레드에서 실행 (Ctrl+C 까지 반환하지 않음)"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            logger.info("[상태 서버] 중단 신호")
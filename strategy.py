@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+전략 판단 규칙 (실거래 main.py 와 백테스트 backtest.py 가 같은 코드를 사용)
+
+entry_conditions 는 스칼라(실거래: 마지막 캔들 1개)와 NumPy 배열(백테스트: 전체 구간)
+모두에 그대로 동작하도록 비교 연산과 & 만 사용합니다.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass(frozen=True)
+class StrategyParams:
+    position_ratio: float = 0.10  # 잔고 대비 진입 비율
+    trail_rate: float = 1.5  # 트레일링 스탑 callbackRate (%)
+    hard_sl: float = -5.0  # HARD SL / 백업 손절 (%)
+    backup_tp: float = 5.0  # 백업 익절 (%)
+    ema_fast: int = 20
+    ema_slow: int = 60
+    rsi_long_max: float = 68  # LONG 은 RSI 가 이 값 미만일 때만
+    rsi_short_min: float = 32  # SHORT 은 RSI 가 이 값 초과일 때만
+
+
+def entry_conditions(close, ema_fast, ema_slow, rsi, prev_ema_fast, prev_ema_slow,
+                     params: StrategyParams):
+    """
+    진입 조건: 2개 캔들 연속 추세 확인으로 노이즈 필터링.
+    (long_condition, short_condition) 반환
+    """
+    long_condition = ((ema_fast > ema_slow)
+                      & (prev_ema_fast > prev_ema_slow)
+                      & (close > ema_fast)
+                      & (rsi < params.rsi_long_max))
+    short_condition = ((ema_fast < ema_slow)
+                       & (prev_ema_fast < prev_ema_slow)
+                       & (close < ema_fast)
+                       & (rsi > params.rsi_short_min))
+    return long_condition, short_condition
+
+
+def position_pnl(side: str, entry_price, price):
+    """진입가 대비 현재 손익률 (%)"""
+    if side == "LONG":
+        return (price / entry_price - 1) * 100
+    return (1 - price / entry_price) * 100
+
+
+def hard_sl_hit(pnl, params: StrategyParams) -> bool:
+    """손익률(position_pnl)이 HARD SL 이하인지 (캔들 사이클 / 백테스트 공용)"""
+    return pnl <= params.hard_sl
+
+
+def protective_prices(side: str, price, params: StrategyParams):
+    """진입가 기준 (백업 손절가, 백업 익절가). Decimal 가격이면 Decimal 로 계산"""
+    sl_pct, tp_pct = abs(params.hard_sl) / 100, params.backup_tp / 100
+    if isinstance(price, Decimal):
+        sl_pct = Decimal(str(abs(params.hard_sl))) / 100
+        tp_pct = Decimal(str(params.backup_tp)) / 100
+    # LONG: 손절은 아래, 익절은 위 / SHORT: 반대
+    sign = 1 if side == "LONG" else -1
+    return price * (1 - sign * sl_pct), price * (1 + sign * tp_pct)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+전략 파라미터 그리드 탐색: 모든 조합을 프로세스 풀로 백테스트하고 지표별로 순위를 매깁니다.
+
+캔들 배열은 임시 .npy 파일 하나에 저장해 워커들이 읽기 전용 memmap 으로 공유합니다
+(작업마다 배열을 피클링하지 않음). 작업 단위는 파라미터 묶음이며, 같은 인디케이터
+설정(EMA / RSI 기준)끼리 묶어 워커가 신호 배열을 재사용하도록 정렬합니다.
+
+실행: python sweep.py --trail-rate 0.8,1.2,1.5,2 --hard-sl -3,-5 --backup-tp 3,5,8 \
+                      --ema-fast 10,20 --ema-slow 50,60,100 --top 20 --out sweep.csv
+"""
+import argparse
+import itertools
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, fields
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from backtest import compute_signals, simulate, summarize
+from strategy import StrategyParams
+
+logger = logging.getLogger(__name__)
+
+# 신호 배열을 결정하는 파라미터 (같으면 워커가 신호를 재사용)
+SIGNAL_KEYS = ("ema_fast", "ema_slow", "rsi_long_max", "rsi_short_min")
+# 순위 기준 지표 (모두 클수록 좋음: 낙폭은 음수라 0 에 가까울수록 큼)
+SORT_METRICS = ("pnl", "return_pct", "max_drawdown_pct", "trades", "win_rate")
+
+_worker = {}  # 워커 프로세스 전역: memmap 배열과 설정
+
+
+def param_grid(**values) -> list:
+    """필드별 후보 목록의 데카르트 곱 → StrategyParams 목록 (미지정 필드는 기본값)"""
+    names = [f.name for f in fields(StrategyParams) if f.name in values]
+    combos = [StrategyParams(**dict(zip(names, combo)))
+              for combo in itertools.product(*(values[name] for name in names))]
+    # EMA 가 느린 쪽보다 빠르지 않은 조합은 의미 없음
+    combos = [p for p in combos if p.ema_fast < p.ema_slow]
+    return sorted(combos, key=lambda p: tuple(getattr(p, k) for k in SIGNAL_KEYS))
+
+
+# --- 워커 ---------------------------------------------------------------------------
+def _init_worker(path, initial_balance, fee_rate, warmup):
+    ohlc = np.load(path, mmap_mode="r")
+    _worker.update(open=ohlc[0], high=ohlc[1], low=ohlc[2], close=ohlc[3],
+                   initial_balance=initial_balance, fee_rate=fee_rate, warmup=warmup)
+    _signals.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _signals(key):
+    params = StrategyParams(**dict(zip(SIGNAL_KEYS, key)))
+    return compute_signals(np.asarray(_worker["close"]), params)
+
+
+def _evaluate(chunk) -> list:
+    rows = []
+    for params in chunk:
+        long_sig, short_sig = _signals(tuple(getattr(params, k) for k in SIGNAL_KEYS))
+        warmup = params.ema_slow if _worker["warmup"] is None else _worker["warmup"]
+        trades, equity = simulate(_worker["open"], _worker["high"], _worker["low"],
+                                  _worker["close"], long_sig, short_sig, params,
+                                  _worker["initial_balance"], _worker["fee_rate"], warmup)
+        pnls = np.array([t[6] for t in trades])
+        rows.append({**asdict(params),
+                     **summarize(equity, pnls, _worker["initial_balance"])})
+    return rows
+
+
+# --- 실행 ---------------------------------------------------------------------------
+def _chunks(combos, size):
+    return [combos[i:i + size] for i in range(0, len(combos), size)]
+
+
+def run_sweep(candles: pd.DataFrame, combos, workers=None, chunk_size=None,
+              initial_balance: float = 1000.0, fee_rate: float = 0.0005,
+              warmup=None) -> pd.DataFrame:
+    """combos(StrategyParams 목록)를 병렬 백테스트해 조합별 지표 DataFrame 반환"""
+    workers = workers or os.cpu_count() or 1
+    # 워커마다 여러 묶음을 받아 부하가 고르게 퍼지도록 (묶음 안은 신호 키가 대부분 같음)
+    chunk_size = chunk_size or max(1, min(64, len(combos) // (workers * 4) or 1))
+    ohlc = np.ascontiguousarray(
+        candles[["open", "high", "low", "close"]].to_numpy(dtype=np.float64).T)
+
+    with tempfile.TemporaryDirectory(prefix="sweep-") as tmp:
+        path = os.path.join(tmp, "ohlc.npy")
+        np.save(path, ohlc)
+        initargs = (path, initial_balance, fee_rate, warmup)
+        if workers == 1:
+            _init_worker(*initargs)
+            results = [_evaluate(chunk) for chunk in _chunks(combos, chunk_size)]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=initargs) as pool:
+                results = list(pool.map(_evaluate, _chunks(combos, chunk_size)))
+    return pd.DataFrame([row for chunk in results for row in chunk])
+
+
+def rank(results: pd.DataFrame, by=("pnl", "max_drawdown_pct", "trades"),
+         min_trades: int = 0) -> pd.DataFrame:
+    """지표 우선순위대로 내림차순 정렬"""
+    unknown = set(by) - set(SORT_METRICS)
+    if unknown:
+        raise ValueError(f"알 수 없는 순위 기준: {', '.join(sorted(unknown))}")
+    ranked = results[results["trades"] >= min_trades]
+    ranked = ranked.sort_values(list(by), ascending=False)
+    return ranked.reset_index(drop=True)
+
+
+def _floats(text):
+    return [float(v) for v in text.split(",")]
+
+
+def _ints(text):
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    from backtest import _to_ms
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description="전략 파라미터 병렬 그리드 탐색")
+    parser.add_argument("--db", default="candles.sqlite3")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--timeframe", default="15m")
+    parser.add_argument("--start", help="시작일 (UTC, 예: 2025-01-01)")
+    parser.add_argument("--end", help="종료일 (UTC)")
+    parser.add_argument("--balance", type=float, default=1000.0)
+    parser.add_argument("--fee", type=float, default=0.0005, help="시장가 수수료율")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    defaults = StrategyParams()
+    for f in fields(StrategyParams):
+        parse = _ints if f.type in (int, "int") else _floats
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=parse,
+                            default=[getattr(defaults, f.name)],
+                            help=f"쉼표 구분 후보 (기본 {getattr(defaults, f.name)})")
+    parser.add_argument("--sort", default="pnl,max_drawdown_pct,trades",
+                        help=f"순위 기준 (쉼표 구분: {', '.join(SORT_METRICS)})")
+    parser.add_argument("--min-trades", type=int, default=1)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="전체 결과 CSV 저장 경로")
+    args = parser.parse_args()
+
+    store = CandleStore(args.db, args.symbol, args.timeframe)
+    candles = store.load(_to_ms(args.start), _to_ms(args.end))
+    store.close()
+    if candles.empty:
+        print(f"저장된 캔들 없음: {args.symbol} {args.timeframe} ({args.db})")
+        return
+
+    combos = param_grid(**{f.name: getattr(args, f.name) for f in fields(StrategyParams)})
+    print(f"{args.symbol} {args.timeframe}: 캔들 {len(candles)}개, "
+          f"조합 {len(combos)}개, 워커 {args.workers}개")
+    start = time.perf_counter()
+    results = run_sweep(candles, combos, args.workers,
+                        initial_balance=args.balance, fee_rate=args.fee)
+    elapsed = time.perf_counter() - start
+    print(f"완료: {elapsed:.1f}초 ({len(combos) / elapsed:.0f} 조합/초)")
+
+    ranked = rank(results, args.sort.split(","), args.min_trades)
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(ranked.head(args.top).to_string(float_format=lambda v: f"{v:.2f}"))
+    if args.out:
+        ranked.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
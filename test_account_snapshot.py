@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""account_snapshot 조회 테스트 (커넥터와 같은 메서드 시그니처의 클라이언트)
+
+실행: python -m pytest -q test_account_snapshot.py
+"""
+from decimal import Decimal
+
+from account_snapshot import fetch_snapshot
+
+
+class ConnectorLikeClient:
+    """binance-futures-connector UMFutures 와 같은 계약: get_open_orders 는 주문 1건 조회"""
+
+    def __init__(self, orders=()):
+        self.orders = list(orders)
+
+    def account(self, **kwargs):
+        return {"assets": [{"asset": "USDT", "availableBalance": "123.5"}]}
+
+    def get_position_risk(self, symbol, **kwargs):
+        return [{"symbol": symbol, "positionAmt": "0.010", "entryPrice": "30000"}]
+
+    def get_open_orders(self, symbol, orderId=None, origClientOrderId=None, **kwargs):
+        if orderId is None and origClientOrderId is None:
+            raise ValueError("orderId is mandatory")
+        return next(o for o in self.orders if o["orderId"] == orderId)
+
+    def get_orders(self, **kwargs):
+        return [o for o in self.orders if o["symbol"] == kwargs.get("symbol", o["symbol"])]
+
+
+def test_snapshot_complete_with_connector_signatures():
+    client = ConnectorLikeClient([{"orderId": 7, "symbol": "BTCUSDT", "type": "STOP_MARKET"}])
+    snap = fetch_snapshot(client, "BTCUSDT")
+    assert snap.complete, snap.errors
+    assert snap.balance == 123.5
+    assert (snap.side, snap.qty, snap.entry_price) == ("LONG", Decimal("0.010"), 30000.0)
+    assert [o["orderId"] for o in snap.open_orders] == [7]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""체크포인트 저장 → 복원 왕복 테스트 (HARD SL 청산 직후 재시작 포함)
+
+실행: python -m pytest -q test_checkpoint.py
+"""
+import importlib
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+from checkpoint import StateCheckpoint
+from engine import SymbolState
+
+INTERVAL = 60_000
+SYMBOL = "BTCUSDT"
+
+
+def make_klines(n: int, drop_at: int) -> list:
+    """drop_at 번째 캔들까지 100 평탄, 그 캔들에서 90 으로 하락 (HARD SL -5% 발동)"""
+    rows, t = [], 1_700_000_000_000
+    for i in range(n):
+        o, c = (100.0, 90.0) if i == drop_at else (90.0, 90.0) if i > drop_at else (100.0, 100.0)
+        rows.append([t, str(o), str(max(o, c)), str(min(o, c)), str(c), "10", t + INTERVAL - 1,
+                     "1000", 10, "5", "500", "0"])
+        t += INTERVAL
+    return rows
+
+
+def load_main(tmp_path):
+    path = tmp_path / "klines.json"
+    path.write_text(json.dumps(make_klines(260, 200)))
+    os.environ.update(PAPER_KLINES=str(path), SYMBOLS=SYMBOL, TIMEFRAME="1m",
+                      STATE_FILE=str(tmp_path / "bot_state.json"),
+                      CANDLE_DB=str(tmp_path / "candles.sqlite3"),
+                      FILTER_CACHE_FILE=str(tmp_path / "exchange_filters.json"),
+                      LOG_FILE=str(tmp_path / "bot.log"))
+    sys.modules.pop("main", None)
+    return importlib.import_module("main")
+
+
+def test_restart_after_hard_sl_flatten(tmp_path):
+    main = load_main(tmp_path)
+    from exchange_filters import FilterRegistry
+    from paper_exchange import PaperExchange
+
+    clock = [time.time() * 1000 // INTERVAL * INTERVAL + 50]
+    main.server_clock.offset_ms = clock[0] - time.time() * 1000
+    exchange = PaperExchange.from_file(os.environ["PAPER_KLINES"], [SYMBOL], history=200,
+                                       now=lambda: clock[0])
+    registry = FilterRegistry(exchange, os.environ["FILTER_CACHE_FILE"])
+    registry.ensure()
+    st = main.setup_symbol(exchange, SYMBOL, registry)
+    main.run_cycle(exchange, st, None, registry, None)
+    main.open_position(exchange, st, "LONG", 10_000, 100.0)
+    exchange.cancel_open_orders(symbol=SYMBOL)  # 보호 주문 없이 HARD SL 경로로
+
+    clock[0] += INTERVAL  # 90 으로 마감 → -10%
+    main.server_clock.offset_ms = clock[0] - time.time() * 1000
+    main.run_cycle(exchange, st, None, registry, None)
+    assert float(exchange.get_position_risk(symbol=SYMBOL)[0]["positionAmt"]) == 0
+    assert st.previous_side is None and st.previous_qty == Decimal("0")
+
+    # 재시작: 저장된 파일에서 복원
+    saved = StateCheckpoint(os.environ["STATE_FILE"])
+    assert saved.load()
+    st2 = main.setup_symbol(exchange, SYMBOL, registry, saved.get(SYMBOL))
+    assert (st2.previous_side, st2.previous_qty) == (None, Decimal("0"))
+    assert st2.last_decision_open_time == st.last_decision_open_time
+    assert st2.indicator_state.last_open_time == st.indicator_state.last_open_time
+
+
+def new_state() -> SymbolState:
+    return SymbolState(symbol=SYMBOL, step_size=Decimal("0.001"), min_qty=Decimal("0.001"),
+                       tick_size=Decimal("0.1"), store=None)
+
+
+def test_round_trip(tmp_path):
+    st = new_state()
+    st.previous_side, st.previous_qty = "SHORT", Decimal("0.015")
+    st.last_decision_open_time, st.protective_orders = 1_700_000_000_000, [3, 4]
+    ck = StateCheckpoint(str(tmp_path / "state.json"))
+    ck.update(SYMBOL, st.to_checkpoint())
+    assert ck.save()
+    ck2 = StateCheckpoint(str(tmp_path / "state.json"))
+    assert ck2.load()
+    st2 = new_state()
+    st2.restore(ck2.get(SYMBOL))
+    assert (st2.previous_side, st2.previous_qty, st2.last_decision_open_time,
+            st2.protective_orders) == ("SHORT", Decimal("0.015"), 1_700_000_000_000, [3, 4])
+
+
+def test_restore_ignores_bad_values():
+    st = new_state()
+    st.restore({"previous_side": "FLAT", "previous_qty": "None",
+                "last_decision_open_time": "x", "indicator": {"fast": 20}})
+    assert (st.previous_side, st.previous_qty, st.last_decision_open_time,
+            st.indicator_state) == (None, Decimal("0"), None, None)
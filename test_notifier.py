@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""notifier 메시지 자르기 테스트 (HTML 태그 / 엔티티 보존)
+
+실행: python -m pytest -q test_notifier.py
+"""
+import re
+
+from notifier import pack_messages, truncate_html
+
+MESSAGE = ('<b>HARD SL 발동</b>\n심볼: BTCUSDT\n<a href="https://example.com/x">상세 &amp; 기록</a>\n'
+           + "<code>" + "x" * 5000 + "</code>")
+
+
+def balanced(text: str) -> bool:
+    stack = []
+    for closing, name in re.findall(r"<(/?)([a-z][a-z0-9-]*)[^>]*>", text):
+        if not closing:
+            stack.append(name)
+        elif not stack or stack.pop() != name:
+            return False
+    return not stack
+
+
+def test_truncate_keeps_tags_and_entities_whole():
+    for limit in range(1, 120):
+        out = truncate_html(MESSAGE, limit)
+        assert len(out) <= limit
+        assert balanced(out), out
+        assert out.rfind("<") <= out.rfind(">")
+        assert out.rfind("&") <= out.rfind(";")
+
+
+def test_short_message_unchanged():
+    assert truncate_html("<b>ok</b>", 100) == "<b>ok</b>"
+
+
+def test_pack_long_message():
+    batches = pack_messages(["<b>a</b>", MESSAGE])
+    assert all(len(b) <= 4096 and balanced(b) for b in batches)
+    assert batches[-1].endswith("</code>")
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""numeric.Grid 내림 경계 테스트 (Decimal 경로와 같은 결과인지)
+
+실행: python -m pytest -q test_numeric.py  (또는 python test_numeric.py)
+"""
+import random
+from decimal import Decimal
+
+from numeric import Grid
+
+
+def decimal_floor(value: float, step: str) -> int:
+    """기준: 값의 10진 표현을 Decimal 로 나눈 내림 칸 수"""
+    return int(Decimal(repr(value)) // Decimal(step))
+
+
+def test_float_division_noise():
+    assert Grid("0.1").floor(0.3) == 3
+    assert Grid("0.001").floor(0.007) == 7
+    assert Grid("0.01").floor(1.15) == 115
+
+
+def test_exact_grid_values_beyond_1e8_units():
+    grid = Grid("0.001")
+    assert grid.floor(73762.949) == 73762949
+    rng = random.Random(1)
+    for step in ("0.001", "0.1", "0.00001", "1"):
+        grid = Grid(step)
+        for _ in range(5000):
+            units = rng.randrange(10 ** 8, 10 ** 13)
+            value = float(str(units * Decimal(step)))
+            assert grid.floor(value) == units, (step, value)
+
+
+def test_just_below_grid_is_not_rounded_up():
+    grid = Grid("0.001")
+    assert grid.floor(0.0069999999) == 6
+    assert grid.floor(73762.94899999) == 73762948
+    # 칸 수 대비 1e-13 이상 아래 (float 로 구분되는 차이) 는 항상 내림
+    rng = random.Random(2)
+    for step in ("0.001", "0.1", "1"):
+        grid = Grid(step)
+        for _ in range(5000):
+            units = rng.randrange(1, 10 ** 10)
+            offset = Decimal(10) ** -rng.randint(1, 3)
+            value = float((units - offset) * Decimal(step))
+            assert grid.floor(value) == decimal_floor(value, step), (step, value)
+
+
+def test_non_positive_is_zero():
+    grid = Grid("0.1")
+    assert grid.floor(0) == 0
+    assert grid.floor(-1.5) == 0
+
+
+def test_format_round_trip():
+    grid = Grid("0.001")
+    assert grid.format(grid.floor(73762.949)) == "73762.949"
+    assert grid.parse("73762.949") == 73762949
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_"):
+            func()
+    print("ok")
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""user_stream.AccountStream REST 동기화 테스트 (커넥터와 같은 메서드 시그니처의 클라이언트)
+
+실행: python -m pytest -q test_user_stream.py
+"""
+from decimal import Decimal
+
+from test_account_snapshot import ConnectorLikeClient
+from user_stream import AccountStream
+
+
+def test_resync_with_connector_signatures():
+    client = ConnectorLikeClient([{"orderId": 7, "symbol": "BTCUSDT", "type": "STOP_MARKET"},
+                                  {"orderId": 8, "symbol": "ETHUSDT", "type": "STOP_MARKET"}])
+    stream = AccountStream(client, ["BTCUSDT", "ETHUSDT"], "ws://127.0.0.1:9")
+    try:
+        assert stream.resync()
+        assert stream.synced
+        assert stream.balance == 123.5
+        assert stream.positions["BTCUSDT"] == ("LONG", Decimal("0.010"), 30000.0)
+        assert list(stream.open_orders["BTCUSDT"]) == [7]
+        assert list(stream.open_orders["ETHUSDT"]) == [8]
+        stream.connected = True  # 웹소켓 없이 캐시 경로만 확인
+        snap = stream.snapshot("BTCUSDT")
+        assert snap is not None and snap.complete
+        assert [o["orderId"] for o in snap.open_orders] == [7]
+    finally:
+        stream.stop()
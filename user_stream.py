@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+사용자 데이터 스트림 기반 계정 상태 캐시
+
+listenKey 로 사용자 데이터 스트림을 구독해 ACCOUNT_UPDATE(잔고 / 포지션)와
+ORDER_TRADE_UPDATE(주문 상태 / 체결)를 메모리에 반영합니다. 전략 루프는 REST 조회 대신
+snapshot() 으로 읽고, 스트림이 끊겼거나 아직 동기화 전이면 None → 기존 REST 스냅샷으로 대체합니다.
+
+보호 주문(트레일링 스탑 / 손절 / 익절) 중 하나가 체결되거나 포지션이 0 이 되면
+남은 주문을 바로 취소합니다(OCO 방식). 캔들 사이클을 기다리지 않습니다.
+"""
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from binance.websocket.um_futures.websocket_client import UMFuturesWebsocketClient
+
+from account_snapshot import AccountSnapshot, read_balance, read_open_orders, read_position
+from metrics import API_ERRORS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PROTECTIVE_TYPES = frozenset({"TRAILING_STOP_MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET"})
+DONE_STATUSES = frozenset({"FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"})
+
+
+def order_from_event(o: dict) -> dict:
+    """ORDER_TRADE_UPDATE 의 o → get_orders(미체결 주문 목록) 응답과 같은 키의 주문 dict"""
+    return {"orderId": o["i"], "symbol": o["s"], "side": o["S"],
+            "type": o.get("ot") or o["o"], "status": o["X"], "origQty": o.get("q"),
+            "stopPrice": o.get("sp"), "reduceOnly": bool(o.get("R"))}
+
+
+class AccountStream:
+    """
+    심볼별 포지션 / 미체결 주문과 잔고(USDT availableBalance, REST 값)를 보관합니다.
+    ACCOUNT_UPDATE 에는 사용 가능 잔고가 없으므로(cw 는 포지션 / 주문 증거금 포함)
+    잔고 변경 이벤트가 오면 REST 로 다시 읽습니다.
+    (재)연결 시와 resync_interval 마다 REST 로 전체 상태를 다시 맞추고,
+    listenKey 는 keepalive 초마다 연장합니다(만료 60분).
+    on_event(kind, symbol, data): "fill" / "position" / "cancel" 이벤트 콜백 (스트림 스레드에서 호출)
+    """
+
+    def __init__(self, client, symbols, stream_url: str, keepalive: float = 1800.0,
+                 resync_interval: float = 1800.0, check_interval: float = 10.0,
+                 asset: str = "USDT", on_event=None):
+        self.client = client
+        self.symbols = list(symbols)
+        self.stream_url = stream_url
+        self.keepalive = keepalive
+        self.resync_interval = resync_interval
+        self.check_interval = check_interval
+        self.asset = asset
+        self.on_event = on_event
+        self.connected = False
+        self.synced = False
+        self.listen_key = None
+        self.last_event_time = None
+        self.balance = 0.0
+        self.positions = {s: (None, Decimal("0"), 0.0) for s in self.symbols}
+        self.open_orders = {s: {} for s in self.symbols}
+        self._ws = None
+        self._renewed_at = 0.0
+        self._synced_at = 0.0
+        self._expired = False
+        self._lock = threading.Lock()
+        self._cancelling = set()
+        self._balance_pending = False
+        # 스트림 스레드를 막지 않도록 REST 호출(OCO 취소 / 잔고 재조회)은 풀에서
+        self._rest_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="account-rest")
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.connected and self.synced
+
+    def snapshot(self, symbol: str):
+        """메모리의 계정 상태 → AccountSnapshot (스트림 미준비 시 None)"""
+        if not self.ready:
+            return None
+        with self._lock:
+            side, qty, entry = self.positions[symbol]
+            snap = AccountSnapshot(balance=self.balance, side=side, qty=qty, entry_price=entry,
+                                   open_orders=list(self.open_orders[symbol].values()))
+        snap.ok = dict.fromkeys(snap.ok, True)
+        return snap
+
+    # --- 연결 관리 ---
+    def start(self) -> bool:
+        self._stop.clear()
+        self._connect()
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="user-stream", daemon=True)
+            self._thread.start()
+        return self.ready
+
+    def _connect(self) -> bool:
+        self._close_ws()
+        self.synced = False
+        try:
+            self.listen_key = self.client.new_listen_key()["listenKey"]
+            self._renewed_at = time.monotonic()
+            self._expired = False
+            self._ws = UMFuturesWebsocketClient(stream_url=self.stream_url,
+                                                on_message=self._on_message,
+                                                on_close=self._on_close,
+                                                on_error=self._on_error)
+            self._ws.user_data(self.listen_key)
+            self.connected = True
+            logger.info(f"[계정 스트림] 사용자 데이터 스트림 구독 ({self.stream_url})")
+        except Exception as e:
+            API_ERRORS.inc(call="listen_key")
+            self.connected = False
+            logger.warning(f"[계정 스트림] 연결 실패 (REST 조회 사용): {e}")
+            return False
+        # 구독 후 REST 로 전체 상태를 맞춤 (구독 전 변화분 반영)
+        self.resync()
+        return self.ready
+
+    def resync(self) -> bool:
+        try:
+            balance = read_balance(self.client)
+            positions = {s: read_position(self.client, s) for s in self.symbols}
+            orders = {s: {o["orderId"]: o for o in read_open_orders(self.client, s)}
+                      for s in self.symbols}
+        except Exception as e:
+            API_ERRORS.inc(call="account_resync")
+            logger.warning(f"[계정 스트림] REST 동기화 실패: {e}")
+            return False
+        with self._lock:
+            self.balance, self.positions, self.open_orders = balance, positions, orders
+        self._synced_at = time.monotonic()
+        self.synced = True
+        return True
+
+    def stop(self):
+        self._stop.set()
+        self._close_ws()
+        if self.listen_key:
+            try:
+                self.client.close_listen_key(listenKey=self.listen_key)
+            except Exception as e:
+                logger.debug(f"[계정 스트림] listenKey 종료 실패: {e}")
+        # 봇 재시작마다 새 인스턴스를 만들므로 풀 스레드를 남기지 않음
+        self._rest_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _close_ws(self):
+        ws, self._ws = self._ws, None
+        was_connected, self.connected = self.connected, False
+        if ws is not None and was_connected:
+            try:
+                ws.stop()
+            except Exception as e:
+                logger.debug(f"[계정 스트림] 종료 중 오류: {e}")
+
+    def _on_close(self, _):
+        if not self._stop.is_set():
+            logger.warning("[계정 스트림] 연결 종료 → REST 조회로 대체")
+        self.connected = False
+
+    def _on_error(self, _, error):
+        if not self._stop.is_set():
+            logger.warning(f"[계정 스트림] 오류 → REST 조회로 대체: {error}")
+        self.connected = False
+
+    def _run(self):
+        """재연결 / listenKey 연장 / 주기적 REST 재동기화"""
+        while not self._stop.wait(self.check_interval):
+            if self._expired or not self.connected:
+                self._connect()
+                continue
+            now = time.monotonic()
+            if now - self._renewed_at >= self.keepalive:
+                try:
+                    self.client.renew_listen_key(listenKey=self.listen_key)
+                    self._renewed_at = now
+                except Exception as e:
+                    API_ERRORS.inc(call="listen_key")
+                    logger.warning(f"[계정 스트림] listenKey 연장 실패 → 재연결: {e}")
+                    self._connect()
+                    continue
+            if now - self._synced_at >= self.resync_interval:
+                self.resync()
+
+    # --- 이벤트 처리 ---
+    def _on_message(self, _, message):
+        data = json.loads(message)
+        if not isinstance(data, dict):
+            return
+        kind = data.get("e")
+        if kind == "ORDER_TRADE_UPDATE":
+            self._on_order(data["o"], data.get("E"))
+        elif kind == "ACCOUNT_UPDATE":
+            self._on_account(data["a"], data.get("E"))
+        elif kind == "listenKeyExpired":
+            logger.warning("[계정 스트림] listenKey 만료 → 재연결")
+            self._expired = True
+            self.connected = False
+        else:
+            return  # 구독 응답 등
+        self.last_event_time = time.time()
+
+    def _on_order(self, o: dict, event_ms):
+        symbol = o.get("s")
+        if symbol not in self.open_orders:
+            return
+        order = order_from_event(o)
+        with self._lock:
+            if order["status"] in DONE_STATUSES:
+                self.open_orders[symbol].pop(order["orderId"], None)
+            else:
+                self.open_orders[symbol][order["orderId"]] = order
+        if o.get("x") == "TRADE":
+            self._emit("fill", symbol, dict(order, lastQty=o.get("l"), avgPrice=o.get("ap"),
+                                            filledQty=o.get("z")))
+        # 보호 주문 전량 체결 = 포지션 종료 → 남은 보호 주문 즉시 취소
+        if order["status"] == "FILLED" and order["type"] in PROTECTIVE_TYPES:
+            self._cancel_siblings(symbol, f"{order['type']} 체결", event_ms)
+
+    def _on_account(self, a: dict, event_ms):
+        if any(b.get("a") == self.asset for b in a.get("B", [])):
+            # 진입 수량 계산은 REST 스냅샷과 같은 availableBalance 기준 → 이벤트 값 대신 재조회
+            self._refresh_balance()
+        for p in a.get("P", []):
+            symbol = p.get("s")
+            if symbol not in self.positions:
+                continue
+            amt = Decimal(str(p.get("pa", "0")))
+            side = None if amt == 0 else "LONG" if amt > 0 else "SHORT"
+            position = (side, abs(amt), float(p.get("ep", 0)) if side else 0.0)
+            with self._lock:
+                previous = self.positions[symbol]
+                self.positions[symbol] = position
+                orphaned = side is None and bool(self.open_orders[symbol])
+            if previous != position:
+                self._emit("position", symbol, {"side": side, "qty": position[1],
+                                                "entry_price": position[2],
+                                                "previous": previous[0]})
+            if orphaned:
+                self._cancel_siblings(symbol, "포지션 종료", event_ms)
+
+    def _emit(self, kind, symbol, data):
+        if self.on_event is not None:
+            try:
+                self.on_event(kind, symbol, data)
+            except Exception as e:
+                logger.warning(f"[계정 스트림] 이벤트 콜백 오류: {e}")
+
+    def _submit(self, func, *args) -> bool:
+        try:
+            self._rest_pool.submit(func, *args)
+            return True
+        except RuntimeError:
+            return False  # stop() 이후 도착한 이벤트
+
+    def _refresh_balance(self):
+        with self._lock:
+            if self._balance_pending:
+                return
+            self._balance_pending = True
+        if not self._submit(self._read_balance):
+            self._balance_pending = False
+
+    def _read_balance(self):
+        try:
+            with self._lock:
+                self._balance_pending = False
+            balance = read_balance(self.client)
+        except Exception as e:
+            API_ERRORS.inc(call="account")
+            logger.warning(f"[계정 스트림] 잔고 재조회 실패 (이전 값 유지): {e}")
+            return
+        with self._lock:
+            self.balance = balance
+
+    def _cancel_siblings(self, symbol: str, reason: str, event_ms=None):
+        with self._lock:
+            if symbol in self._cancelling:
+                return
+            self._cancelling.add(symbol)
+        if not self._submit(self._cancel, symbol, reason, event_ms):
+            with self._lock:
+                self._cancelling.discard(symbol)
+
+    def _cancel(self, symbol: str, reason: str, event_ms):
+        try:
+            self.client.cancel_open_orders(symbol=symbol)
+            with self._lock:
+                self.open_orders[symbol].clear()
+            if event_ms:
+                # 거래소 이벤트 시각 → 취소 응답까지 (서버 / 로컬 시계 차이 포함)
+                STAGE_SECONDS.observe(max(time.time() - event_ms / 1000, 0.0), stage="oco_cancel")
+            logger.info(f"[{symbol}] [계정 스트림] {reason} → 남은 주문 취소 완료")
+            self._emit("cancel", symbol, {"reason": reason})
+        except Exception as e:
+            API_ERRORS.inc(call="cancel_open_orders")
+            logger.warning(f"[{symbol}] [계정 스트림] {reason} → 남은 주문 취소 실패: {e}")
+        finally:
+            with self._lock:
+                self._cancelling.discard(symbol)